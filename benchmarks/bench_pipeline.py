@@ -0,0 +1,259 @@
+"""
+End-to-end pipeline benchmark over a synthetic multi-day archive.
+
+    python -m benchmarks.bench_pipeline [--days 90 | --years 3] [--runs-per-day 3] [--world 1000]
+                                        [--hn 30] [--local 60] [--chart-sample 10] [--alloc-sample 5]
+                                        [--keep DIR] [--json-out results.jsonl]
+
+Generates data/YYYY-MM-DD/runs/<HHMMSS>/raw.json, raw.json and report.md trees in a temp
+dir (or --keep DIR), then times every stage separately: merge_day_payload, _uniq,
+cluster_stories, summarize, generate_charts, make_markdown, site_build.build_day/build_index and
+wrapup.build_email_payload. Timings come from an untraced pass; allocation figures from a
+tracemalloc pass over the first --alloc-sample calls; rss_peak_kib is the process
+high-water mark after the stage. Prints one JSON document (and appends it to --json-out)
+so results can be compared across commits.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import main as garden
+import site_build
+import wrapup
+from config import ROOT
+from utils.cluster import cluster_stories
+from utils import summarize as summarizer
+
+_WORDS = (
+    "market election storm climate court vaccine rocket chip startup senate trade energy "
+    "museum league festival bridge drought merger strike galaxy robot ocean wildfire bank "
+    "budget virus satellite protest tariff housing transit railway summit treaty quantum "
+    "battery reactor fossil glacier harvest airline pharmacy copper lithium rally verdict"
+).split()
+_SOURCES = ["AP — Top", "BBC — World", "NPR — Top Stories", "ScienceDaily — Top", "Nature — Technology",
+            "BBC — Business", "NPR — Politics", "AP — Business"]
+
+
+# -----------------------------------------------------------
+# Synthetic archive
+# -----------------------------------------------------------
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 12))).capitalize()
+
+
+def _run_time(day: dt.date, run: int, runs_per_day: int) -> dt.datetime:
+    """Runs spread evenly over the day (09:00, 15:00, 21:00 for three)."""
+    step = 1440 // max(1, runs_per_day) if runs_per_day > 3 else 360
+    return dt.datetime.combine(day, dt.time(0)) + dt.timedelta(minutes=(540 if runs_per_day <= 3 else 0) + run * step)
+
+
+def _snapshot(rng: random.Random, day: dt.date, run: int, args) -> Dict[str, Any]:
+    collected = _run_time(day, run, args.runs_per_day).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def _news(n, prefix):
+        out = []
+        for i in range(n):
+            # ~1/3 of items repeat across runs, like real feeds between refreshes
+            k = rng.randint(0, n * 2) if rng.random() < 0.33 else f"{run}-{i}"
+            r = random.Random(f"{day}-{prefix}-{k}")
+            out.append({"title": _title(r), "link": f"https://news.example/{day}/{prefix}/{k}",
+                        "published": collected, "source": r.choice(_SOURCES)})
+        return out
+
+    hn = []
+    for i in range(args.hn):
+        oid = str(rng.randint(0, args.hn * 3))
+        r = random.Random(f"{day}-hn-{oid}")
+        hn.append({"title": _title(r), "url": f"https://hn.example/{oid}", "points": rng.randint(1, 900),
+                   "author": "bench", "num_comments": rng.randint(0, 600), "created_at": collected, "objectID": oid})
+    return {
+        "date": str(day),
+        "collected_at_utc": collected,
+        "hn": {"fetched_at": collected, "items": hn},
+        "wiki": {"today": [{"year": 1900 + i, "text": _title(rng) + ".", "pages": []} for i in range(10)],
+                 "random": {"title": _title(rng), "extract": ". ".join(_title(rng) for _ in range(8)) + "."}},
+        "apod": {"entry": {"title": _title(rng), "link": "https://apod.example/", "summary": "", "published": collected}},
+        "news": {"world": _news(args.world, "w"), "local": _news(args.local, "l")},
+    }
+
+
+def generate(root: Path, args) -> List[Path]:
+    rng = random.Random(args.seed)
+    data = root / "data"
+    start = dt.date(2024, 1, 1)
+    days = []
+    for n in range(args.days):
+        day = start + dt.timedelta(days=n)
+        d = data / str(day)
+        combined: Dict[str, Any] = {}
+        for run in range(args.runs_per_day):
+            snap = _snapshot(rng, day, run, args)
+            run_dir = d / "runs" / _run_time(day, run, args.runs_per_day).strftime("%H%M%S")
+            run_dir.mkdir(parents=True, exist_ok=True)
+            (run_dir / "raw.json").write_text(json.dumps(snap, ensure_ascii=False), encoding="utf-8")
+            combined = garden.merge_day_payload(combined, snap)
+        (d / "raw.json").write_text(json.dumps(combined, ensure_ascii=False, indent=2), encoding="utf-8")
+        garden.make_markdown(combined, {"hn_top10_points": None}, d)
+        days.append(d)
+    return days
+
+
+# -----------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------
+def _load(p: Path) -> Dict[str, Any]:
+    return json.loads(p.read_text(encoding="utf-8"))
+
+
+def _rss_kib() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure(name: str, calls: List[Callable[[], Any]], alloc_sample: int) -> Dict[str, Any]:
+    durations = []
+    for fn in calls:
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    peak, blocks = 0, 0
+    for fn in calls[:alloc_sample]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        blocks += sum(max(0, s.count_diff) for s in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    durations.sort()
+    return {
+        "calls": len(calls),
+        "total_s": round(sum(durations), 4),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3) if durations else 0,
+        "p95_ms": round(durations[int(0.95 * (len(durations) - 1))] * 1000, 3) if durations else 0,
+        "alloc_peak_kib": round(peak / 1024, 1),
+        "alloc_blocks_retained": blocks,
+        "rss_peak_kib": _rss_kib(),
+    }
+
+
+def run_stages(root: Path, days: List[Path], args) -> Dict[str, Any]:
+    data, docs = root / "data", root / "docs"
+    repo = site_build.repo_slug()
+    runs = {d: [_load(p) for p in sorted((d / "runs").glob("*/raw.json"))] for d in days}
+    payloads = {d: _load(d / "raw.json") for d in days}
+    stages: Dict[str, Any] = {}
+
+    def _merge_day(snaps):
+        combined: Dict[str, Any] = {}
+        for s in snaps:
+            combined = garden.merge_day_payload(combined, s)
+        return combined
+
+    stages["merge_day_payload"] = measure(
+        "merge_day_payload", [lambda s=runs[d]: _merge_day(s) for d in days], args.alloc_sample)
+
+    # _uniq on the concatenated world lists of all runs, as merge_day_payload sees them
+    stages["_uniq"] = measure("_uniq", [
+        lambda items=[it for s in runs[d] for it in s["news"]["world"]]: garden._uniq(items, keys=["title", "link"])
+        for d in days], args.alloc_sample)
+
+    stages["cluster_stories"] = measure(
+        "cluster_stories", [lambda p=payloads[d]: cluster_stories(p["news"]["world"]) for d in days], args.alloc_sample)
+
+    def _blob(p):
+        titles = [w.get("title", "") for w in p["news"]["world"][:30]] + [l.get("title", "") for l in p["news"]["local"][:15]]
+        return ". ".join(t for t in titles if t)
+
+    # the engine itself: summarize() would mostly answer from its content-hash cache here
+    stages["summarize"] = measure(
+        "summarize", [lambda b=_blob(payloads[d]): summarizer._rank([b], 3, summarizer.get_idf()) for d in days],
+        args.alloc_sample)
+
+    sample = days[-args.chart_sample:] if args.chart_sample else []
+    stages["generate_charts"] = measure(
+        "generate_charts", [lambda d=d: garden.generate_charts(runs[d][-1], d) for d in sample], args.alloc_sample)
+
+    stages["make_markdown"] = measure(
+        "make_markdown", [lambda d=d: garden.make_markdown(payloads[d], {"hn_top10_points": None}, d) for d in days],
+        args.alloc_sample)
+
+    docs.mkdir(parents=True, exist_ok=True)
+    stages["site_build.build_day"] = measure(
+        "site_build.build_day", [lambda d=d: site_build.build_day(d, repo, docs) for d in days], args.alloc_sample)
+    stages["site_build.build_index"] = measure(
+        "site_build.build_index", [lambda: site_build.build_index(site_build.get_day_dirs(data), repo, docs)],
+        args.alloc_sample)
+
+    stages["wrapup.build_email_payload"] = measure(
+        "wrapup.build_email_payload", [lambda p=payloads[d]: wrapup.build_email_payload(p) for d in days],
+        args.alloc_sample)
+    return stages
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the garden pipeline on a synthetic archive.")
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--years", type=float, default=None, help="overrides --days (365 days per year)")
+    ap.add_argument("--runs-per-day", type=int, default=3)
+    ap.add_argument("--world", type=int, default=1000, help="world items per run")
+    ap.add_argument("--local", type=int, default=60, help="local items per run")
+    ap.add_argument("--hn", type=int, default=30, help="HN items per run")
+    ap.add_argument("--chart-sample", type=int, default=10, help="days to chart (charts are slow)")
+    ap.add_argument("--alloc-sample", type=int, default=5, help="calls per stage traced with tracemalloc")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--keep", type=Path, default=None, help="generate into DIR and keep it")
+    ap.add_argument("--json-out", type=Path, default=None, help="append the result as one JSON line")
+    args = ap.parse_args(argv)
+    if args.years:
+        args.days = int(args.years * 365)
+
+    summarizer.use_ephemeral()  # leave the real corpus IDF / summary cache alone
+    with tempfile.TemporaryDirectory(prefix="garden-bench-") as tmp:
+        root = args.keep or Path(tmp)
+        t0 = time.perf_counter()
+        days = generate(root, args)
+        gen_s = time.perf_counter() - t0
+        stages = run_stages(root, days, args)
+
+    result = {
+        "benchmark": "pipeline",
+        "commit": _git_rev(),
+        "python": sys.version.split()[0],
+        "timestamp": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("keep", "json_out")},
+        "generate_s": round(gen_s, 3),
+        "stages": stages,
+        "rss_peak_kib": _rss_kib(),
+    }
+    doc = json.dumps(result, indent=2)
+    print(doc)
+    if args.json_out:
+        with args.json_out.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compare the RSS parser backends (feedparser vs. streaming) on recorded feed bodies.
+
+    python -m benchmarks.bench_rss_parse [DIR ...] [--limit 15] [--repeat 20]
+
+DIR defaults to the HTTP cache (data/.cache/http/*.body); any *.xml / *.body / *.rss
+files are used. With no recorded bodies a synthetic 500-item feed is generated so the
+benchmark always runs. Prints one JSON document with per-feed and total timings.
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+from config import HTTP_CACHE_DIR
+from sources.news_common import _parse_rss
+from sources import rss_stream
+
+BACKENDS = ["feedparser", "stream"]
+
+
+def _synthetic_feed(n: int = 500) -> bytes:
+    items = "".join(
+        f"<item><title>Synthetic headline {i} about markets &amp; science</title>"
+        f"<link>https://example.com/story/{i}</link><pubDate>Mon, 13 Oct 2025 10:00:00 GMT</pubDate>"
+        f"<description>{'Lorem ipsum dolor sit amet. ' * 20}</description></item>"
+        for i in range(n)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Synthetic</title>{items}</channel></rss>'.encode()
+
+
+def load_bodies(dirs: list[Path]) -> dict[str, bytes]:
+    bodies = {}
+    for d in dirs:
+        for p in sorted(d.glob("*")) if d.is_dir() else []:
+            if p.suffix in (".body", ".xml", ".rss"):
+                head = p.read_bytes()[:512].lstrip()
+                if head.startswith(b"<"):  # skip JSON bodies cached for HN / Wikipedia
+                    bodies[p.name] = p.read_bytes()
+    return bodies or {"synthetic-500.xml": _synthetic_feed()}
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak(fn) -> int:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("dirs", nargs="*", type=Path, default=[HTTP_CACHE_DIR])
+    ap.add_argument("--limit", type=int, default=15)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    feeds, totals = [], {b: 0.0 for b in BACKENDS}
+    for name, body in load_bodies(args.dirs).items():
+        row = {"feed": name, "bytes": len(body)}
+        outputs = {}
+        for backend in BACKENDS:
+            run = lambda: _parse_rss(body, {}, "bench", args.limit, backend)
+            outputs[backend] = run()
+            secs = _time(run, args.repeat)
+            totals[backend] += secs
+            row[backend] = {"best_ms": round(secs * 1000, 3), "peak_kib": round(_peak(run) / 1024, 1)}
+        try:
+            rss_stream.parse_items(body, args.limit)
+            row["stream_fallback"] = False
+        except rss_stream.UnsupportedFeed:
+            row["stream_fallback"] = True
+        row["identical"] = outputs["feedparser"] == outputs["stream"]
+        feeds.append(row)
+
+    speedup = totals["feedparser"] / totals["stream"] if totals["stream"] else None
+    print(json.dumps({
+        "limit": args.limit,
+        "repeat": args.repeat,
+        "feeds": feeds,
+        "total_ms": {b: round(t * 1000, 3) for b, t in totals.items()},
+        "speedup": round(speedup, 2) if speedup else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Startup cost of the entry points: per-module import time and early-exit wall time.
+
+    python -m benchmarks.bench_startup [--repeat 5] [--top 15] [--check]
+
+Each entry module is imported in a fresh interpreter under `python -X importtime`; the
+result lists its total import time and the most expensive modules (self and cumulative).
+The early-exit commands (wrap-up hour gate, --help, a backfill with nothing to do) are timed
+end to end, next to a bare `python -c pass` for reference. Prints one JSON document.
+
+With --check the run fails (exit 1) when an entry module pulls in a heavy dependency at
+import time, or an early exit takes longer than --max-exit-ms above the bare interpreter.
+"""
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_MODULES = ["main", "wrapup", "site_build", "send_email"]
+# Must not be loaded just by importing these entry modules (only by the stages that use them)
+HEAVY = ["numpy", "pandas", "matplotlib", "requests", "feedparser", "markdown"]
+LAZY_ENTRIES = ["main", "wrapup"]
+
+
+def import_profile(module: str | None) -> dict:
+    """
+    Parse `-X importtime` for one module (None: a bare interpreter): {name: (self_us, cumulative_us)}
+    plus the module's total.
+    """
+    code = f"import {module}" if module else "pass"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    mods = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        mods[name.strip()] = (int(self_us), int(cum_us))
+    return {"total_us": mods.get(module, (0, 0))[1], "modules": mods}
+
+
+def wall(cmd: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, capture_output=True, check=False)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5, help="early-exit timings: best of N")
+    ap.add_argument("--top", type=int, default=15, help="modules listed per entry point")
+    ap.add_argument("--check", action="store_true", help="exit 1 on a startup regression")
+    ap.add_argument("--max-exit-ms", type=float, default=50.0,
+                    help="--check: allowed early-exit time above a bare interpreter")
+    args = ap.parse_args(argv)
+
+    # Modules the interpreter loads before any of ours (site, .pth hooks) are not listed
+    startup = set(import_profile(None)["modules"])
+    entries, problems = {}, []
+    for module in ENTRY_MODULES:
+        prof = import_profile(module)
+        mods = {m: v for m, v in prof["modules"].items() if m not in startup}
+        heavy = [m for m in HEAVY if m in mods]
+        entries[module] = {
+            "import_ms": round(prof["total_us"] / 1000, 1),
+            "heavy_loaded": heavy,
+            "top_self_ms": {m: round(s / 1000, 1) for m, (s, _) in
+                            sorted(mods.items(), key=lambda kv: -kv[1][0])[:args.top]},
+            "top_cumulative_ms": {m: round(c / 1000, 1) for m, (_, c) in
+                                  sorted(((m, v) for m, v in mods.items() if "." not in m and m != module),
+                                         key=lambda kv: -kv[1][1])[:args.top]},
+        }
+        if module in LAZY_ENTRIES and heavy:
+            problems.append(f"import {module} loads {', '.join(heavy)}")
+
+    with tempfile.TemporaryDirectory() as empty:
+        exits = {
+            "python -c pass": [sys.executable, "-c", "pass"],
+            "wrapup.py --gate": [sys.executable, "wrapup.py", "--gate"],
+            "main.py --help": [sys.executable, "main.py", "--help"],
+            "main.py backfill (nothing to do)": [sys.executable, "main.py", "backfill", "--data", empty],
+        }
+        times = {name: wall(cmd, args.repeat) for name, cmd in exits.items()}
+    base = times["python -c pass"]
+    early = {name: {"wall_ms": round(t * 1000, 1), "over_bare_ms": round((t - base) * 1000, 1)}
+             for name, t in times.items()}
+    for name, t in times.items():
+        if (t - base) * 1000 > args.max_exit_ms:
+            problems.append(f"{name}: {(t - base) * 1000:.0f} ms over a bare interpreter")
+
+    print(json.dumps({"python": sys.version.split()[0], "entries": entries, "early_exit": early,
+                      "problems": problems}, indent=2))
+    if args.check and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,93 @@
+"""
+Housekeeping with a retention policy.
+
+    python clean.py                       # generated files only: out/, __pycache__/
+    python clean.py --caches              # also data/.cache/ (HTTP cache, feed health, IDF, search index, trends, history)
+    python clean.py --runs-keep-days 90   # also drop run snapshots (loose or packed) older than 90 days
+    python clean.py --keep-days 365       # also delete whole days (data/ and docs/) older than a year
+    python clean.py --all                 # everything: data/, docs/, out/ (fresh start)
+
+Day logs and reports are never touched by --runs-keep-days: run snapshots are the raw inputs
+already folded into each day's log. Add --dry-run to only print what would go.
+"""
 from pathlib import Path
+import argparse
+import datetime as dt
 import shutil
 
+from config import CACHE_DIR
+from utils import history, packs, search, trends
+
 # Root of your project
 ROOT = Path(__file__).parent.resolve()
+DATA = ROOT / "data"
+DOCS = ROOT / "docs"
 DIRS_TO_DELETE = ["data", "docs", "out", "__pycache__"]
+GENERATED = [ROOT / "out", ROOT / "__pycache__"]
 
-def remove_dir(p: Path):
+def remove_dir(p: Path, dry_run: bool = False):
     if p.exists() and p.is_dir():
         print(f"🧹 Removing: {p}")
-        shutil.rmtree(p, ignore_errors=True)
+        if not dry_run:
+            shutil.rmtree(p, ignore_errors=True)
+
+def _days_before(cutoff: str) -> list[Path]:
+    if not DATA.exists():
+        return []
+    return sorted(p for p in DATA.iterdir() if p.is_dir() and packs.DATE_RE.match(p.name) and p.name < cutoff)
+
+def drop_runs(cutoff: str, dry_run: bool = False):
+    """Run snapshots of days before `cutoff`: loose runs/ dirs removed, packs compacted without them."""
+    by_month: dict[str, list[str]] = {}
+    for d in _days_before(cutoff):
+        remove_dir(d / "runs", dry_run)
+    for idx in sorted(packs.pack_dir(DATA).glob("*.idx.json")):
+        month = idx.name.split(".")[0]
+        by_month[month] = [day for day in packs.list_packed_days(DATA, month) if day < cutoff]
+    for month, days in by_month.items():
+        if days:
+            print(f"🧹 Dropping {len(days)} packed days from {month}")
+            if not dry_run:
+                packs.compact(DATA, month, drop_days=days)
+
+def drop_days(cutoff: str, dry_run: bool = False):
+    """
+    Whole days before `cutoff` (data and published pages); the search index, term counts and
+    item history are rebuilt without them.
+    """
+    gone = _days_before(cutoff)
+    for d in gone:
+        remove_dir(d, dry_run)
+        remove_dir(DOCS / d.name, dry_run)
+    drop_runs(cutoff, dry_run)
+    if gone:
+        remove_dir(search.index_dir(DATA), dry_run)
+        remove_dir(trends.trends_dir(DATA), dry_run)
+        remove_dir(history.history_dir(DATA), dry_run)  # only ever appends days it has not seen
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Remove derived files and apply a retention policy.")
+    ap.add_argument("--runs-keep-days", type=int, default=None, help="drop run snapshots older than N days")
+    ap.add_argument("--keep-days", type=int, default=None, help="delete whole days older than N days")
+    ap.add_argument("--caches", action="store_true", help="also remove data/.cache/ (rebuilt or refetched)")
+    ap.add_argument("--all", action="store_true", help="delete data/, docs/ and out/ entirely")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
 
-def main():
-    for d in DIRS_TO_DELETE:
-        remove_dir(ROOT / d)
+    if args.all:
+        for d in DIRS_TO_DELETE:
+            remove_dir(ROOT / d, args.dry_run)
+        print("✅ Cleanup complete — ready for a fresh run!")
+        return
 
-    print("✅ Cleanup complete — ready for a fresh run!")
+    for p in GENERATED + ([DATA / CACHE_DIR.name] if args.caches else []):
+        remove_dir(p, args.dry_run)
+    today = dt.datetime.utcnow().date()
+    if args.keep_days is not None:
+        drop_days(str(today - dt.timedelta(days=args.keep_days)), args.dry_run)
+    if args.runs_keep_days is not None:
+        drop_runs(str(today - dt.timedelta(days=args.runs_keep_days)), args.dry_run)
+    print("✅ Cleanup complete")
 
 if __name__ == "__main__":
     main()
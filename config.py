@@ -1,5 +1,6 @@
 from pathlib import Path
 import datetime as dt
+import os
 
 ROOT = Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "data"
@@ -7,3 +8,72 @@ IMG_DIRNAME = "images"
 PLOTS_DIRNAME = "plots"
 
 RUN_DATE = dt.datetime.utcnow().date()  # daily anchor (UTC)
+
+# Fetch engine: bounded worker pools, per-fetch timeout and an overall run deadline (seconds)
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+FEED_WORKERS = int(os.getenv("FEED_WORKERS", "12"))
+SOURCE_TIMEOUT = float(os.getenv("SOURCE_TIMEOUT", "30"))
+RUN_DEADLINE = float(os.getenv("RUN_DEADLINE", "120"))
+
+# On-disk conditional-GET cache (ETag/Last-Modified + bodies); not committed, restored by actions/cache
+CACHE_DIR = DATA_DIR / ".cache"
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+HTTP_CACHE_MAX_AGE_DAYS = float(os.getenv("HTTP_CACHE_MAX_AGE_DAYS", "14"))
+
+# Shared HTTP transport: connect/read timeouts, total budget per request, retries and per-host limit
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "25"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "4"))
+
+# Feed circuit breaker: open after N consecutive failures, cooldown doubles per further failure
+FEED_FAIL_THRESHOLD = int(os.getenv("FEED_FAIL_THRESHOLD", "3"))
+FEED_COOLDOWN_HOURS = float(os.getenv("FEED_COOLDOWN_HOURS", "6"))
+FEED_COOLDOWN_MAX_HOURS = float(os.getenv("FEED_COOLDOWN_MAX_HOURS", "168"))
+FEED_HEALTH_PATH = CACHE_DIR / "feed_health.json"
+
+# RSS parser backend: "feedparser" (default) or "stream" (incremental, stops after `limit` items,
+# falls back to feedparser for anything unusual)
+RSS_PARSER = os.getenv("RSS_PARSER", "feedparser")
+
+# Summarizer state: archive-wide IDF table and a content-hash summary cache
+IDF_PATH = CACHE_DIR / "idf.json"
+SUMMARY_CACHE_PATH = CACHE_DIR / "summaries.json"
+SUMMARY_CACHE_MAX = int(os.getenv("SUMMARY_CACHE_MAX", "2000"))
+
+# Full-text search index (data/.cache/search, published to docs/search): term shards picked by
+# FNV-1a hash, docs stored in fixed-size chunks so a lookup reads a few small files
+SEARCH_SHARDS = int(os.getenv("SEARCH_SHARDS", "256"))
+SEARCH_CHUNK = int(os.getenv("SEARCH_CHUNK", "1000"))
+
+# Finished days' runs/<HHMMSS>/raw.json snapshots are rolled into data/packs/<YYYY-MM>.pack
+PACKS_DIRNAME = "packs"
+
+# Trending terms: last TREND_WINDOW_DAYS vs the TREND_BASELINE_DAYS before them
+TREND_WINDOW_DAYS = int(os.getenv("TREND_WINDOW_DAYS", "7"))
+TREND_BASELINE_DAYS = int(os.getenv("TREND_BASELINE_DAYS", "28"))
+TREND_MIN_COUNT = int(os.getenv("TREND_MIN_COUNT", "3"))
+
+# Concurrent writers (overlapping cron/manual runs) serialize on per-day and per-index lock files;
+# a writer gives up after LOCK_TIMEOUT seconds
+DAY_LOCK_NAME = ".lock"
+LOCK_TIMEOUT = float(os.getenv("LOCK_TIMEOUT", "300"))
+
+# Charts: "svg" (built in, small files inlined by the site) or "matplotlib" (PNG; optional dependency)
+CHART_BACKEND = os.getenv("CHART_BACKEND", "svg").lower()
+
+# --profile: per-stage cProfile/tracemalloc artifacts under out/profile/<timestamp>/
+PROFILE_DIR = ROOT / "out" / "profile"
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))  # functions / allocation sites listed per table
+
+# Daemon (main.py daemon): each URL is polled again when its Cache-Control/Expires or RSS <ttl>
+# says so, clamped to [POLL_MIN_SECONDS, POLL_MAX_SECONDS]; the loop wakes at least every DAEMON_TICK
+# and waits at least DAEMON_MIN_GAP between cycles (failed polls and cycles back off from POLL_MIN_SECONDS)
+DAEMON_TICK = float(os.getenv("DAEMON_TICK", "60"))
+DAEMON_MIN_GAP = float(os.getenv("DAEMON_MIN_GAP", "30"))
+POLL_MIN_SECONDS = float(os.getenv("POLL_MIN_SECONDS", "300"))
+POLL_DEFAULT_SECONDS = float(os.getenv("POLL_DEFAULT_SECONDS", "900"))
+POLL_MAX_SECONDS = float(os.getenv("POLL_MAX_SECONDS", str(6 * 3600)))
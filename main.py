@@ -1,24 +1,21 @@
+import argparse
 import datetime as dt
+import hashlib
+import json
+import os
+import shutil
+import time
 from pathlib import Path
 from typing import List, Dict, Any
 
-from config import DATA_DIR, IMG_DIRNAME, PLOTS_DIRNAME, RUN_DATE
-from utils.files import write_json, write_text, replace_between_markers
-from utils.summarize import summarize
-from utils.plots import bar_plot
+from config import CACHE_DIR, CHART_BACKEND, DAEMON_MIN_GAP, DAEMON_TICK, DATA_DIR, POLL_MAX_SECONDS, POLL_MIN_SECONDS, DAY_LOCK_NAME, IMG_DIRNAME, PLOTS_DIRNAME, RUN_DATE, FETCH_WORKERS, SOURCE_TIMEOUT, RUN_DEADLINE
+from utils.files import locked, write_text, write_stats, replace_between_markers
+from utils import clock, daystore, packs, perf
+from utils.plots import bar_plot, line_plot  # Matplotlib loads only with CHART_BACKEND=matplotlib
 
-# Existing sources
-from sources.hn import fetch_top
-from sources.wiki import fetch_today_and_random
-from sources.apod import fetch_apod
-
-# Cross-source news
-from sources import reuters as src_reuters
-from sources import bbc as src_bbc
-from sources import ap as src_ap
-from sources import npr as src_npr
-from sources import science as src_science
-from sources import google_local as src_local
+# Heavier modules (numpy through the summarizer, HN series and trends; requests and feedparser
+# through the sources) are imported inside the stages that use them, so early exits such as
+# --help or a backfill with nothing to do start in a few tens of milliseconds.
 
 ROOT = Path(__file__).parent.resolve()
 
@@ -39,20 +36,27 @@ def _uniq(items: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
     return out
 
 
-def _load_json(p: Path) -> Dict[str, Any]:
-    if p.exists():
-        try:
-            return __import__("json").loads(p.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+# Snapshot fields (at any depth) that differ between runs even when every source returned the same content
+SNAPSHOT_VOLATILE = {"collected_at_utc", "fetched_at", "http_cache", "feed_health"}
+# The report footer's run count alone is not worth rewriting (and committing) the report for
+REPORT_VOLATILE = (rb"<sub>Runs so far today: \d+</sub>",)
+
+
+def _content_digest(snapshot: Dict[str, Any]) -> str:
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k not in SNAPSHOT_VOLATILE}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    return hashlib.sha1(json.dumps(strip(snapshot), ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
 
 
 # -----------------------------------------------------------
 # Directory setup
 # -----------------------------------------------------------
-def today_dir() -> Path:
-    d = DATA_DIR / str(RUN_DATE)
+def today_dir(run_date: dt.date = RUN_DATE, data_dir: Path = DATA_DIR) -> Path:
+    d = data_dir / str(run_date)
     d.mkdir(parents=True, exist_ok=True)
     (d / IMG_DIRNAME).mkdir(exist_ok=True)
     (d / PLOTS_DIRNAME).mkdir(exist_ok=True)
@@ -63,42 +67,87 @@ def today_dir() -> Path:
 # -----------------------------------------------------------
 # Fetchers
 # -----------------------------------------------------------
-def fetch_all_sources() -> Dict[str, Any]:
-    """Fetch a single-run snapshot from all sources."""
-    hn = fetch_top()
-    wiki = fetch_today_and_random(RUN_DATE.month, RUN_DATE.day)
-    apod = fetch_apod()
+def fetch_all_sources(run_date: dt.date = RUN_DATE) -> Dict[str, Any]:
+    """Fetch a single-run snapshot from all sources concurrently, bounded by RUN_DEADLINE."""
+    from utils import cassette
+    from utils.http_cache import get_cache
+    from utils.parallel import run_all, set_run_deadline
+    from sources.hn import fetch_top
+    from sources.wiki import fetch_today_and_random
+    from sources.apod import fetch_apod
+    from sources.feed_health import get_health
+    from sources import reuters as src_reuters, bbc as src_bbc, ap as src_ap, npr as src_npr
+    from sources import science as src_science, google_local as src_local
+
+    deadline = set_run_deadline(RUN_DEADLINE)
+    world_sources = [src_reuters, src_bbc, src_ap, src_npr, src_science]
+
+    tasks = {
+        "hn": fetch_top,
+        "wiki": lambda: fetch_today_and_random(run_date.month, run_date.day),
+        "apod": fetch_apod,
+    }
+    for src in world_sources + [src_local]:
+        tasks[src.__name__] = src.fetch
+    tasks = {name: perf.wrap(f"fetch.{name.rsplit('.', 1)[-1]}", fn) for name, fn in tasks.items()}
+    # Feed groups enforce SOURCE_TIMEOUT per URL inside fetch_many; the extra second lets
+    # them hand back their own placeholders before the outer deadline abandons the group.
+    timeouts = {"hn": SOURCE_TIMEOUT, "wiki": SOURCE_TIMEOUT, "apod": SOURCE_TIMEOUT}
+    results = run_all(tasks, FETCH_WORKERS, timeout=timeouts, deadline=deadline and deadline + 1.0)
+
+    errors: Dict[str, str] = {}
+
+    def _value(name: str, empty: Dict[str, Any]) -> Dict[str, Any]:
+        res = results[name]
+        if isinstance(res, Exception):
+            errors[name] = str(res)
+            return empty
+        return res
+
+    hn = _value("hn", {"items": []})
+    wiki = _value("wiki", {})
+    apod = _value("apod", {})
 
     # World news (multiple feeds)
     world = []
-    for src in [src_reuters, src_bbc, src_ap, src_npr, src_science]:
-        try:
-            world += src.fetch()
-        except Exception as e:
-            world.append({"title": f"(Error fetching {src.__name__})", "error": str(e)})
+    for src in world_sources:
+        res = results[src.__name__]
+        if isinstance(res, Exception):
+            world.append({"title": f"(Error fetching {src.__name__})", "error": str(res)})
+        else:
+            world += res
 
     # Local news
-    local = []
-    try:
-        local = src_local.fetch()
-    except Exception as e:
-        local.append({"title": "(Error fetching local news)", "error": str(e)})
+    local = results[src_local.__name__]
+    if isinstance(local, Exception):
+        local = [{"title": "(Error fetching local news)", "error": str(local)}]
 
     news = {"world": world, "local": local}
 
     snapshot = {
-        "date": str(RUN_DATE),
-        "collected_at_utc": dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "date": str(run_date),
+        "collected_at_utc": clock.now_utc().strftime("%Y-%m-%dT%H:%M:%SZ"),
         "hn": hn,
         "wiki": wiki,
         "apod": apod,
         "news": news,
     }
+    if errors:
+        snapshot["errors"] = errors
+    if cassette.active() and cassette.active().mode == "replay":
+        return snapshot  # live-network diagnostics would only add noise to a replayed run
+    # Conditional-GET hit/miss counters for this run (also evicts + persists the cache)
+    snapshot["http_cache"] = get_cache().save()
+    # Per-feed latency/failures for this run; dead feeds are skipped by the circuit breaker
+    snapshot["feed_health"] = get_health().save()
     return snapshot
 
 
 def merge_day_payload(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
-    """Merge a new snapshot into the day's combined payload."""
+    """
+    Merge a new snapshot into the day's combined payload.
+    Reference semantics for utils.daystore, which stores the same result as an append-only log.
+    """
     out = {
         "date": new.get("date"),
         "last_updated_utc": new.get("collected_at_utc"),
@@ -114,7 +163,7 @@ def merge_day_payload(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str
     old_hn = (existing.get("hn") or {}).get("items") or []
     new_hn = (new.get("hn") or {}).get("items") or []
     merged_hn = _uniq(old_hn + new_hn, keys=["objectID"])
-    out["hn"]["items"] = merged_hn[:200]  # cap for sanity
+    out["hn"]["items"] = merged_hn[:daystore.CAPS["hn"]]  # cap for sanity
 
     # Merge news lists (dedupe by title+link)
     old_world = ((existing.get("news") or {}).get("world") or [])
@@ -122,8 +171,8 @@ def merge_day_payload(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str
     new_world = ((new.get("news") or {}).get("world") or [])
     new_local = ((new.get("news") or {}).get("local") or [])
 
-    out["news"]["world"] = _uniq(old_world + new_world, keys=["title", "link"])[:300]
-    out["news"]["local"] = _uniq(old_local + new_local, keys=["title", "link"])[:200]
+    out["news"]["world"] = _uniq(old_world + new_world, keys=["title", "link"])[:daystore.CAPS["world"]]
+    out["news"]["local"] = _uniq(old_local + new_local, keys=["title", "link"])[:daystore.CAPS["local"]]
 
     # Prefer the newest wiki/APOD if present; otherwise keep existing
     if not out["wiki"]:
@@ -137,32 +186,59 @@ def merge_day_payload(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str
 # -----------------------------------------------------------
 # Charts
 # -----------------------------------------------------------
-def generate_charts(latest_snapshot: Dict[str, Any], out_dir: Path) -> Dict[str, str | None]:
+def _short(t: str) -> str:
+    return t[:18] + ("…" if len(t) > 18 else "")
+
+
+def generate_charts(latest_snapshot: Dict[str, Any], out_dir: Path,
+                    combined: Dict[str, Any] | None = None) -> Dict[str, str | None]:
+    from utils import hn_series
+    # Paths in the report are relative to the repo (or replay output) root, e.g. data/<day>/plots/...
+    base = out_dir.parent.parent
+    charts: Dict[str, str | None] = {"hn_top10_points": None, "hn_rising": None}
     titles = [x.get("title") or "" for x in (latest_snapshot.get("hn") or {}).get("items", [])][:10]
     points = [int(x.get("points", 0)) for x in (latest_snapshot.get("hn") or {}).get("items", [])][:10]
-    labels = [t[:18] + ("…" if len(t) > 18 else "") for t in titles]
-    plot_path = out_dir / PLOTS_DIRNAME / "hn_top10_points.png"
 
     if titles:
-        bar_plot("Hacker News: Top 10 stories (points)", labels, points, plot_path)
-        return {"hn_top10_points": str(plot_path.relative_to(ROOT))}
-    return {"hn_top10_points": None}
+        path = bar_plot("Hacker News: Top 10 stories (points)", [_short(t) for t in titles], points,
+                        out_dir / PLOTS_DIRNAME / "hn_top10_points")
+        charts["hn_top10_points"] = path.relative_to(base).as_posix() if path else None
+
+    # Rising: the fastest-gaining stories' points across today's runs (velocity bars after one run)
+    rising = hn_series.rising((combined or {}).get("hn", {}).get("items", []), 5)
+    series = hn_series.load(out_dir) if rising else None
+    if rising and series is not None and len(series["times"]) > 1:
+        lines = hn_series.trajectories(series, [int(it["objectID"]) for it in rising])
+        labels = [dt.datetime.fromtimestamp(int(t), dt.timezone.utc).strftime("%H:%M") for t in series["times"]]
+        names = {int(it["objectID"]): _short(it.get("title") or "") for it in rising}
+        path = line_plot("Hacker News: rising stories (points, UTC)", labels,
+                         {names[i]: values for i, values in lines.items()}, out_dir / PLOTS_DIRNAME / "hn_rising")
+        charts["hn_rising"] = path.relative_to(base).as_posix() if path else None
+    elif rising:
+        path = bar_plot("Hacker News: rising (points per hour)", [_short(it.get("title") or "") for it in rising],
+                        [it["velocity"] for it in rising], out_dir / PLOTS_DIRNAME / "hn_rising")
+        charts["hn_rising"] = path.relative_to(base).as_posix() if path else None
+    return charts
 
 
 # -----------------------------------------------------------
 # Markdown builder (combined payload)
 # -----------------------------------------------------------
-def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path) -> Path:
-    def _uniq_titles(items: List[Dict[str, Any]], n: int) -> List[Dict[str, Any]]:
-        return _uniq(items, keys=["title"])[:n]
-
-    # Global & Local (from combined payload)
-    world_items = _uniq_titles((payload.get("news", {}) or {}).get("world", []), 5)
-    local_items = _uniq_titles((payload.get("news", {}) or {}).get("local", []), 5)
+def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path,
+                  run_date: dt.date | str | None = None) -> Path:
+    from utils import hn_series, trends
+    from utils.cluster import cluster_stories, also_covered
+    from utils.summarize import summarize
+
+    date = str(run_date or payload.get("date"))
+    # Global & Local (from combined payload): near-duplicate headlines clustered,
+    # stories covered by the most outlets first
+    world_items = cluster_stories((payload.get("news", {}) or {}).get("world", []))[:5]
+    local_items = cluster_stories((payload.get("news", {}) or {}).get("local", []))[:5]
 
     def _lines(items):
         return (
-            "\n".join([f"- [{it.get('title')}]({it.get('link')}) — {it.get('source')}" for it in items])
+            "\n".join([f"- [{it.get('title')}]({it.get('link')}) — {it.get('source')}{also_covered(it)}" for it in items])
             if items
             else "_No data_"
         )
@@ -170,12 +246,13 @@ def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path
     world_block = _lines(world_items)
     local_block = _lines(local_items)
 
-    # Synthesized daily summary from all titles (combined)
+    # Synthesized daily summary from all titles (combined; "(feed error …)" placeholders left out)
     try:
-        all_titles = [w.get("title", "") for w in (payload.get("news") or {}).get("world", [])[:30]] + \
-                     [l.get("title", "") for l in (payload.get("news") or {}).get("local", [])[:15]]
+        news = payload.get("news") or {}
+        all_titles = [w.get("title", "") for w in news.get("world", []) if not w.get("error")][:30] + \
+                     [l.get("title", "") for l in news.get("local", []) if not l.get("error")][:15]
         blob = ". ".join([t for t in all_titles if t])
-        summary_text = summarize(blob, max_sentences=3)
+        summary_text = summarize(blob, max_sentences=3) or "Summary unavailable."
     except Exception:
         summary_text = "Summary unavailable."
 
@@ -193,6 +270,27 @@ def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path
 
     chart_md = f"![HN Points Chart]({charts['hn_top10_points']})" if charts.get("hn_top10_points") else ""
 
+    # Hacker News rising: fastest-gaining stories between today's runs
+    rising_lines = []
+    for it in hn_series.rising((payload.get("hn") or {}).get("items", []), 5):
+        url = it.get("url") or f"https://news.ycombinator.com/item?id={it.get('objectID')}"
+        rising_lines.append(
+            f"- [{it.get('title') or '(no title)'}]({url}) — {it['velocity']:+g} pts/h "
+            f"({it.get('points', 0)} points, {it.get('num_comments', 0)} comments)"
+        )
+    rising_block = "\n".join(rising_lines) if rising_lines else "_No data_"
+    rising_chart_md = f"![HN Rising Chart]({charts['hn_rising']})" if charts.get("hn_rising") else ""
+
+    # Trending terms: this week vs. the trailing baseline (precomputed per-day counts)
+    trending = trends.trending(out_dir.parent, date, n=8)
+    trending_block = (
+        # Empty until the archive covers the whole baseline; terms absent from it have no usual count
+        "\n".join(f"- **{t['term']}** — {t['count']} headlines "
+                  + (f"(usually ~{t['expected']:g})" if t["expected"] else "(new)") for t in trending)
+        if trending
+        else "_No data_"
+    )
+
     # Wikipedia — On This Day
     today_events = (payload.get("wiki", {}) or {}).get("today", [])[:5]
     today_block = (
@@ -212,12 +310,15 @@ def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path
     apod_line = f"[{apod_entry['title']}]({apod_entry['link']})" if apod_entry else "Unavailable"
 
     md = (
-        f"# Daily Knowledge Garden — {payload['date']}\n\n"
+        f"# Daily Knowledge Garden — {date}\n\n"
         f"## 🧭 Daily Summary\n{summary_text}\n\n"
         f"## 🌍 Global News (cross-source)\n{world_block}\n\n"
         f"## 🏙️ Local News\n{local_block}\n\n"
+        f"## 🔥 Trending This Week\n{trending_block}\n\n"
         f"## 🚀 Hacker News (Top 5)\n{hn_block}\n\n"
         f"{chart_md}\n\n"
+        f"## 📈 Hacker News — Rising\n{rising_block}\n\n"
+        f"{rising_chart_md}\n\n"
         f"## 🌍 Wikipedia — On This Day (selected)\n{today_block}\n\n"
         f"## 🎲 Wikipedia — Random Article\n"
         f"**{random_title}**  \n{random_blurb}\n{random_url}\n\n"
@@ -226,7 +327,7 @@ def make_markdown(payload: Dict[str, Any], charts: Dict[str, Any], out_dir: Path
     )
 
     out_md = out_dir / "report.md"
-    write_text(out_md, md)
+    write_text(out_md, md, volatile=REPORT_VOLATILE)
     return out_md
 
 
@@ -254,40 +355,383 @@ def update_readme(payload: Dict[str, Any], charts: Dict[str, Any], report_md_pat
         f"- **APOD:** [{apod_title}]({apod_link})\n"
         f"- **Daily Report:** [{payload['date']}/report.md](/data/{payload['date']}/report.md)\n"
     )
+    if charts.get("hn_top10_points"):
+        highlights_md += f"\n![HN top 10]({charts['hn_top10_points']})\n"
 
     readme = replace_between_markers(readme, "<!--HIGHLIGHTS-->", "<!--/HIGHLIGHTS-->", highlights_md.strip())
-    readme_path.write_text(readme, encoding="utf-8")
+    write_text(readme_path, readme)
 
 
 # -----------------------------------------------------------
-# Main (Growth Mode)
+# Backfill (offline re-render from stored runs)
 # -----------------------------------------------------------
-def main():
-    out_dir = today_dir()
-
-    # 1) Fetch a fresh snapshot
-    snapshot = fetch_all_sources()
-
-    # 2) Save this run under runs/<HHMMSS>/raw.json
-    run_id = dt.datetime.utcnow().strftime("%H%M%S")
-    run_dir = out_dir / "runs" / run_id
-    run_dir.mkdir(parents=True, exist_ok=True)
-    write_json(run_dir / "raw.json", snapshot)
-
-    # 3) Load the day's combined payload (if any) and merge
-    combined_path = out_dir / "raw.json"
-    existing = _load_json(combined_path)
-    combined = merge_day_payload(existing, snapshot)
-    write_json(combined_path, combined)
+# Everything a report depends on besides the day's data; editing any of these re-renders every day
+RENDER_SOURCES = ["main.py", "utils/plots.py", "utils/summarize.py", "utils/cluster.py",
+                  "utils/hn_series.py", "utils/daystore.py", "utils/trends.py"]
+
+
+def render_fingerprint() -> str:
+    h = hashlib.sha1(CHART_BACKEND.encode("ascii"))
+    for name in RENDER_SOURCES:
+        h.update(name.encode("utf-8") + b"\0" + (ROOT / name).read_bytes())
+    return h.hexdigest()
+
+
+def backfill_inputs_hash(day_dir: Path) -> str:
+    """Stored inputs of a day: run ids (runs are immutable once written), log and legacy payload sizes."""
+    h = hashlib.sha1(" ".join(packs.list_runs(day_dir)).encode("utf-8"))
+    for name in (daystore.LOG_NAME, daystore.LEGACY_NAME):
+        p = day_dir / name
+        h.update(f"\0{name}:{p.stat().st_size if p.exists() else -1}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _backfill_manifest(data_dir: Path) -> Path:
+    return Path(data_dir) / CACHE_DIR.name / "backfill.json"
+
+
+def _rebuild_log_job(day_dir: str) -> bool:
+    """Process-pool entry point: rewrite a day's log and HN series from its stored runs."""
+    from utils import hn_series
+    day_dir = Path(day_dir)
+    with locked(day_dir / DAY_LOCK_NAME):
+        snapshots = list(packs.load_runs(day_dir).values())
+        if not snapshots:
+            return False
+        changed = daystore.rebuild(day_dir, snapshots)
+        if changed is not None:
+            hn_series.rebuild(day_dir, snapshots)
+    return bool(changed)
+
+
+def _render_day_job(day_dir: str) -> str:
+    """Process-pool entry point: charts and report.md for one day, from what is on disk."""
+    day_dir = Path(day_dir)
+    combined = daystore.load_day(day_dir)
+    if not combined:
+        return ""
+    runs = packs.list_runs(day_dir)
+    latest = (packs.load_run(day_dir, runs[-1]) if runs else None) or combined
+    render_day(day_dir, dt.date.fromisoformat(day_dir.name), latest, combined)
+    return day_dir.name
+
+
+def _pool_map(fn, days: List[Path], workers: int) -> list:
+    args = [str(d) for d in days]
+    if workers > 1 and len(args) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            return list(pool.map(fn, args))
+    return [fn(a) for a in args]
+
+
+def backfill(data_dir: Path = DATA_DIR, start: dt.date | None = None, end: dt.date | None = None,
+             workers: int = 1, force: bool = False) -> Dict[str, Any]:
+    """
+    Regenerate day logs, charts and report.md for [start, end] from stored run snapshots only
+    (no network). Days whose stored inputs and renderer sources are unchanged since the last
+    backfill are skipped unless force=True. Logs are rebuilt first, then the search and trend
+    indexes are brought up to date, then every day is rendered.
+    """
+    data_dir = Path(data_dir)
+    lo, hi = str(start or ""), str(end or "9999")
+    days = [d for d in sorted(data_dir.iterdir()) if d.is_dir() and packs.DATE_RE.match(d.name)
+            and lo <= d.name <= hi] if data_dir.exists() else []
+
+    manifest_path = _backfill_manifest(data_dir)
+    fingerprint = render_fingerprint()
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except Exception:
+        manifest = {}
+    previous = manifest.get("days", {}) if manifest.get("renderer") == fingerprint else {}
+    todo = [d for d in days if force or previous.get(d.name) != backfill_inputs_hash(d)
+            or not (d / "report.md").exists()]
+    if not todo:
+        return {"days": len(days), "rendered": 0, "skipped": len(days), "logs_rebuilt": 0}
+
+    from utils import history, search, trends
+
+    rebuilt = _pool_map(_rebuild_log_job, todo, workers)
+    if any(rebuilt):
+        # Rewritten logs invalidate the byte cursors of every log-derived index
+        for root in (search.index_dir(data_dir), trends.trends_dir(data_dir), history.history_dir(data_dir)):
+            shutil.rmtree(root, ignore_errors=True)
+    search.sync(data_dir)
+    trends.sync(data_dir)
+    rendered = [name for name in _pool_map(_render_day_job, todo, workers) if name]
+
+    done = {**previous, **{d.name: backfill_inputs_hash(d) for d in todo if d.name in rendered}}
+    write_text(manifest_path, json.dumps({"renderer": fingerprint, "days": dict(sorted(done.items()))}, indent=1) + "\n")
+    return {"days": len(days), "rendered": len(rendered), "skipped": len(days) - len(todo),
+            "logs_rebuilt": sum(map(bool, rebuilt))}
 
-    # 4) Charts from the latest snapshot (so the chart reflects the newest HN)
-    charts = generate_charts(snapshot, out_dir)
 
-    # 5) Build markdown (from combined payload so the page grows)
-    report_md = make_markdown(combined, charts, out_dir)
+# -----------------------------------------------------------
+# Main (Growth Mode)
+# -----------------------------------------------------------
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Daily Knowledge Garden — fetch, merge and render today's report.")
+    ap.add_argument("command", nargs="?", choices=["run", "backfill", "daemon"], default="run",
+                    help="run: fetch and render today (default); backfill: re-render stored days offline; "
+                         "daemon: keep running, polling each feed when it is due")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", type=Path, help="record every HTTP response into a cassette at DIR")
+    mode.add_argument("--replay", metavar="DIR", type=Path, help="run offline from the cassette at DIR")
+    ap.add_argument("--latency", type=float, default=0.0,
+                    help="replay: sleep recorded latency × this factor per request (default 0)")
+    ap.add_argument("--out", type=Path, default=None,
+                    help="replay: output root for data/ and docs/ (default out/replay)")
+    ap.add_argument("--profile", action="store_true",
+                    help="write per-stage cProfile/tracemalloc artifacts to out/profile/<timestamp>/ "
+                         "(pair with --replay for comparable runs)")
+    bf = ap.add_argument_group("backfill")
+    bf.add_argument("--from", dest="date_from", type=dt.date.fromisoformat, default=None,
+                    help="first day to re-render (default: earliest stored day)")
+    bf.add_argument("--to", dest="date_to", type=dt.date.fromisoformat, default=None,
+                    help="last day to re-render (default: latest stored day)")
+    bf.add_argument("--data", type=Path, default=DATA_DIR, help="archive root (default data/; also used by daemon)")
+    bf.add_argument("--workers", type=int, default=0, help="process pool size (default: one per CPU)")
+    bf.add_argument("--force", action="store_true", help="re-render days that are already current")
+    bf.add_argument("--site", action="store_true", help="rebuild the static site afterwards")
+    dm = ap.add_argument_group("daemon")
+    dm.add_argument("--tick", type=float, default=DAEMON_TICK,
+                    help=f"longest sleep between checks for due feeds, in seconds (default {DAEMON_TICK:g})")
+    dm.add_argument("--cycles", type=int, default=None, help="stop after this many cycles (default: run until stopped)")
+    dm.add_argument("--no-site", dest="daemon_site", action="store_false",
+                    help="do not rebuild the static site after cycles that stored a run")
+    args = ap.parse_args(argv)
+    if args.command == "backfill" and (args.record or args.replay):
+        ap.error("backfill works from stored runs; it cannot be combined with --record/--replay")
+    if args.command == "daemon" and (args.record or args.replay):
+        ap.error("daemon polls the live sources; it cannot be combined with --record/--replay")
+    return args
+
+
+def render_day(out_dir: Path, run_date: dt.date, snapshot: Dict[str, Any],
+               combined: Dict[str, Any]) -> tuple:
+    """Charts from the latest snapshot (so the chart reflects the newest HN) and the report from the combined payload."""
+    with perf.span("charts"):
+        charts = generate_charts(snapshot, out_dir, combined)
+    with perf.span("markdown"):
+        return charts, make_markdown(combined, charts, out_dir, run_date)
+
+
+def run(run_date: dt.date = RUN_DATE, data_dir: Path = DATA_DIR, update_repo_readme: bool = True,
+        record_perf: bool = True) -> Dict[str, Any]:
+    """
+    One growth-mode run: fetch, store the run, merge into the day, render. With record_perf
+    the stage timings are stored next to the run's snapshot (runs/<id>/perf.json).
+    """
+    from utils import search, trends
+    from utils import summarize as summarizer
+    from sources.feed_health import summary_lines
+
+    recorder = perf.start("run")
+    out_dir = today_dir(run_date, data_dir)
 
-    # 6) Update README highlights
-    update_readme(combined, charts, report_md)
+    # 1) Fetch a fresh snapshot
+    with perf.span("fetch"):
+        snapshot = fetch_all_sources(run_date)
+
+    # 2) Save this run under runs/<HHMMSS>/raw.json (compact: it is read by tools, not people),
+    #    unless the sources returned exactly what the previous run stored
+    run_id = None
+    with perf.span("merge"):
+        previous = packs.list_runs(out_dir)
+        last = packs.load_run(out_dir, previous[-1]) if previous else None
+        if last is not None and _content_digest(last) == _content_digest(snapshot):
+            print(f"[run] Nothing changed since run {previous[-1]}; not storing this run")
+            combined, added = daystore.load_day(out_dir), {}
+        else:
+            # 3) Under the day lock (concurrent runs take turns): store the snapshot, record its HN
+            #    points/comments and append only its new items to the day log; the combined view is
+            #    folded from the log with HN values brought up to date
+            combined, added, run_id = daystore.store_run(out_dir, snapshot, clock.now_utc().strftime("%H%M%S"))
+
+    # A run that stored nothing leaves indexes, report and README as the stored run made them
+    # (unless that run never got as far as writing the report)
+    render = run_id is not None or not (out_dir / "report.md").exists()
+    if run_id is not None:
+        with perf.span("index"):
+            # Only headlines first seen in this run feed the corpus IDF (so reruns do not skew it)
+            new_titles = [it.get("title") or "" for kind in ("world", "local", "hn") for it in added.get(kind) or []
+                          if not it.get("error")]
+            summarizer.get_idf().update(new_titles)
+
+            # Search index and trend counts: read only the log lines this run appended (other days cost one stat)
+            search.sync(data_dir)
+            trends.sync(data_dir)
+
+    # Earlier days are finished: roll their loose run snapshots into the monthly packs
+    with perf.span("pack"):
+        for day, n in packs.pack_finished(data_dir, before=run_date).items():
+            print(f"[packs] {day}: packed {n} runs")
+
+    if render:
+        # 4-5) Charts and markdown
+        charts, report_md = render_day(out_dir, run_date, snapshot, combined)
+
+        # 6) Update README highlights
+        if update_repo_readme:
+            with perf.span("readme"):
+                update_readme(combined, charts, report_md)
+
+        with perf.span("save_state"):
+            summarizer.save_state()
+    writes = write_stats()
+    print(f"[files] {writes['written']} written ({writes['bytes']} bytes), {writes['unchanged']} unchanged")
+    for line in summary_lines(snapshot.get("feed_health") or {}):
+        print(f"[feeds] {line}")
+
+    # A run that stored nothing has no runs/<id>/ to keep its timings in (and adds no commit)
+    report = recorder.report()
+    if record_perf and run_id is not None:
+        perf.save(out_dir / "runs" / run_id, report)
+    for line in perf.summary_lines(report):
+        print(f"[perf] {line}")
+    return combined
+
+
+def _seconds_to_midnight(now: dt.datetime) -> float:
+    tomorrow = dt.datetime.combine(now.date() + dt.timedelta(days=1), dt.time(), tzinfo=dt.timezone.utc)
+    return (tomorrow - now).total_seconds()
+
+
+def daemon(data_dir: Path = DATA_DIR, tick: float = DAEMON_TICK, site: bool = True, cycles: int | None = None,
+           record_perf: bool = True, update_repo_readme: bool = True):
+    """
+    Keep one process running and warm (HTTP sessions, parsed feeds, the day log and dedupe
+    index stay in memory). Each cycle is a growth-mode run in which only the URLs that are
+    due (utils.polling) are requested; the others give back what they returned last time, so
+    a cycle where nothing due has changed stores, renders and commits nothing. The site is
+    rebuilt only after cycles that stored a run. Cycles are at least DAEMON_MIN_GAP apart
+    (longer, backing off, after failures). SIGINT/SIGTERM stop after the current cycle.
+    """
+    import signal
+    import threading
+    from utils import polling
+
+    schedule = polling.get_schedule()
+    schedule.enabled = True
+    stop = threading.Event()
+
+    def _stop(signum, frame):
+        print(f"[daemon] {signal.Signals(signum).name}: stopping after the current cycle")
+        stop.set()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    n, day, stored, failed = 0, None, None, 0
+    while not stop.is_set():
+        # Sleep until a URL is due or the UTC day changes, re-checking at least every tick
+        now = clock.now_utc()
+        due = schedule.next_due()
+        if day == now.date() and due is not None and due > time.time():
+            stop.wait(max(1.0, min(tick, due - time.time(), _seconds_to_midnight(now))))
+            continue
+        day = now.date()
+        n += 1
+        t0 = time.perf_counter()
+        write_stats(reset=True)  # per-cycle file counts
+        try:
+            combined = run(day, data_dir, update_repo_readme=update_repo_readme, record_perf=record_perf)
+            state = (combined.get("date"), len(combined.get("runs") or []))
+            if state != stored and site:
+                import site_build
+                perf.start("site_build")
+                built = site_build.build_site(data_dir, data_dir.parent / "docs", record_perf=record_perf)
+                print(f"[site] built={built['built']}, unchanged={built['skipped']}")
+            stored, failed = state, 0
+        except Exception as e:  # one bad cycle must not take the daemon down; the next one retries
+            failed += 1
+            print(f"[daemon] cycle {n} failed: {type(e).__name__}: {e}")
+        polled, reused = schedule.take_counts()
+        due = schedule.next_due()
+        wait = f", next poll in {max(0.0, due - time.time()):.0f}s" if due is not None else ""
+        print(f"[daemon] cycle {n} done in {time.perf_counter() - t0:.2f}s: {polled} URLs polled, "
+              f"{reused} served from memory{wait}")
+        if cycles is not None and n >= cycles:
+            break
+        # Never start the next cycle straight away; after failed cycles back off exponentially
+        gap = min(POLL_MIN_SECONDS * 2 ** (failed - 1), POLL_MAX_SECONDS) if failed else DAEMON_MIN_GAP
+        stop.wait(gap)
+    print(f"[daemon] stopped after {n} cycles")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.profile:
+        return _main(args)
+    import sys
+    from utils import profiling
+    with profiling.session("main.py", sys.argv[1:] if argv is None else list(argv)):
+        return _main(args)
+
+
+def _main(args):
+    if args.command == "backfill":
+        workers = args.workers or os.cpu_count() or 1
+        t0 = time.perf_counter()
+        stats = backfill(args.data, args.date_from, args.date_to, workers=workers, force=args.force)
+        print(f"✅ Backfill complete in {time.perf_counter() - t0:.1f}s: days={stats['days']}, "
+              f"rendered={stats['rendered']}, current={stats['skipped']}, logs rebuilt={stats['logs_rebuilt']}, "
+              f"workers={workers}")
+        if args.site:
+            import site_build
+            site = site_build.build_site(args.data, args.data.parent / "docs", workers=workers)
+            print(f"[site] built={site['built']}, unchanged={site['skipped']}")
+        return
+
+    if args.command == "daemon":
+        # Profiler overhead would skew the stored timings
+        daemon(args.data, tick=args.tick, site=args.daemon_site, cycles=args.cycles,
+               record_perf=not args.profile, update_repo_readme=args.data == DATA_DIR)
+        return
+
+    from utils import cassette
+    from utils import summarize as summarizer
+    from utils.http_cache import get_cache
+    from sources.feed_health import use_ephemeral
+
+    if args.replay:
+        # Offline, deterministic: recorded responses, recorded clock, private output tree
+        cas = cassette.start(args.replay, "replay", latency=args.latency)
+        use_ephemeral()
+        summarizer.use_ephemeral()
+        get_cache().enabled = False
+        clock.freeze(dt.datetime.fromisoformat(cas.meta["recorded_at"]))
+        run_date = dt.date.fromisoformat(cas.meta["run_date"])
+        out_root = args.out or ROOT / "out" / "replay"
+        day_out = out_root / "data" / str(run_date)
+        if day_out.exists():
+            shutil.rmtree(day_out)  # previous replay output; start from an empty day
+        shutil.rmtree(out_root / "data" / CACHE_DIR.name, ignore_errors=True)  # derived from the day we just removed
+
+        t0 = time.perf_counter()
+        # Timings vary from one replay to the next: printed, not stored with the output
+        combined = run(run_date, out_root / "data", update_repo_readme=False, record_perf=False)
+        import site_build
+        site_build.build_site(out_root / "data", out_root / "docs")
+        print(f"✅ Replay complete in {time.perf_counter() - t0:.3f}s: date={combined.get('date')}, output={out_root}")
+        return
+
+    if args.record:
+        cas = cassette.start(args.record, "record")
+        use_ephemeral()
+        summarizer.use_ephemeral()
+        get_cache().enabled = False  # full bodies only, so the cassette replays without a local cache
+        recorded_at = clock.now_utc()
+        clock.freeze(recorded_at)
+
+    t0 = time.perf_counter()
+    combined = run(record_perf=not args.profile)  # profiler overhead would skew the stored timings
+
+    if args.record:
+        cas.save(recorded_at=recorded_at.isoformat(), run_date=str(RUN_DATE),
+                 wall_seconds=round(time.perf_counter() - t0, 3))
+        print(f"[cassette] Recorded {len(cas.requests)} responses into {args.record}")
 
     print(
         f"✅ Growth mode run complete: runs={len(combined.get('runs', []))}, "
@@ -1,14 +1,32 @@
 from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
 import shutil
-import datetime as dt
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from statistics import median
+from urllib.parse import quote
 import markdown
 import re
 
+from config import PLOTS_DIRNAME
+from utils import daystore, packs, perf, search, trends
+from utils.plots import line_plot
+from utils.files import VOLATILE_STAMPS, add_write_stats, write_bytes, write_text, write_stats
+
 # ----- Paths & constants
 ROOT = Path(__file__).parent.resolve()
 DATA = ROOT / "data"
 DOCS = ROOT / "docs"
 DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")  # only real days like 2025-10-13
+ASSET_DIRS = ["plots", "images"]
+MANIFEST_NAME = ".manifest.json"  # dotfile: not published by Pages
+SEARCH_DIRNAME = "search"
+PERF_DIRNAME = "perf"
+PERF_DAYS = 14  # days charted and tabulated per stage/feed on the performance page
 
 # ----- Styles & HTML shells
 STYLE = """
@@ -21,6 +39,9 @@ STYLE = """
   .grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(220px, 1fr)); gap: 8px 14px; }
   a { text-decoration: none; }
   a:hover { text-decoration: underline; }
+  svg.kg-chart { max-width: 100%; height: auto; }
+  table { border-collapse: collapse; font-size: 0.9em; margin: 8px 0 16px; }
+  th, td { border-bottom: 1px solid #4444; padding: 2px 10px 2px 0; text-align: left; }
   .card { border: 1px solid #4444; border-radius: 12px; padding: 12px 14px; }
   footer { margin: 48px 0 16px; font-size: 0.9em; }
 </style>
@@ -34,7 +55,7 @@ HTML_SHELL = """<!doctype html>
 <title>{title}</title>
 {style}
 <body>
-<nav><a href="../index.html?all=1">← All days</a></nav>
+<nav><a href="../index.html?all=1">← All days</a> · <a href="../search/">🔎 Search</a></nav>
 {content}
 <footer class="muted">Updated {updated_utc} • <a href="https://github.com/{repo}">GitHub repo</a></footer>
 </body>
@@ -51,6 +72,8 @@ INDEX_SHELL = """<!doctype html>
 <h1>🌱 Daily Knowledge Garden — Archive</h1>
 <p class="muted">Autonomous daily reports generated by GitHub Actions.</p>
 {latest_block}
+<p><a href="./search/">🔎 Search the archive</a> · <a href="./perf/">⏱ Performance</a></p>
+{trending_block}
 <h2>All Days</h2>
 <div class="grid">
 {links}
@@ -60,40 +83,202 @@ INDEX_SHELL = """<!doctype html>
 </html>
 """
 
+# Search page: fetches meta.json, then only the term shards of the query terms
+# (FNV-1a of the term mod shard count, same as utils/search.py) and the doc chunks it shows
+SEARCH_SHELL = """<!doctype html>
+<html lang="en">
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Daily Knowledge Garden — Search</title>
+{style}
+<body>
+<nav><a href="../index.html?all=1">← All days</a></nav>
+<h1>🔎 Search the archive</h1>
+<form id="f"><input id="q" type="search" placeholder="headline words…" autofocus style="width:100%;font-size:1.1em;padding:6px 8px"></form>
+<p id="status" class="muted"></p>
+<ul id="hits"></ul>
+<footer class="muted"><a href="https://github.com/{repo}">GitHub repo</a></footer>
+<script>
+{script}
+</script>
+</body>
+</html>
+"""
+
+SEARCH_JS = """
+const enc = new TextEncoder();
+const get = (p) => fetch(p).then((r) => (r.ok ? r.json() : null));
+let meta = null;
+function fnv1a(s) {
+  let h = 0x811c9dc5;
+  for (const b of enc.encode(s)) { h ^= b; h = Math.imul(h, 0x01000193) >>> 0; }
+  return h;
+}
+const shardOf = (t) => (fnv1a(t) % meta.shards).toString(16).padStart(2, "0");
+function terms(q) {
+  const stop = new Set(meta.stopwords);
+  return [...new Set(q.toLowerCase().match(/[\\p{L}\\p{N}]+/gu) || [])].filter((t) => t.length > 1 && !stop.has(t));
+}
+async function run(q) {
+  const status = document.getElementById("status"), list = document.getElementById("hits");
+  meta = meta || (await get("meta.json"));
+  list.replaceChildren();
+  if (!meta) { status.textContent = "Search index not built yet."; return; }
+  const ts = terms(q);
+  if (!ts.length) { status.textContent = ""; return; }
+  const shards = {};
+  for (const t of ts) shards[shardOf(t)] ??= get(`terms/${shardOf(t)}.json`);
+  const lists = [];
+  for (const t of ts) {
+    let acc = 0;
+    lists.push((((await shards[shardOf(t)]) || {})[t] || []).map((gap) => (acc += gap)));
+  }
+  lists.sort((a, b) => a.length - b.length);
+  let ids = lists[0];
+  for (const l of lists.slice(1)) { const s = new Set(l); ids = ids.filter((i) => s.has(i)); }
+  ids.sort((a, b) => b - a);
+  const top = ids.slice(0, 50), chunks = {};
+  for (const i of top) chunks[Math.floor(i / meta.chunk)] ??= get(`docs/${Math.floor(i / meta.chunk)}.json`);
+  for (const i of top) {
+    const [date, kind, title, url, source] = (await chunks[Math.floor(i / meta.chunk)])[i % meta.chunk];
+    const li = document.createElement("li"), a = document.createElement("a"), day = document.createElement("a");
+    a.href = url; a.textContent = title;
+    day.href = `../${date}/`; day.textContent = date;
+    li.append(a, ` — ${source} · `, day);
+    list.append(li);
+  }
+  status.textContent = `${ids.length} match${ids.length === 1 ? "" : "es"}` + (ids.length > top.length ? ` (newest ${top.length} shown)` : "");
+}
+const box = document.getElementById("q");
+document.getElementById("f").addEventListener("submit", (e) => {
+  e.preventDefault();
+  history.replaceState(null, "", `?q=${encodeURIComponent(box.value)}`);
+  run(box.value);
+});
+box.value = new URLSearchParams(location.search).get("q") || "";
+if (box.value) run(box.value);
+"""
+
+# Bump when build_day/build_index output changes in ways the templates above don't capture
+BUILD_VERSION = "3"
+TEMPLATE_VERSION = hashlib.sha1(
+    "\0".join([BUILD_VERSION, markdown.__version__, STYLE, HTML_SHELL, INDEX_SHELL]).encode("utf-8")
+).hexdigest()[:16]
+
 # ----- Helpers
 
 def repo_slug() -> str:
     # Hardcode for your repo
     return "jakep84/Daily-Knowledge-Garden"
 
-def get_day_dirs() -> list[Path]:
+def get_day_dirs(data: Path = DATA) -> list[Path]:
     """Return only folders named like YYYY-MM-DD, sorted ascending."""
-    if not DATA.exists():
+    if not data.exists():
         return []
     return sorted(
-        p for p in DATA.iterdir()
+        p for p in data.iterdir()
         if p.is_dir() and DATE_RE.match(p.name)
     )
 
+# One Markdown pipeline per process, reset between documents (building it is the expensive part)
+_MD: markdown.Markdown | None = None
+
 def convert_md_to_html(md_text: str) -> str:
-    return markdown.markdown(md_text, extensions=["extra", "tables", "sane_lists"])
+    global _MD
+    if _MD is None:
+        _MD = markdown.Markdown(extensions=["extra", "tables", "sane_lists"])
+    return _MD.reset().convert(md_text)
+
+_CHART_IMG = re.compile(r'<img alt="([^"]*)" src="[^"]*?\b' + PLOTS_DIRNAME + r'/([^"/]+)" ?/?>')
+
+def embed_charts(html: str, day_dir: Path) -> str:
+    """
+    Report chart images (linked repo-relative, data/<day>/plots/...) on the day page: SVG
+    charts are inlined as markup, other images point at the mirrored plots/ copy.
+    """
+    def sub(m: re.Match) -> str:
+        alt, name = m.group(1), m.group(2)  # the inlined SVG carries its own <title>
+        src = day_dir / PLOTS_DIRNAME / name
+        if name.endswith(".svg") and src.exists():
+            return src.read_text(encoding="utf-8").strip()
+        return f'<img alt="{alt}" src="{PLOTS_DIRNAME}/{quote(name)}" />'
+    return _CHART_IMG.sub(sub, html)
+
+def day_updated(day_dir: Path) -> str:
+    """
+    "Updated" stamp for a day, taken from its data (latest run, else the combined payload)
+    rather than the build clock, so rebuilding unchanged inputs yields identical HTML.
+    """
+    runs = packs.list_runs(day_dir)  # loose or already packed
+    if runs:
+        hhmmss = runs[-1]
+        return f"{day_dir.name} {hhmmss[:2]}:{hhmmss[2:4]} UTC"
+    stamp = daystore.last_updated(day_dir) or ""
+    if len(stamp) >= 16:
+        return f"{stamp[:10]} {stamp[11:16]} UTC"
+    return f"{day_dir.name} 00:00 UTC"
+
+def day_inputs_hash(day_dir: Path) -> str:
+    """
+    Content hash of everything build_day reads for one day, except the "Updated" stamp: a
+    later run that leaves the report and assets as they were does not re-render the page.
+    """
+    h = hashlib.sha1(day_dir.name.encode("utf-8"))
+    report = day_dir / "report.md"
+    h.update(report.read_bytes() if report.exists() else b"\0missing")
+    for sub in ASSET_DIRS:
+        src = day_dir / sub
+        for f in sorted(src.rglob("*")) if src.exists() else []:
+            if f.is_file():
+                h.update(b"\0" + f.relative_to(day_dir).as_posix().encode("utf-8") + b"\0")
+                h.update(f.read_bytes())
+    return h.hexdigest()
+
+def perf_inputs_hash(day_dir: Path) -> str | None:
+    """Content hash of a day's stored timings (folded and loose perf.json); None without any."""
+    files = [day_dir / perf.PERF_NAME] + sorted((day_dir / "runs").glob(f"*/{perf.PERF_NAME}"))
+    h, found = hashlib.sha1(day_dir.name.encode("utf-8")), False
+    for f in files:
+        if f.is_file():
+            found = True
+            h.update(b"\0" + f.relative_to(day_dir).as_posix().encode("utf-8") + b"\0")
+            h.update(f.read_bytes())
+    return h.hexdigest() if found else None
+
+def load_manifest(docs: Path) -> dict:
+    try:
+        m = json.loads((docs / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except Exception:
+        return {"template": None, "days": {}, "perf": {}}
+    return m if m.get("template") == TEMPLATE_VERSION else {"template": None, "days": {}, "perf": {}}
+
+def save_manifest(docs: Path, day_hashes: dict, perf_days: dict | None = None):
+    doc = {"template": TEMPLATE_VERSION, "days": dict(sorted(day_hashes.items())),
+           "perf": dict(sorted((perf_days or {}).items()))}
+    write_text(docs / MANIFEST_NAME, json.dumps(doc, indent=1) + "\n")
 
 # ----- Build functions
 
-def build_day(day_dir: Path, repo: str):
+def build_day(day_dir: Path, repo: str, docs: Path = DOCS):
     """Create docs/YYYY-MM-DD/index.html and copy assets so relative links work."""
     day = day_dir.name
-    out_dir = DOCS / day
+    out_dir = docs / day
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Copy plots/ and images/ if present
-    for sub in ["plots", "images"]:
+    # Mirror plots/ and images/ (identical files are left alone; copies whose source is gone are removed)
+    for sub in ASSET_DIRS:
         src = day_dir / sub
         dst = out_dir / sub
-        if src.exists():
-            if dst.exists():
-                shutil.rmtree(dst)
-            shutil.copytree(src, dst)
+        live = set()
+        for f in sorted(src.rglob("*")) if src.exists() else []:
+            if f.is_file():
+                live.add(f.relative_to(src))
+                write_bytes(dst / f.relative_to(src), f.read_bytes())
+        for f in sorted(dst.rglob("*"), reverse=True) if dst.exists() else []:
+            if f.is_file() and f.relative_to(dst) not in live:
+                f.unlink()
+            elif f.is_dir() and not any(f.iterdir()):
+                f.rmdir()
 
     # Convert report.md → index.html (skip if missing)
     report_md_path = day_dir / "report.md"
@@ -102,8 +287,8 @@ def build_day(day_dir: Path, repo: str):
         return
 
     report_md = report_md_path.read_text(encoding="utf-8")
-    report_html = convert_md_to_html(report_md)
-    updated = dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    report_html = embed_charts(convert_md_to_html(report_md), day_dir)
+    updated = day_updated(day_dir)
     html = HTML_SHELL.format(
         title=f"Daily Knowledge Garden — {day}",
         style=STYLE,
@@ -111,9 +296,57 @@ def build_day(day_dir: Path, repo: str):
         updated_utc=updated,
         repo=repo
     )
-    (out_dir / "index.html").write_text(html, encoding="utf-8")
+    write_text(out_dir / "index.html", html, volatile=VOLATILE_STAMPS)
+
+def _build_day_job(args: tuple) -> dict:
+    """Process-pool entry point: (day_dir, repo, docs) as strings; returns the day's write stats."""
+    day_dir, repo, docs = args
+    write_stats(reset=True)  # a forked worker starts with the parent's counts
+    build_day(Path(day_dir), repo, Path(docs))
+    return write_stats(reset=True)
+
+def _mirror(src: Path, dst: Path) -> int:
+    """Copy files whose size or mtime differ (copy2 keeps mtimes); drop files gone from src."""
+    copied = 0
+    wanted = set()
+    for f in sorted(src.rglob("*")) if src.exists() else []:
+        if not f.is_file():
+            continue
+        rel = f.relative_to(src)
+        wanted.add(rel)
+        out, st = dst / rel, f.stat()
+        if out.exists():
+            ost = out.stat()
+            if ost.st_size == st.st_size and ost.st_mtime_ns == st.st_mtime_ns:
+                continue
+        out.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(f, out)
+        copied += 1
+    for f in list(dst.rglob("*")) if dst.exists() else []:
+        if f.is_file() and f.relative_to(dst) not in wanted:
+            f.unlink()
+    return copied
 
-def build_index(days: list[Path], repo: str):
+def build_search(data: Path, repo: str, docs: Path = DOCS) -> int:
+    """
+    Bring the search index up to date and publish it under docs/search/: term shards and
+    doc chunks are mirrored (only files touched since the last build are copied), plus a
+    slim meta.json and the search page. Returns the number of files copied.
+    """
+    index = search.sync(data)
+    out = docs / SEARCH_DIRNAME
+    out.mkdir(parents=True, exist_ok=True)
+    copied = sum(_mirror(index.root / sub, out / sub) for sub in ("terms", "docs"))
+    meta = {k: index.meta[k] for k in ("version", "shards", "chunk", "stopwords", "docs")}
+    files = {
+        out / "meta.json": json.dumps(meta, separators=(",", ":")),
+        out / "index.html": SEARCH_SHELL.format(style=STYLE, repo=repo, script=SEARCH_JS),
+    }
+    for p, text in files.items():
+        write_text(p, text)
+    return copied
+
+def build_index(days: list[Path], repo: str, docs: Path = DOCS):
     # Build the archive list
     links = [
         f'<a class="card" href="./{d.name}/"><strong>{d.name}</strong><br><span class="muted">Daily report</span></a>'
@@ -132,26 +365,223 @@ def build_index(days: list[Path], repo: str):
             f' location.replace("./{latest}/");</script>'
         )
 
-    updated = dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+    # Trending this week (as of the newest day), linked to the search page
+    trending = trends.trending(days[-1].parent, days[-1].name, n=12, update=True) if days else []
+    trending_block = ""
+    if trending:
+        terms = " · ".join(
+            f'<a href="./search/?q={quote(t["term"])}">{escape(t["term"])}</a> <span class="muted">{t["count"]}</span>'
+            for t in trending
+        )
+        trending_block = f"<h2>🔥 Trending This Week</h2>\n<p>{terms}</p>"
+
+    updated = day_updated(days[-1]) if days else "—"
     html = INDEX_SHELL.format(
-        style=STYLE, links=links_html, updated_utc=updated, repo=repo, latest_block=latest_block
+        style=STYLE, links=links_html, updated_utc=updated, repo=repo, latest_block=latest_block,
+        trending_block=trending_block
     )
     if redirect_snippet:
         html = html.replace("<body>", f"<body>\n{redirect_snippet}\n")
-    (DOCS / "index.html").write_text(html, encoding="utf-8")
+    write_text(docs / "index.html", html, volatile=VOLATILE_STAMPS)
+
+def _table(headers: list[str], rows: list[list]) -> str:
+    head = "".join(f"<th>{escape(h)}</th>" for h in headers)
+    body = "\n".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows)
+    return f"<table>\n<thead><tr>{head}</tr></thead>\n<tbody>\n{body}\n</tbody>\n</table>"
+
+def _num(x, digits: int = 2) -> str:
+    return "—" if x is None else f"{x:.{digits}f}"
+
+def _span_medians(reports: list[dict], feeds: bool) -> dict:
+    """Median wall time per span over a day's reports: per feed (feed.<label>) or per stage."""
+    walls: dict = {}
+    for r in reports:
+        for sp in r["spans"]:
+            if sp["name"].startswith("feed.") == feeds:
+                walls.setdefault(sp["name"][5:] if feeds else sp["name"], []).append(sp["wall_s"])
+    return {name: median(ws) for name, ws in walls.items()}
+
+def _perf_day_html(day: str, runs: dict) -> str:
+    parts = [f"<h1>⏱ Performance — {day}</h1>", '<p><a href="./">Daily report</a> · <a href="../perf/">All days</a></p>']
+    for rid, jobs in runs.items():
+        parts.append(f"<h2>Run {rid[:2]}:{rid[2:4]}:{rid[4:6]}{escape(rid[6:])} UTC</h2>")
+        for job, rep in jobs.items():
+            t = rep["totals"]
+            parts.append(f"<h3>{escape(job)}</h3>\n<p class=\"muted\">{_num(t['wall_s'])} s wall · {_num(t['cpu_s'])} s CPU · "
+                         f"{t['bytes'] / 1024:.0f} KiB fetched · peak {_num(t['peak_rss_mb'], 1)} MB</p>")
+            rows = [[escape(sp["name"]) + (f' <span class="muted">({escape(sp["error"])})</span>' if sp.get("error") else ""),
+                     _num(sp["start_s"]), _num(sp["wall_s"], 3), _num(sp["cpu_s"], 3),
+                     _num(sp["bytes"] / 1024, 1) if sp["bytes"] else "", _num(sp["peak_rss_mb"], 1)]
+                    for sp in rep["spans"]]
+            parts.append(_table(["Stage", "Start (s)", "Wall (s)", "CPU (s)", "KiB", "Peak MB"], rows))
+    return "\n".join(parts)
+
+def _perf_day(d: Path, repo: str, docs: Path) -> dict:
+    """Render docs/<day>/perf.html; returns the day's medians for the overview (summary None: no run timings)."""
+    runs = perf.load_day(d)
+    html = HTML_SHELL.format(title=f"Performance — {d.name}", style=STYLE, content=_perf_day_html(d.name, runs),
+                             updated_utc=day_updated(d), repo=repo)
+    write_text(docs / d.name / "perf.html", html, volatile=VOLATILE_STAMPS)
+    reports = [jobs["run"] for jobs in runs.values() if "run" in jobs]
+    site = [jobs["site_build"]["totals"]["wall_s"] for jobs in runs.values() if "site_build" in jobs]
+    if not reports:
+        return {"summary": None, "stages": {}, "feeds": {}}
+    stages, feeds = _span_medians(reports, False), _span_medians(reports, True)
+    return {"summary": {
+        "day": d.name, "runs": len(reports),
+        "wall": median(r["totals"]["wall_s"] for r in reports),
+        "cpu": median(r["totals"]["cpu_s"] for r in reports),
+        "fetch": stages.get("fetch"),
+        "site": median(site) if site else None,
+        "kib": sum(r["totals"]["bytes"] for r in reports) / 1024,
+        "peak": max((r["totals"]["peak_rss_mb"] or 0 for r in reports), default=None),
+        "slowest": list(max(feeds.items(), key=lambda kv: kv[1], default=None) or []) or None,
+    }, "stages": stages, "feeds": feeds}
+
+def build_perf(days: list[Path], repo: str, docs: Path = DOCS, previous: dict | None = None) -> dict:
+    """
+    Performance pages from the stored run timings (utils.perf): docs/<day>/perf.html with every
+    run's spans, and docs/perf/ with per-day totals, a run-time chart and per-stage / per-feed
+    medians over the last PERF_DAYS days.
+
+    Only days whose timings changed since `previous` (the manifest's "perf" entries) are read
+    and re-rendered; the others' medians come from the manifest. Returns the entries to store.
+    """
+    out = docs / PERF_DIRNAME
+    previous = previous or {}
+    entries, summary, stages, feeds = {}, [], {}, {}
+    for d in days:
+        digest = perf_inputs_hash(d)
+        if digest is None:
+            continue
+        entry = previous.get(d.name)
+        if not entry or entry.get("hash") != digest or not (docs / d.name / "perf.html").exists():
+            entry = {"hash": digest, **_perf_day(d, repo, docs)}
+        entries[d.name] = entry
+        if entry["summary"] is None:
+            continue
+        summary.append(entry["summary"])
+        stages[d.name], feeds[d.name] = entry["stages"], entry["feeds"]
+
+    parts = ["<h1>⏱ Performance</h1>",
+             '<p class="muted">Median per day over the runs that stored timings (runs/&lt;id&gt;/perf.json).</p>']
+    if not summary:
+        parts.append("<p>No timings recorded yet.</p>")
+    else:
+        recent = summary[-PERF_DAYS:]
+        labels = [row["day"][5:] for row in recent]
+        series = {"run": [row["wall"] for row in recent], "fetch": [row["fetch"] for row in recent]}
+        if any(row["site"] is not None for row in recent):
+            series["site build"] = [row["site"] for row in recent]
+        chart = line_plot("Wall time per day (median seconds)", labels, series, out / "wall_time")
+        if chart is not None and chart.suffix == ".svg":
+            parts.append(chart.read_text(encoding="utf-8").strip())
+        elif chart is not None:
+            parts.append(f'<img alt="Wall time per day" src="{chart.name}" />')
+
+        rows = [[f'<a href="../{r["day"]}/perf.html">{r["day"]}</a>', r["runs"], _num(r["wall"]), _num(r["cpu"]),
+                 _num(r["fetch"]), _num(r["site"]), f'{r["kib"]:.0f}', _num(r["peak"], 1),
+                 f'{escape(r["slowest"][0])} ({_num(r["slowest"][1])} s)' if r["slowest"] else "—"]
+                for r in reversed(summary)]
+        parts += ["<h2>Days</h2>", _table(["Day", "Runs", "Wall (s)", "CPU (s)", "Fetch (s)", "Site build (s)",
+                                            "KiB fetched", "Peak MB", "Slowest feed"], rows)]
+        for title, per_day in (("Stages", stages), ("Feeds", feeds)):
+            cols = [row["day"] for row in recent]
+            names = sorted({n for day in cols for n in per_day[day]})
+            rows = [[escape(n)] + [_num(per_day[day].get(n)) for day in cols] for n in names]
+            parts += [f"<h2>{title} (median wall seconds)</h2>", _table([""] + [c[5:] for c in cols], rows)]
+
+    html = HTML_SHELL.format(title="Daily Knowledge Garden — Performance", style=STYLE, content="\n".join(parts),
+                             updated_utc=day_updated(days[-1]) if days else "—", repo=repo)
+    write_text(out / "index.html", html, volatile=VOLATILE_STAMPS)
+    return entries
 
 # ----- Entry point
 
-def main():
-    DOCS.mkdir(exist_ok=True)
-    days = get_day_dirs()
+def build_site(data: Path = DATA, docs: Path = DOCS, full: bool = False, workers: int = 1,
+               record_perf: bool = False) -> dict:
+    """
+    Incremental build: only days whose inputs (report.md and assets; not the "Updated"
+    stamp, see day_inputs_hash) or the templates changed since the manifest was written are
+    rendered; outputs for days that no longer exist in data/ are removed. full=True ignores
+    the manifest.
+
+    With workers > 1 the days to render are spread over a process pool; the index is
+    written once every worker has finished. With record_perf the build's timings are added
+    to the newest day's latest run (perf.attach) before the performance pages are written.
+    """
+    docs.mkdir(parents=True, exist_ok=True)
+    days = get_day_dirs(data)
     repo = repo_slug()
+    manifest = load_manifest(docs)
+    previous = {} if full else manifest["days"]
 
+    hashes, todo = {}, []
     for d in days:
-        build_day(d, repo)
+        hashes[d.name] = day_inputs_hash(d)
+        rendered = (docs / d.name / "index.html").exists() or not (d / "report.md").exists()
+        if previous.get(d.name) != hashes[d.name] or not rendered:
+            todo.append(d)
+
+    t0 = time.perf_counter()
+    with perf.span("site.days"):
+        if workers > 1 and len(todo) > 1:
+            jobs = [(str(d), repo, str(docs)) for d in todo]
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+                for writes in pool.map(_build_day_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+                    add_write_stats(writes)
+        else:
+            for d in todo:
+                build_day(d, repo, docs)
+    render_s = time.perf_counter() - t0
+    built = len(todo)
+
+    live = {d.name for d in days}
+    stale = [p for p in docs.iterdir() if p.is_dir() and DATE_RE.match(p.name) and p.name not in live]
+    for p in stale:
+        shutil.rmtree(p)
+
+    with perf.span("site.index"):
+        build_index(days, repo, docs)
+    with perf.span("site.search"):
+        search_files = build_search(data, repo, docs)
+    if record_perf and days:
+        perf.attach(days[-1], perf.get_recorder().report())
+    perf_days = build_perf(days, repo, docs, {} if full else manifest.get("perf"))
+    save_manifest(docs, hashes, perf_days)
+    return {
+        "days": len(days), "built": built, "skipped": len(days) - built, "removed": len(stale),
+        "search_files": search_files,
+        "render_s": round(render_s, 3), "pages_per_sec": round(built / render_s, 1) if built and render_s else None,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the static site in docs/ from data/.")
+    ap.add_argument("--full", action="store_true", help="ignore the build manifest and rebuild every day")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("SITE_WORKERS", "1")),
+                    help="render days in N processes (0 = one per CPU; default SITE_WORKERS or 1)")
+    ap.add_argument("--profile", action="store_true",
+                    help="write per-stage cProfile/tracemalloc artifacts to out/profile/<timestamp>/")
+    args = ap.parse_args(argv)
+    if args.profile:
+        import sys
+        from utils import profiling
+        with profiling.session("site_build.py", sys.argv[1:] if argv is None else list(argv)):
+            return _main(args)
+    return _main(args)
 
-    build_index(days, repo)
-    print("Site built into /docs")
+def _main(args):
+    workers = args.workers or os.cpu_count() or 1
+    recorder = perf.start("site_build")
+    # A profiled build is slowed down by the profilers: its timings are not kept
+    stats = build_site(full=args.full, workers=workers, record_perf=not args.profile)
+    rate = f", {stats['pages_per_sec']} pages/s" if stats["pages_per_sec"] else ""
+    writes = write_stats()
+    print(f"Site built into /docs (built={stats['built']}, unchanged={stats['skipped']}, "
+          f"removed={stats['removed']}, workers={workers}{rate}; "
+          f"{writes['written']} files written, {writes['bytes']} bytes)")
+    for line in perf.summary_lines(recorder.report()):
+        print(f"[perf] {line}")
 
 if __name__ == "__main__":
     main()
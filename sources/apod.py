@@ -1,19 +1,24 @@
 import feedparser
-from datetime import datetime, timezone
+
+from utils.clock import now_utc
+from utils.http_cache import cached_get
 
 APOD_RSS = "https://apod.nasa.gov/apod.rss"
 
-def fetch_apod():
-    feed = feedparser.parse(APOD_RSS)
+def _parse_entry(body: bytes, headers: dict):
+    feed = feedparser.parse(body, response_headers=headers)
     best = feed.entries[0] if feed.entries else None
     if not best:
-        return {"fetched_at": datetime.now(timezone.utc).isoformat(), "entry": None}
+        return None
+    return {
+        "title": best.get("title"),
+        "link": best.get("link"),
+        "summary": best.get("summary"),
+        "published": best.get("published"),
+    }
+
+def fetch_apod():
     return {
-        "fetched_at": datetime.now(timezone.utc).isoformat(),
-        "entry": {
-            "title": best.get("title"),
-            "link": best.get("link"),
-            "summary": best.get("summary"),
-            "published": best.get("published"),
-        }
+        "fetched_at": now_utc().isoformat(),
+        "entry": cached_get(APOD_RSS, _parse_entry, tag="apod-v1"),
     }
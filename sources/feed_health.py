@@ -0,0 +1,117 @@
+# sources/feed_health.py
+from __future__ import annotations
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import FEED_FAIL_THRESHOLD, FEED_COOLDOWN_HOURS, FEED_COOLDOWN_MAX_HOURS, FEED_HEALTH_PATH
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FeedHealth:
+    """
+    Per-URL health registry with a circuit breaker, persisted across runs.
+
+    After FEED_FAIL_THRESHOLD consecutive failures the circuit opens and the feed is
+    skipped for a cooldown that doubles with every further failure (capped). Once the
+    cooldown expires the next run probes it once: success closes the circuit, failure
+    re-opens it for longer.
+    """
+
+    def __init__(self, path: Path | None, threshold: int, cooldown_hours: float, max_cooldown_hours: float):
+        self.path = Path(path) if path is not None else None  # None: in-memory only
+        self.threshold = threshold
+        self.cooldown = cooldown_hours * 3600
+        self.max_cooldown = max_cooldown_hours * 3600
+        self._lock = threading.Lock()
+        self._feeds: Optional[Dict[str, Dict[str, Any]]] = None
+        self._run = {"ok": [], "failed": [], "skipped": []}
+
+    def _state(self) -> Dict[str, Dict[str, Any]]:
+        if self._feeds is None:
+            if self.path is None:
+                self._feeds = {}
+                return self._feeds
+            try:
+                self._feeds = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                self._feeds = {}
+        return self._feeds
+
+    def allow(self, url: str, label: str) -> bool:
+        """False while the feed's circuit is open; the skip is noted in this run's summary."""
+        with self._lock:
+            st = self._state().get(url) or {}
+            open_until = st.get("open_until") or 0
+            if open_until <= time.time():
+                return True
+            self._run["skipped"].append({"source": label, "url": url, "until": _iso(open_until)})
+            return False
+
+    def record(self, url: str, label: str, latency: float | None, error: str | None = None):
+        with self._lock:
+            st = self._state().setdefault(url, {"consecutive_failures": 0})
+            now = time.time()
+            st["source"] = label
+            st["last_checked"] = _iso(now)
+            st["latency_ms"] = round(latency * 1000) if latency is not None else None
+            if error is None:
+                st.update({"status": "ok", "consecutive_failures": 0, "open_until": None, "last_error": None})
+                self._run["ok"].append({"source": label, "latency_ms": st["latency_ms"]})
+                return
+            fails = st.get("consecutive_failures", 0) + 1
+            st.update({"status": "error", "consecutive_failures": fails, "last_error": error[:300]})
+            if fails >= self.threshold:
+                cooldown = min(self.max_cooldown, self.cooldown * 2 ** (fails - self.threshold))
+                st["open_until"] = now + cooldown
+            self._run["failed"].append({"source": label, "url": url, "error": error[:300], "consecutive_failures": fails})
+
+    def save(self) -> Dict[str, Any]:
+        """Persist the registry and return this run's health summary."""
+        with self._lock:
+            feeds = self._state()
+            if feeds and self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps(feeds, ensure_ascii=False, indent=1), encoding="utf-8")
+            run = self._run
+            self._run = {"ok": [], "failed": [], "skipped": []}
+        slowest = sorted((o for o in run["ok"] if o["latency_ms"] is not None), key=lambda o: -o["latency_ms"])[:5]
+        return {
+            "ok": len(run["ok"]),
+            "failed": run["failed"],
+            "skipped": run["skipped"],
+            "slowest": slowest,
+            "open_circuits": sum(1 for st in feeds.values() if (st.get("open_until") or 0) > time.time()),
+        }
+
+
+_HEALTH: Optional[FeedHealth] = None
+
+
+def get_health() -> FeedHealth:
+    global _HEALTH
+    if _HEALTH is None:
+        _HEALTH = FeedHealth(FEED_HEALTH_PATH, FEED_FAIL_THRESHOLD, FEED_COOLDOWN_HOURS, FEED_COOLDOWN_MAX_HOURS)
+    return _HEALTH
+
+
+def use_ephemeral():
+    """Fresh in-memory registry that allows every feed (cassette record/replay runs)."""
+    global _HEALTH
+    _HEALTH = FeedHealth(None, FEED_FAIL_THRESHOLD, FEED_COOLDOWN_HOURS, FEED_COOLDOWN_MAX_HOURS)
+
+
+def summary_lines(summary: Dict[str, Any]) -> List[str]:
+    """One-line-per-problem rendering for console output."""
+    if not summary:
+        return []
+    lines = [f"feeds ok={summary.get('ok', 0)} failed={len(summary.get('failed', []))} skipped={len(summary.get('skipped', []))}"]
+    lines += [f"  ✗ {f['source']}: {f['error']} (x{f['consecutive_failures']})" for f in summary.get("failed", [])]
+    lines += [f"  ⏸ {s['source']}: circuit open until {s['until']}" for s in summary.get("skipped", [])]
+    return lines
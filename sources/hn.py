@@ -1,12 +1,12 @@
-import requests
-from datetime import datetime, timezone
+import json
+
+from utils.clock import now_utc
+from utils.http_cache import cached_get
 
 ALGOLIA_TOP = "https://hn.algolia.com/api/v1/search?tags=front_page"
 
-def fetch_top():
-    r = requests.get(ALGOLIA_TOP, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+def _parse_hits(body: bytes, headers: dict):
+    data = json.loads(body)
     items = []
     for hit in data.get("hits", []):
         items.append({
@@ -18,7 +18,10 @@ def fetch_top():
             "created_at": hit.get("created_at"),
             "objectID": hit.get("objectID"),
         })
+    return items
+
+def fetch_top():
     return {
-        "fetched_at": datetime.now(timezone.utc).isoformat(),
-        "items": items
+        "fetched_at": now_utc().isoformat(),
+        "items": cached_get(ALGOLIA_TOP, _parse_hits, tag="hn-v1"),
     }
@@ -3,7 +3,17 @@ from __future__ import annotations
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any
 import time
-import feedparser
+from concurrent.futures import ThreadPoolExecutor
+
+from config import FEED_WORKERS, SOURCE_TIMEOUT, RSS_PARSER
+from utils.parallel import run_all, run_deadline
+from utils import perf, polling
+from utils.http_cache import cached_get
+from .feed_health import get_health
+from . import rss_stream
+
+# One bounded pool shared by every fetch_many call, so concurrent sources can't multiply threads
+_FEED_POOL: ThreadPoolExecutor | None = None
 
 # Normalize RSS entries into a simple shape
 @dataclass
@@ -22,9 +32,9 @@ def _safe(entry: dict, key: str, default: str = "") -> str:
         val = val[0]
     return str(val)
 
-def fetch_rss(url: str, source: str, limit: int = 15) -> List[Dict[str, Any]]:
-    # User-Agent helps some feeds
-    d = feedparser.parse(url, request_headers={"User-Agent": "DailyKnowledgeGarden/1.0 (+github)"})
+def _parse_feedparser(body: bytes, headers: Dict[str, str], source: str, limit: int) -> List[NewsItem]:
+    import feedparser  # ~100 ms to import; the streaming backend usually does without it
+    d = feedparser.parse(body, response_headers=headers)
     items: List[NewsItem] = []
     for e in d.entries[:limit]:
         items.append(
@@ -35,14 +45,72 @@ def fetch_rss(url: str, source: str, limit: int = 15) -> List[Dict[str, Any]]:
                 source=source,
             )
         )
+    return items
+
+def _parse_rss(body: bytes, headers: Dict[str, str], source: str, limit: int, backend: str = RSS_PARSER) -> List[Dict[str, Any]]:
+    items: List[NewsItem] | None = None
+    if backend == "stream":
+        try:
+            items = [NewsItem(source=source, **f) for f in rss_stream.parse_items(body, limit)]
+        except rss_stream.UnsupportedFeed:
+            items = None  # malformed or unusual feed: let feedparser deal with it
+    if items is None:
+        items = _parse_feedparser(body, headers, source, limit)
     return [i.to_dict() for i in items]
 
+def fetch_rss(url: str, source: str, limit: int = 15) -> List[Dict[str, Any]]:
+    # Conditional GET: an unchanged feed (304) reuses last run's normalized items without parsing
+    return cached_get(
+        url,
+        lambda body, headers: _parse_rss(body, headers, source, limit),
+        tag=f"rss-v1:{RSS_PARSER}:{source}:{limit}",
+    )
+
+def _feed_pool() -> ThreadPoolExecutor:
+    global _FEED_POOL
+    if _FEED_POOL is None:
+        _FEED_POOL = ThreadPoolExecutor(max_workers=FEED_WORKERS, thread_name_prefix="feed")
+    return _FEED_POOL
+
 def fetch_many(sources: List[tuple]) -> List[Dict[str, Any]]:
-    """sources = [(url, 'Label'), ...]"""
-    out: List[Dict[str, Any]] = []
+    """
+    sources = [(url, 'Label'), ...] — fetched concurrently; output keeps the input order.
+    Feeds whose circuit is open (see feed_health) are skipped without a placeholder.
+    """
+    health = get_health()
+    schedule = polling.get_schedule()
+    live = []
     for url, label in sources:
+        if health.allow(url, label):
+            live.append((url, label))
+        else:
+            schedule.failed(url)  # the daemon does not come back for it every cycle
+    # Each feed's own fetch time, measured in its worker (a feed abandoned by the timeout or
+    # deadline has no end yet: its latency is the time it had taken when the group gave up)
+    started: Dict[str, float] = {}
+    latencies: Dict[str, float] = {}
+
+    def _task(url: str, label: str):
+        started[url] = t0 = time.monotonic()
         try:
-            out.extend(fetch_rss(url, label))
-        except Exception as e:
-            out.append({"title": f"(feed error from {label})", "link": "", "published": "", "source": label, "error": str(e)})
+            with perf.span(f"feed.{label}"):
+                return fetch_rss(url, label)
+        finally:
+            latencies[url] = time.monotonic() - t0
+
+    tasks = {str(i): (lambda url=url, label=label: _task(url, label)) for i, (url, label) in enumerate(live)}
+    results = run_all(tasks, FEED_WORKERS, timeout=SOURCE_TIMEOUT, deadline=run_deadline(), executor=_feed_pool())
+    out: List[Dict[str, Any]] = []
+    for (url, label), res in zip(live, results.values()):
+        latency = latencies.get(url)
+        if latency is None and url in started:
+            latency = time.monotonic() - started[url]
+        if isinstance(res, polling.Backoff):  # not requested this cycle: nothing to record
+            out.append({"title": f"(feed error from {label})", "link": "", "published": "", "source": label, "error": str(res)})
+        elif isinstance(res, Exception):
+            health.record(url, label, latency, error=str(res) or type(res).__name__)
+            out.append({"title": f"(feed error from {label})", "link": "", "published": "", "source": label, "error": str(res)})
+        else:
+            health.record(url, label, latency)
+            out.extend(res)
     return out
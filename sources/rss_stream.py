@@ -0,0 +1,97 @@
+# sources/rss_stream.py
+from __future__ import annotations
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+# Bytes handed to the pull parser at a time; parsing stops as soon as `limit` items are built
+_CHUNK = 16 * 1024
+_ROOTS = {"rss", "feed", "RDF"}
+_ITEMS = {"item", "entry"}
+_PUBLISHED = {"pubDate", "published", "issued"}
+
+
+class UnsupportedFeed(Exception):
+    """The streaming parser can't reproduce feedparser's output for this document."""
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if "}" in tag else tag
+
+
+def _text(el: ET.Element) -> str:
+    if len(el):
+        raise UnsupportedFeed(f"markup inside <{_local(el.tag)}>")
+    return (el.text or "").strip()
+
+
+def parse_items(body: bytes, limit: int) -> List[Dict[str, str]]:
+    """
+    Incrementally parse RSS 2.0 / RSS 1.0 (RDF) / Atom bytes into NewsItem fields
+    (title, link, published).
+
+    Only the first `limit` items are built and the rest of the document is never fed to
+    the parser. Anything the simple field mapping can't match feedparser on (malformed
+    XML, HTML entities, markup in titles, unknown root) raises UnsupportedFeed so the
+    caller can fall back.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: List[str] = []
+    items: List[Dict[str, str]] = []
+    cur: Optional[Dict[str, str]] = None
+    try:
+        for off in range(0, len(body), _CHUNK):
+            parser.feed(body[off:off + _CHUNK])
+            for event, el in parser.read_events():
+                tag = _local(el.tag)
+                if event == "start":
+                    if not stack and tag not in _ROOTS:
+                        raise UnsupportedFeed(f"root <{tag}>")
+                    stack.append(tag)
+                    if tag in _ITEMS and cur is None:
+                        cur = {}
+                    continue
+
+                stack.pop()
+                if cur is None:
+                    continue
+                if tag in _ITEMS and (not stack or stack[-1] not in _ITEMS):
+                    items.append(_finish(cur))
+                    cur = None
+                    el.clear()
+                    if len(items) >= limit:
+                        return items
+                elif stack and stack[-1] in _ITEMS:
+                    _field(cur, tag, el)
+        parser.close()
+    except ET.ParseError as e:
+        raise UnsupportedFeed(str(e)) from e
+    return items
+
+
+def _field(cur: Dict[str, str], tag: str, el: ET.Element):
+    if tag == "title" and "title" not in cur:
+        if el.get("type") == "xhtml":
+            raise UnsupportedFeed("xhtml title")
+        title = _text(el)
+        if "<" in title:
+            raise UnsupportedFeed("markup in title")
+        cur["title"] = title
+    elif tag == "link" and "link" not in cur:
+        href = el.get("href")
+        if href is None:
+            cur["link"] = _text(el)
+        elif el.get("rel", "alternate") == "alternate":
+            cur["link"] = href
+    elif tag in _PUBLISHED and "published" not in cur:
+        cur["published"] = _text(el)
+    elif tag == "guid" and "guid" not in cur and el.get("isPermaLink", "true") != "false":
+        # feedparser promotes a permalink guid to `link` when the item has no <link>
+        cur["guid"] = _text(el)
+
+
+def _finish(cur: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "title": cur.get("title", ""),
+        "link": cur.get("link") or cur.get("guid", ""),
+        "published": cur.get("published", ""),
+    }
@@ -1,28 +1,43 @@
+import json
 import requests
-from datetime import datetime, timezone
+
+from config import POLL_MAX_SECONDS
+from utils import http, polling
+from utils.clock import now_utc
+from utils.http_cache import cached_get
+
 WIKI_TODAY = "https://en.wikipedia.org/api/rest_v1/feed/onthisday/events/{month}/{day}"
 WIKI_RANDOM = "https://en.wikipedia.org/api/rest_v1/page/random/summary"
 
+def _parse_events(body: bytes, headers: dict):
+    return [
+        {
+            "year": e.get("year"),
+            "text": e.get("text"),
+            "pages": [p.get("titles", {}).get("normalized") for p in e.get("pages", [])]
+        } for e in json.loads(body).get("events", [])[:10]
+    ]
+
 def fetch_today_and_random(month: int, day: int):
-    out = {"today": [], "random": {}, "fetched_at": datetime.now(timezone.utc).isoformat()}
-    # On this day
-    r = requests.get(WIKI_TODAY.format(month=month, day=day), timeout=20)
-    if r.ok:
-        out["today"] = [
-            {
-                "year": e.get("year"),
-                "text": e.get("text"),
-                "pages": [p.get("titles", {}).get("normalized") for p in e.get("pages", [])]
-            } for e in r.json().get("events", [])[:10]
-        ]
-    # Random
-    rr = requests.get(WIKI_RANDOM, timeout=20)
-    if rr.ok:
-        j = rr.json()
-        out["random"] = {
-            "title": j.get("title"),
-            "description": j.get("description"),
-            "extract": j.get("extract"),
-            "content_urls": j.get("content_urls", {}).get("desktop", {}).get("page")
-        }
+    out = {"today": [], "random": {}, "fetched_at": now_utc().isoformat()}
+    # On this day (stable per date, so it revalidates cheaply)
+    try:
+        out["today"] = cached_get(WIKI_TODAY.format(month=month, day=day), _parse_events, tag="wiki-today-v1")
+    except (requests.HTTPError, polling.Backoff):  # Backoff: the daemon's retry is not due yet
+        pass
+    # Random (never cached: every request is a different article; the daemon keeps one for
+    # POLL_MAX_SECONDS so a new pick does not count as a change every cycle)
+    out["random"] = polling.get_schedule().remembered(WIKI_RANDOM, _fetch_random, POLL_MAX_SECONDS)
     return out
+
+def _fetch_random():
+    rr = http.get(WIKI_RANDOM)
+    if not rr.ok:
+        return {}
+    j = rr.json()
+    return {
+        "title": j.get("title"),
+        "description": j.get("description"),
+        "extract": j.get("extract"),
+        "content_urls": j.get("content_urls", {}).get("desktop", {}).get("page")
+    }
@@ -0,0 +1,93 @@
+# utils/cassette.py
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth keeping: content sniffing, validators and freshness
+_KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires")
+
+
+class Cassette:
+    """
+    Record/replay store for every HTTP GET the transport makes.
+
+    Layout: DIR/cassette.json holds run metadata (run date, recording time) and, per URL,
+    the status, a few headers, the recorded latency and the sha1 of the body; bodies are
+    stored once each as DIR/bodies/<sha1>.gz. Connection errors are recorded too, so a
+    replay reproduces the same error placeholders.
+    """
+
+    def __init__(self, path: Path, mode: str, latency: float = 0.0):
+        self.path = Path(path)
+        self.mode = mode  # "record" | "replay"
+        self.latency = latency  # replay: sleep recorded_elapsed * latency
+        self._lock = threading.Lock()
+        self.meta: Dict[str, Any] = {}
+        self.requests: Dict[str, Dict[str, Any]] = {}
+        if mode == "replay":
+            doc = json.loads((self.path / "cassette.json").read_text(encoding="utf-8"))
+            self.meta = doc.get("meta") or {}
+            self.requests = doc.get("requests") or {}
+
+    # ----- record
+    def record(self, url: str, r: requests.Response | None, elapsed: float, error: Exception | None = None):
+        entry: Dict[str, Any] = {"elapsed": round(elapsed, 4)}
+        if r is None:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        else:
+            digest = hashlib.sha1(r.content).hexdigest()
+            body_path = self.path / "bodies" / f"{digest}.gz"
+            if not body_path.exists():
+                body_path.parent.mkdir(parents=True, exist_ok=True)
+                body_path.write_bytes(gzip.compress(r.content, mtime=0))
+            entry.update({
+                "status": r.status_code,
+                "headers": {h: r.headers[h] for h in _KEEP_HEADERS if h in r.headers},
+                "body": digest,
+                "bytes": len(r.content),
+            })
+        with self._lock:
+            self.requests[url] = entry
+
+    def save(self, **meta):
+        self.meta.update(meta)
+        self.path.mkdir(parents=True, exist_ok=True)
+        doc = {"meta": self.meta, "requests": dict(sorted(self.requests.items()))}
+        (self.path / "cassette.json").write_text(json.dumps(doc, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    # ----- replay
+    def replay(self, url: str) -> requests.Response:
+        entry = self.requests.get(url)
+        if entry is None:
+            raise requests.ConnectionError(f"not in cassette: {url}")
+        if self.latency:
+            time.sleep(entry.get("elapsed", 0) * self.latency)
+        if "error" in entry:
+            raise requests.ConnectionError(entry["error"])
+        r = requests.Response()
+        r.status_code = entry["status"]
+        r.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        r.url = url
+        r._content = gzip.decompress((self.path / "bodies" / f"{entry['body']}.gz").read_bytes())
+        return r
+
+
+_ACTIVE: Optional[Cassette] = None
+
+
+def active() -> Optional[Cassette]:
+    return _ACTIVE
+
+
+def start(path: Path, mode: str, latency: float = 0.0) -> Cassette:
+    global _ACTIVE
+    _ACTIVE = Cassette(path, mode, latency)
+    return _ACTIVE
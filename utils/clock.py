@@ -0,0 +1,18 @@
+# utils/clock.py
+from __future__ import annotations
+import datetime as dt
+from typing import Optional
+
+# When set (cassette replay), every timestamp the pipeline writes comes from here
+_FROZEN: Optional[dt.datetime] = None
+
+
+def freeze(at: dt.datetime | None):
+    """Pin now_utc() to `at` (None unfreezes)."""
+    global _FROZEN
+    _FROZEN = at.astimezone(dt.timezone.utc) if at is not None else None
+
+
+def now_utc() -> dt.datetime:
+    """Timezone-aware current UTC time (or the frozen replay time)."""
+    return _FROZEN or dt.datetime.now(dt.timezone.utc)
@@ -0,0 +1,127 @@
+# utils/cluster.py
+from __future__ import annotations
+import random
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from utils.summarize import STOPWORDS, tokenize
+
+# MinHash: NUM_PERM permutations split into BANDS bands of ROWS rows. Two titles become
+# candidates when any band matches (likely from Jaccard ≈ 0.25 up), then are merged only if
+# their token-set Jaccard reaches SIMILARITY.
+NUM_PERM = 32
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SIMILARITY = 0.45
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20251014)  # fixed seed: signatures must be stable across runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+def outlet(source: str) -> str:
+    """'BBC — World' -> 'BBC' (coverage counts outlets, not sections)."""
+    return (source or "").split(" — ")[0].strip()
+
+
+def title_tokens(title: str) -> frozenset:
+    # Google News appends " - Publisher"; drop it so the same story matches across outlets
+    head = (title or "").rsplit(" - ", 1)[0] if " - " in (title or "") else (title or "")
+    return frozenset(w for w in (t.lower() for t in tokenize(head)) if w not in STOPWORDS and len(w) > 1)
+
+
+def minhash(tokens: Iterable[str]) -> List[int]:
+    base = [zlib.crc32(t.encode("utf-8")) for t in tokens]
+    if not base:
+        return [_PRIME] * NUM_PERM
+    return [min((a * x + b) % _PRIME for x in base) for a, b in _PERMS]
+
+
+class StoryIndex:
+    """
+    Incremental near-duplicate index: add() headlines in order, read clusters().
+
+    Each add hashes the title once and looks up BANDS buckets, so building the index is
+    O(n) in the number of headlines for typical news lists.
+    """
+
+    def __init__(self, similarity: float = SIMILARITY):
+        self.similarity = similarity
+        self._items: List[Dict[str, Any]] = []
+        self._tokens: List[frozenset] = []
+        self._parent: List[int] = []
+        self._buckets: Dict[tuple, List[int]] = defaultdict(list)
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def _union(self, i: int, j: int):
+        ri, rj = self._find(i), self._find(j)
+        if ri != rj:
+            # keep the earliest item as root so it stays the representative
+            self._parent[max(ri, rj)] = min(ri, rj)
+
+    def add(self, item: Dict[str, Any]):
+        i = len(self._items)
+        toks = title_tokens((item or {}).get("title") or "")
+        self._items.append(item)
+        self._tokens.append(toks)
+        self._parent.append(i)
+        if not toks:
+            return
+        sig = minhash(toks)
+        candidates = set()
+        for band in range(BANDS):
+            key = (band, tuple(sig[band * ROWS:(band + 1) * ROWS]))
+            candidates.update(self._buckets[key])
+            self._buckets[key].append(i)
+        for j in candidates:
+            other = self._tokens[j]
+            if len(toks & other) / len(toks | other) >= self.similarity:
+                self._union(i, j)
+
+    def clusters(self) -> List[Dict[str, Any]]:
+        """Clusters ranked by distinct outlets, then size, then first appearance."""
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(self._items)):
+            groups[self._find(i)].append(i)
+        out = []
+        for root in sorted(groups):
+            members = [self._items[i] for i in groups[root]]
+            rep = members[0]
+            outlets = []
+            for it in members:
+                o = outlet((it or {}).get("source") or "")
+                if o and o not in outlets:
+                    outlets.append(o)
+            out.append({
+                "title": rep.get("title"),
+                "link": rep.get("link"),
+                "source": rep.get("source"),
+                "sources": outlets,
+                "size": len(members),
+                "items": members,
+                "_order": root,
+            })
+        out.sort(key=lambda c: (-len(c["sources"]), -c["size"], c["_order"]))
+        for c in out:
+            del c["_order"]
+        return out
+
+
+def cluster_stories(items: List[Dict[str, Any]], similarity: float = SIMILARITY) -> List[Dict[str, Any]]:
+    """Group near-duplicate headlines (error placeholders excluded) into ranked clusters."""
+    index = StoryIndex(similarity)
+    for it in items or []:
+        if (it or {}).get("title") and not (it or {}).get("error"):
+            index.add(it)
+    return index.clusters()
+
+
+def also_covered(c: Dict[str, Any]) -> str:
+    """' · also BBC, NPR' for a cluster reported by more than one outlet ('' otherwise)."""
+    others = [o for o in c.get("sources", []) if o != outlet(c.get("source") or "")]
+    return f" · also {', '.join(others)}" if others else ""
@@ -0,0 +1,358 @@
+# utils/daystore.py
+from __future__ import annotations
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from config import DAY_LOCK_NAME
+from utils import packs  # hn_series (numpy) is imported where HN values are read or recorded
+from utils.files import locked, write_json, write_text
+
+# Per-day append-only log: one JSON line per run holding only the items that run added.
+# Every write happens under the day's lock file, so concurrent runs serialize and each one
+# dedupes against everything stored before it (nothing is lost, nothing stored twice).
+LOG_NAME = "log.jsonl"
+INDEX_NAME = "log.idx.json"
+LEGACY_NAME = "raw.json"  # pre-log days: the whole combined payload, rewritten every run
+
+# Dedupe keys and caps per list (same rules merge_day_payload applies)
+KEYS = {"hn": ["objectID"], "world": ["title", "link"], "local": ["title", "link"]}
+CAPS = {"hn": 200, "world": 300, "local": 200}
+
+
+def _key(item: Dict[str, Any], fields: List[str]) -> str:
+    raw = json.dumps([(item or {}).get(f) for f in fields], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _lists(payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    news = payload.get("news") or {}
+    return {
+        "hn": (payload.get("hn") or {}).get("items") or [],
+        "world": news.get("world") or [],
+        "local": news.get("local") or [],
+    }
+
+
+# Parsed logs kept warm in-process (the daemon reads the same day every cycle): log path ->
+# (inode, mtime_ns, first line, bytes parsed, records). Appends only parse the new lines; a
+# replaced log (rebuild) is re-read in full.
+_RECORDS: Dict[Path, tuple] = {}
+_RECORDS_KEEP = 4
+# Dedupe indexes likewise: index path -> (mtime_ns, index), re-read when the file changes
+_INDEXES: Dict[Path, tuple] = {}
+
+
+def _copy_record(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy deep enough that folding and annotating the result leaves the cached record alone."""
+    return {k: [dict(it) for it in v] if k in KEYS and isinstance(v, list) else dict(v) if isinstance(v, dict) else v
+            for k, v in rec.items()}
+
+
+def _read_records(day_dir: Path) -> List[Dict[str, Any]]:
+    p = day_dir / LOG_NAME
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        _RECORDS.pop(p, None)
+        return []
+    inode, mtime, head, offset, records = _RECORDS.pop(p, None) or (None, None, b"", 0, [])
+    if (inode, mtime, offset) != (st.st_ino, st.st_mtime_ns, st.st_size):
+        with p.open("rb") as f:
+            first = f.readline()
+            if inode != st.st_ino or first != head or st.st_size < offset:
+                offset, records, head = 0, [], first  # not the log we parsed (inode numbers get reused)
+            f.seek(offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1  # a half-written last line is not a record
+        records = records + [json.loads(ln) for ln in chunk[:end].split(b"\n") if ln.strip()]
+        offset += end
+    _RECORDS[p] = (st.st_ino, st.st_mtime_ns, head, offset, records)
+    while len(_RECORDS) > _RECORDS_KEEP:
+        _RECORDS.pop(next(iter(_RECORDS)))
+    return [_copy_record(rec) for rec in records]
+
+
+# -----------------------------------------------------------
+# Dedupe index
+# -----------------------------------------------------------
+def _empty_index() -> Dict[str, Any]:
+    return {"keys": {kind: [] for kind in KEYS}, "wiki": None, "apod": None}
+
+
+def _index_records(idx: Dict[str, Any], records: List[Dict[str, Any]]):
+    for rec in records:
+        for kind, fields in KEYS.items():
+            idx["keys"][kind] += [_key(it, fields) for it in rec.get(kind) or []]
+        for field in ("wiki", "apod"):
+            if rec.get(field):
+                idx[field] = _digest(rec[field])
+
+
+def load_index(day_dir: Path) -> Dict[str, Any]:
+    """
+    The day's persistent dedupe index. It records the log size it covers; when that does not
+    match (missing index, or a writer died between appending and saving it) it is rebuilt.
+    """
+    p = day_dir / INDEX_NAME
+    log = day_dir / LOG_NAME
+    size = log.stat().st_size if log.exists() else 0
+    try:
+        mtime = p.stat().st_mtime_ns
+        cached = _INDEXES.get(p)
+        if cached and cached[0] == mtime:
+            idx = cached[1]
+        else:
+            idx = json.loads(p.read_text(encoding="utf-8"))
+            _INDEXES[p] = (mtime, idx)
+        if idx.get("size") == size:
+            return _copy_index(idx)  # new_record() extends the key lists in place
+    except (OSError, ValueError):
+        pass
+    idx = _empty_index()
+    _index_records(idx, _read_records(day_dir))
+    idx["size"] = size
+    return idx
+
+
+def _copy_index(idx: Dict[str, Any]) -> Dict[str, Any]:
+    return {**idx, "keys": {kind: list(keys) for kind, keys in idx["keys"].items()}}
+
+
+def _save_index(day_dir: Path, idx: Dict[str, Any]):
+    log = day_dir / LOG_NAME
+    idx["size"] = log.stat().st_size if log.exists() else 0
+    p = day_dir / INDEX_NAME
+    write_text(p, json.dumps(idx))
+    _INDEXES[p] = (p.stat().st_mtime_ns, _copy_index(idx))
+
+
+def _repair_tail(log: Path):
+    """Cut a half-written last line (a writer killed mid-append) so the next record starts clean."""
+    if not log.exists() or not log.stat().st_size:
+        return
+    with log.open("r+b") as f:
+        f.seek(-1, 2)
+        if f.read(1) == b"\n":
+            return
+        f.seek(0)
+        data = f.read()
+        f.truncate(data.rfind(b"\n") + 1)
+
+
+# -----------------------------------------------------------
+# Writes
+# -----------------------------------------------------------
+def new_record(idx: Dict[str, Any], snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the log record for `snapshot`: only unseen items (under the caps); updates idx in place."""
+    rec: Dict[str, Any] = {"date": snapshot.get("date"), "collected_at_utc": snapshot.get("collected_at_utc")}
+    if snapshot.get("runs"):
+        rec["runs"] = snapshot["runs"]  # legacy payload folded in as one record
+    for kind, items in _lists(snapshot).items():
+        keys = idx["keys"][kind]
+        seen = set(keys)
+        fresh = []
+        for it in items:
+            if len(keys) >= CAPS[kind]:
+                break
+            k = _key(it, KEYS[kind])
+            if k in seen:
+                continue
+            seen.add(k)
+            keys.append(k)
+            fresh.append(it)
+        rec[kind] = fresh
+    # Wiki / APOD: stored only when they differ from the last stored value
+    for field in ("wiki", "apod"):
+        value = snapshot.get(field) or {}
+        if value and _digest(value) != idx.get(field):
+            rec[field] = value
+            idx[field] = _digest(value)
+    return rec
+
+
+def _legacy_record(payload: Dict[str, Any], idx: Dict[str, Any]) -> Dict[str, Any]:
+    return new_record(idx, {**payload, "collected_at_utc": payload.get("last_updated_utc")})
+
+
+def _migrate_legacy(day_dir: Path):
+    """Seed the log from a pre-log raw.json so the day keeps its items and run count."""
+    legacy = day_dir / LEGACY_NAME
+    if (day_dir / LOG_NAME).exists() or not legacy.exists():
+        return
+    try:
+        payload = json.loads(legacy.read_text(encoding="utf-8"))
+    except Exception:
+        return
+    idx = _empty_index()
+    rec = _legacy_record(payload, idx)
+    write_text(day_dir / LOG_NAME, json.dumps(rec, ensure_ascii=False) + "\n")
+    _save_index(day_dir, idx)
+
+
+def append_run(day_dir: Path, snapshot: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Append one run's new items to the day log; returns (materialized day payload, appended record)."""
+    day_dir.mkdir(parents=True, exist_ok=True)
+    with locked(day_dir / DAY_LOCK_NAME):
+        _migrate_legacy(day_dir)
+        log = day_dir / LOG_NAME
+        _repair_tail(log)
+        idx = load_index(day_dir)  # re-read under the lock: includes whatever other writers appended
+        rec = new_record(idx, snapshot)
+        with log.open("ab") as f:
+            f.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+        _save_index(day_dir, idx)
+        return load_day(day_dir), rec
+
+
+def store_run(day_dir: Path, snapshot: Dict[str, Any], run_id: str) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
+    """
+    Store one run: claim a unique run id (`run_id`, else run_id-2, -3, ... when another writer
+    took it), write runs/<id>/raw.json atomically, record its HN values and append its new items
+    to the log, all under the day lock. Returns (materialized day payload, appended record, run id).
+    """
+    day_dir.mkdir(parents=True, exist_ok=True)
+    with locked(day_dir / DAY_LOCK_NAME):
+        taken = set(packs.list_runs(day_dir)) | {p.name for p in (day_dir / "runs").glob("*")}
+        rid, n = run_id, 1
+        while rid in taken:
+            n += 1
+            rid = f"{run_id}-{n}"
+        write_json(day_dir / "runs" / rid / "raw.json", snapshot, indent=None)
+        from utils import hn_series
+        hn_series.record(day_dir, snapshot)
+        combined, rec = append_run(day_dir, snapshot)
+    return combined, rec, rid
+
+
+def rebuild(day_dir: Path, snapshots: List[Dict[str, Any]]) -> bool | None:
+    """
+    Rewrite the day log and dedupe index from its run snapshots (oldest first), exactly as the
+    live runs would have appended them; a legacy raw.json still seeds the log. Returns whether
+    the log changed, or None when the snapshots no longer cover every run in the existing log
+    (pruned runs): the log stays the source of truth then.
+    """
+    idx = _empty_index()
+    records, since = [], ""
+    legacy = day_dir / LEGACY_NAME
+    if legacy.exists():
+        try:
+            payload = json.loads(legacy.read_text(encoding="utf-8"))
+        except Exception:
+            payload = None
+        if payload:
+            records.append(_legacy_record(payload, idx))
+            since = payload.get("last_updated_utc") or ""
+    records += [new_record(idx, s) for s in snapshots if (s.get("collected_at_utc") or "") > since]
+
+    if not records:
+        return False
+    with locked(day_dir / DAY_LOCK_NAME):
+        existing = _read_records(day_dir)
+        if set(materialize(existing)["runs"]) - set(materialize(records)["runs"]):
+            return None
+        blob = "".join(json.dumps(rec, ensure_ascii=False) + "\n" for rec in records)
+        if not write_text(day_dir / LOG_NAME, blob):
+            return False
+        _save_index(day_dir, idx)
+        return True
+
+
+# -----------------------------------------------------------
+# Reads
+# -----------------------------------------------------------
+def materialize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold log records into the combined payload shape merge_day_payload produces."""
+    out: Dict[str, Any] = {
+        "date": None,
+        "last_updated_utc": None,
+        "hn": {"items": []},
+        "wiki": {},
+        "apod": {},
+        "news": {"world": [], "local": []},
+        "runs": [],
+    }
+    lists = {"hn": out["hn"]["items"], "world": out["news"]["world"], "local": out["news"]["local"]}
+    for rec in records:
+        out["date"] = rec.get("date") or out["date"]
+        out["last_updated_utc"] = rec.get("collected_at_utc")
+        out["runs"] += rec.get("runs") or [rec.get("collected_at_utc")]
+        for kind, items in lists.items():
+            items += rec.get(kind) or []
+        for field in ("wiki", "apod"):
+            if rec.get(field):
+                out[field] = rec[field]
+    return out
+
+
+def fold_snapshots(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combined payload straight from run snapshots (same rules as append_run), for days without a log."""
+    if not snapshots:
+        return {}
+    idx = _empty_index()
+    return materialize([new_record(idx, s) for s in snapshots])
+
+
+def load_day(day_dir: Path) -> Dict[str, Any]:
+    """Combined payload for a day: from the log (HN values brought up to date), else a legacy raw.json, else {}."""
+    if (day_dir / LOG_NAME).exists():
+        from utils import hn_series
+        return hn_series.annotate(day_dir, materialize(_read_records(day_dir)))
+    legacy = day_dir / LEGACY_NAME
+    if legacy.exists():
+        try:
+            return json.loads(legacy.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+    return {}
+
+
+def tail(day_dir: Path, cursor: Dict[str, Any] | None) -> Tuple[List[Dict[str, Any]], Dict[str, Any] | None]:
+    """
+    Log records appended since `cursor` (None: from the start) and the cursor to pass next time,
+    for consumers that index the archive incrementally. An unchanged day costs one stat.
+
+    A pre-log day yields its raw.json once, as the record its log would start with; when the
+    log appears later that first record is skipped. A half-written last line is left for later.
+    """
+    log = day_dir / LOG_NAME
+    if not log.exists():
+        legacy = day_dir / LEGACY_NAME
+        if cursor is None and legacy.exists():
+            try:
+                payload = json.loads(legacy.read_text(encoding="utf-8"))
+            except Exception:
+                return [], cursor
+            return [_legacy_record(payload, _empty_index())], {"offset": 0, "legacy": True}
+        return [], cursor
+    cursor = cursor or {"offset": 0}
+    if log.stat().st_size == cursor["offset"] and not cursor.get("legacy"):
+        return [], cursor
+    with log.open("rb") as f:
+        f.seek(cursor["offset"])
+        chunk = f.read()
+    end = chunk.rfind(b"\n") + 1
+    lines = [ln for ln in chunk[:end].splitlines() if ln.strip()]
+    if cursor.get("legacy") and lines:
+        lines = lines[1:]  # the migrated raw.json record was yielded already
+    return [json.loads(ln) for ln in lines], {"offset": cursor["offset"] + end}
+
+
+def last_updated(day_dir: Path) -> str | None:
+    """collected_at_utc of the day's latest run without folding the whole log."""
+    p = day_dir / LOG_NAME
+    if p.exists():
+        with p.open("rb") as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - 256 * 1024))
+            lines = [ln for ln in f.read().splitlines() if ln.strip()]
+        try:
+            return json.loads(lines[-1]).get("collected_at_utc") if lines else None
+        except ValueError:
+            return materialize(_read_records(day_dir)).get("last_updated_utc")
+    return load_day(day_dir).get("last_updated_utc")
@@ -1,16 +1,133 @@
+from __future__ import annotations
+import hashlib
 import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
 
-def write_json(path: Path, obj: Dict[str, Any]):
+try:
+    import fcntl
+except ImportError:  # Windows: no flock; an O_EXCL lock file stands in
+    fcntl = None
+
+from config import LOCK_TIMEOUT
+
+# Output layer: every committed file goes through write_bytes, which compares content hashes
+# first and only then writes (temp file + rename), so an unchanged run leaves the tree alone.
+# `volatile` patterns (bytes regexes) are masked out before comparing: a file differing from
+# the new content only in, say, an "Updated …" stamp is left as it is.
+
+# Timestamps that change every run without the content changing
+VOLATILE_STAMPS = (
+    rb'"(?:collected_at_utc|last_updated_utc)":\s*"[^"]*"',
+    rb"Updated [^<\n]*UTC",
+)
+
+_STATS = {"written": 0, "unchanged": 0, "bytes": 0}
+
+
+def _digest(data: bytes, volatile: Iterable[bytes]) -> str:
+    for pattern in volatile:
+        data = re.sub(pattern, b"", data)
+    return hashlib.sha1(data).hexdigest()
+
+
+def write_bytes(path: Path, data: bytes, volatile: Iterable[bytes] = ()) -> bool:
+    """Atomically write `data` unless `path` already holds it (volatile parts ignored); returns whether it wrote."""
+    path = Path(path)
+    volatile = tuple(volatile)
+    try:
+        old = path.read_bytes()
+    except FileNotFoundError:
+        old = None
+    if old is not None and (old == data or _digest(old, volatile) == _digest(data, volatile)):
+        _STATS["unchanged"] += 1
+        return False
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    _STATS["written"] += 1
+    _STATS["bytes"] += len(data)
+    return True
+
+
+def write_json(path: Path, obj: Dict[str, Any], indent: int | None = 2, volatile: Iterable[bytes] = ()) -> bool:
+    text = json.dumps(obj, ensure_ascii=False, indent=indent, separators=None if indent else (",", ":"))
+    return write_bytes(path, text.encode("utf-8"), volatile)
 
-def write_text(path: Path, text: str):
+
+def write_text(path: Path, text: str, volatile: Iterable[bytes] = ()) -> bool:
+    return write_bytes(path, text.encode("utf-8"), volatile)
+
+
+def write_stats(reset: bool = False) -> Dict[str, int]:
+    """Files written / left unchanged and bytes written so far in this process."""
+    out = dict(_STATS)
+    if reset:
+        _STATS.update(written=0, unchanged=0, bytes=0)
+    return out
+
+
+def add_write_stats(stats: Dict[str, int]):
+    """Fold counts from another process (a pool worker's write_stats) into this one's."""
+    for k in _STATS:
+        _STATS[k] += stats.get(k, 0)
+
+
+_HELD: Dict[tuple, list] = {}  # (lock path, thread) -> [fd, depth]: re-entrant per thread
+
+
+@contextmanager
+def locked(path: Path, timeout: float = LOCK_TIMEOUT):
+    """
+    Exclusive inter-process lock on the lock file `path` for the with-block (re-entrant in
+    one process). Raises TimeoutError when another holder keeps it longer than `timeout`.
+    """
+    path = Path(path).resolve()
+    key = (path, threading.get_ident())
+    if key in _HELD:
+        _HELD[key][1] += 1
+        try:
+            yield
+        finally:
+            _HELD[key][1] -= 1
+        return
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        f.write(text)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if fcntl is not None:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    os.close(fd)
+                    raise BlockingIOError
+            else:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            break
+        except (BlockingIOError, FileExistsError):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"could not lock {path} within {timeout:g}s")
+            time.sleep(0.05)
+    _HELD[key] = [fd, 1]
+    try:
+        yield
+    finally:
+        del _HELD[key]
+        if fcntl is None:
+            os.close(fd)
+            path.unlink(missing_ok=True)
+        else:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
 
 def replace_between_markers(text: str, marker_start: str, marker_end: str, new_content: str) -> str:
     start = text.find(marker_start)
@@ -0,0 +1,239 @@
+# utils/history.py
+"""
+Columnar history of every archived item, for analytics across days.
+
+    python -m utils.history                 # rows per kind/source and HN point percentiles
+    python -m utils.history --days 30       # ... over the last 30 days only
+
+One row per (day, item) from the day logs, kept in data/.cache/history as flat arrays that are
+opened memory-mapped:
+
+    date.i32      days since 1970-01-01          kind.u8     0 world, 1 local, 2 hn
+    source.i32    index into sources.json        points.i32 / comments.i32   HN only (-1 otherwise)
+    title.off / title.dat, link.off / link.dat   string tables: uint64 offsets + UTF-8 bytes
+
+HN points/comments are the values when the story was first seen that day (the day log's copy;
+rows are never rewritten). Later values are in each day's hn_series.npz.
+
+meta.json holds the row count and a daystore.tail cursor per day, so opening the history
+appends only what the logs gained since last time. Anything past the recorded row count (an
+interrupted update) is truncated before appending.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import DATA_DIR, CACHE_DIR
+from utils import daystore
+from utils.files import locked, write_json
+
+HISTORY_VERSION = 1
+KINDS = ["world", "local", "hn"]
+_COLUMNS = {"date": np.int32, "kind": np.uint8, "source": np.int32, "points": np.int32, "comments": np.int32}
+_STRINGS = ["title", "link"]
+_EPOCH = dt.date(1970, 1, 1)
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def history_dir(data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / CACHE_DIR.name / "history"
+
+
+def _day_number(date: str) -> int:
+    return (dt.date.fromisoformat(date) - _EPOCH).days
+
+
+class History:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        try:
+            self.meta = json.loads((self.root / "meta.json").read_text(encoding="utf-8"))
+            self.sources: List[str] = json.loads((self.root / "sources.json").read_text(encoding="utf-8"))
+        except Exception:
+            self.meta, self.sources = None, []
+        if not self.meta or self.meta.get("version") != HISTORY_VERSION:
+            self.meta = {"version": HISTORY_VERSION, "rows": 0, "days": {}}
+            self.sources = []
+            for p in self.root.glob("*.*"):
+                p.unlink()
+        self._source_ids = {s: i for i, s in enumerate(self.sources)}
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    # ----- incremental build
+    def _rows(self, date: str, rec: Dict[str, Any]) -> Iterable[tuple]:
+        day = _day_number(date)
+        for k, kind in enumerate(KINDS):
+            for it in rec.get(kind) or []:
+                if not it.get("title") or it.get("error"):
+                    continue
+                if kind == "hn":
+                    link = it.get("url") or f"https://news.ycombinator.com/item?id={it.get('objectID')}"
+                    yield day, k, "Hacker News", int(it.get("points") or 0), int(it.get("num_comments") or 0), \
+                        it["title"], link
+                else:
+                    yield day, k, it.get("source") or "", -1, -1, it["title"], it.get("link") or ""
+
+    def _source_id(self, label: str) -> int:
+        if label not in self._source_ids:
+            self._source_ids[label] = len(self.sources)
+            self.sources.append(label)
+        return self._source_ids[label]
+
+    def _truncate(self):
+        """Drop bytes past the recorded row count (left by an interrupted update)."""
+        n = self.meta["rows"]
+        for name, dtype in _COLUMNS.items():
+            self._trim(self.root / f"{name}.bin", n * np.dtype(dtype).itemsize)
+        for name in _STRINGS:
+            off = self.root / f"{name}.off"
+            self._trim(off, (n + 1) * 8 if n else 0)
+            end = int(np.fromfile(off, dtype=np.uint64, count=1, offset=n * 8)[0]) if n else 0
+            self._trim(self.root / f"{name}.dat", end)
+
+    @staticmethod
+    def _trim(p: Path, size: int):
+        if p.exists() and p.stat().st_size > size:
+            with p.open("r+b") as f:
+                f.truncate(size)
+
+    def _append(self, rows: List[tuple]):
+        self._maps.clear()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._truncate()
+        cols = list(zip(*rows))
+        for i, (name, dtype) in enumerate(_COLUMNS.items()):
+            values = cols[i] if name != "source" else [self._source_id(s) for s in cols[i]]
+            with (self.root / f"{name}.bin").open("ab") as f:
+                f.write(np.asarray(values, dtype=dtype).tobytes())
+        for j, name in enumerate(_STRINGS):
+            encoded = [s.encode("utf-8") for s in cols[len(_COLUMNS) + j]]
+            off_path, dat_path = self.root / f"{name}.off", self.root / f"{name}.dat"
+            base = dat_path.stat().st_size if dat_path.exists() else 0
+            ends = base + np.cumsum([len(b) for b in encoded], dtype=np.uint64)
+            with off_path.open("ab") as f:
+                if not self.meta["rows"]:
+                    f.write(np.zeros(1, dtype=np.uint64).tobytes())
+                f.write(ends.astype(np.uint64).tobytes())
+            with dat_path.open("ab") as f:
+                f.write(b"".join(encoded))
+        self.meta["rows"] += len(rows)
+
+    def update(self, data_dir: Path = DATA_DIR) -> int:
+        """Append rows for whatever the day logs gained since the last update; returns rows added."""
+        data_dir = Path(data_dir)
+        rows: List[tuple] = []
+        cursors = dict(self.meta["days"])
+        for d in sorted(p for p in data_dir.iterdir() if p.is_dir() and _DATE_RE.match(p.name)) if data_dir.exists() else []:
+            records, cursor = daystore.tail(d, cursors.get(d.name))
+            for rec in records:
+                rows.extend(self._rows(d.name, rec))
+            if cursor is not None:
+                cursors[d.name] = cursor
+        if cursors == self.meta["days"]:
+            return 0
+        if rows:
+            self._append(rows)
+        self.meta["days"] = cursors
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_json(self.root / "sources.json", self.sources, indent=None)
+        write_json(self.root / "meta.json", self.meta, indent=None)
+        return len(rows)
+
+    # ----- reads
+    def column(self, name: str) -> np.ndarray:
+        """A numeric column as a read-only memmap (empty array while the history is empty)."""
+        if name not in self._maps:
+            dtype = _COLUMNS[name]
+            n = self.meta["rows"]
+            self._maps[name] = np.memmap(self.root / f"{name}.bin", dtype=dtype, mode="r", shape=(n,)) if n \
+                else np.zeros(0, dtype=dtype)
+        return self._maps[name]
+
+    def strings(self, name: str, rows: np.ndarray) -> List[str]:
+        """Decode one string column for the given row indices only."""
+        n = self.meta["rows"]
+        if not n or not len(rows):
+            return []
+        off = np.memmap(self.root / f"{name}.off", dtype=np.uint64, mode="r", shape=(n + 1,))
+        dat = np.memmap(self.root / f"{name}.dat", dtype=np.uint8, mode="r")
+        starts, ends = off[rows].astype(np.int64), off[rows + 1].astype(np.int64)
+        return [bytes(dat[a:b]).decode("utf-8") for a, b in zip(starts, ends)]
+
+    def select(self, start: dt.date | None = None, end: dt.date | None = None,
+               kinds: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Row indices for [start, end] (inclusive) and the given kinds."""
+        date = self.column("date")
+        mask = np.ones(len(date), dtype=bool)
+        if start is not None:
+            mask &= date >= (start - _EPOCH).days
+        if end is not None:
+            mask &= date <= (end - _EPOCH).days
+        if kinds is not None:
+            mask &= np.isin(self.column("kind"), [KINDS.index(k) for k in kinds])
+        return np.flatnonzero(mask)
+
+    def frame(self, start: dt.date | None = None, end: dt.date | None = None,
+              kinds: Optional[Iterable[str]] = None, text: bool = True):
+        """pandas DataFrame of the selected rows (title/link decoded only when text=True)."""
+        import pandas as pd
+
+        rows = self.select(start, end, kinds)
+        points = self.column("points")[rows]
+        comments = self.column("comments")[rows]
+        df = pd.DataFrame({
+            "date": self.column("date")[rows].astype("datetime64[D]"),
+            "kind": pd.Categorical.from_codes(self.column("kind")[rows], categories=KINDS),
+            "source": pd.Categorical.from_codes(self.column("source")[rows], categories=self.sources or [""]),
+            # -1 (news rows) becomes <NA>
+            "points": pd.arrays.IntegerArray(np.asarray(points, dtype=np.int32), points < 0),
+            "comments": pd.arrays.IntegerArray(np.asarray(comments, dtype=np.int32), comments < 0),
+        })
+        if text:
+            df["title"] = self.strings("title", rows)
+            df["link"] = self.strings("link", rows)
+        return df
+
+
+def load(data_dir: Path = DATA_DIR, update: bool = True) -> History:
+    """Open the history for an archive root, first appending any days/runs not seen yet."""
+    root = history_dir(data_dir)
+    if not update:
+        return History(root)
+    with locked(root.with_suffix(".lock")):  # one updater at a time; readers only see committed rows
+        h = History(root)
+        h.update(data_dir)
+    return h
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Summarize the archive from the columnar history.")
+    ap.add_argument("--data", type=Path, default=DATA_DIR)
+    ap.add_argument("--days", type=int, default=None, help="only the last N days")
+    args = ap.parse_args(argv)
+
+    h = load(args.data)
+    start = dt.date.today() - dt.timedelta(days=args.days) if args.days else None
+    df = h.frame(start=start, text=False)
+    print(f"{len(df)} rows over {df['date'].nunique()} days ({len(h)} in history)")
+    if df.empty:
+        return
+    print(df.groupby("kind", observed=True).size().to_string())
+    print("\nTop sources:")
+    print(df[df["kind"] != "hn"]["source"].value_counts().head(10).to_string())
+    hn = df.loc[df["kind"] == "hn", "points"].dropna().astype(int)
+    if len(hn):
+        q = np.percentile(hn.to_numpy(), [50, 90, 99])
+        print(f"\nHN points when first seen: median {q[0]:.0f}, p90 {q[1]:.0f}, p99 {q[2]:.0f}, max {hn.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# utils/hn_series.py
+"""
+Per-day time series of HN points and comments across runs.
+
+The day log keeps each HN item's first-seen copy only. Every run also records the values it
+saw here, in data/<day>/hn_series.npz:
+
+    ids        int64 (M,)     objectIDs, in first-seen order
+    created    int64 (M,)     item creation time (epoch seconds, 0 when unknown)
+    times      int64 (R,)     run times (epoch seconds)
+    points     int32 (R, M)   -1 where the item was not in that run's top list
+    comments   int32 (R, M)
+
+stats() turns this into latest values and velocities, all with array operations; annotate()
+writes them onto the combined payload's HN items.
+"""
+from __future__ import annotations
+import datetime as dt
+import io
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.files import write_bytes
+
+SERIES_NAME = "hn_series.npz"
+MIN_AGE_HOURS = 1.0  # single-observation velocity is points / age; don't let brand-new items explode
+
+
+def _epoch(stamp: str | None) -> int:
+    if not stamp:
+        return 0
+    try:
+        t = dt.datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return int(t.timestamp())
+
+
+def load(day_dir: Path) -> Optional[Dict[str, np.ndarray]]:
+    p = day_dir / SERIES_NAME
+    if not p.exists():
+        return None
+    with np.load(p) as z:
+        return {k: z[k] for k in z.files}
+
+
+def _save(day_dir: Path, series: Dict[str, np.ndarray]):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **series)
+    write_bytes(day_dir / SERIES_NAME, buf.getvalue())
+
+
+def add_run(s: Optional[Dict[str, np.ndarray]], snapshot: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Series `s` (None: empty) with one run's HN values added at its place in time (concurrent
+    writers may store runs out of order); a rerun at the same timestamp replaces its row.
+    None when the run has no HN items.
+    """
+    items = [it for it in (snapshot.get("hn") or {}).get("items") or [] if str(it.get("objectID") or "").isdigit()]
+    if not items:
+        return None
+    when = _epoch(snapshot.get("collected_at_utc"))
+    s = dict(s) if s else {
+        "ids": np.zeros(0, np.int64), "created": np.zeros(0, np.int64), "times": np.zeros(0, np.int64),
+        "points": np.zeros((0, 0), np.int32), "comments": np.zeros((0, 0), np.int32),
+    }
+    column = {int(i): j for j, i in enumerate(s["ids"])}
+    new_ids, new_created = [], []
+    for it in items:
+        oid = int(it["objectID"])
+        if oid not in column:
+            column[oid] = len(column)
+            new_ids.append(oid)
+            new_created.append(_epoch(it.get("created_at")))
+    if new_ids:
+        pad = np.full((len(s["times"]), len(new_ids)), -1, np.int32)
+        s["points"] = np.hstack([s["points"], pad])
+        s["comments"] = np.hstack([s["comments"], pad.copy()])
+        s["ids"] = np.concatenate([s["ids"], np.array(new_ids, np.int64)])
+        s["created"] = np.concatenate([s["created"], np.array(new_created, np.int64)])
+
+    cols = np.array([column[int(it["objectID"])] for it in items])
+    row_p = np.full(len(s["ids"]), -1, np.int32)
+    row_c = np.full(len(s["ids"]), -1, np.int32)
+    row_p[cols] = [int(it.get("points") or 0) for it in items]
+    row_c[cols] = [int(it.get("num_comments") or 0) for it in items]
+
+    at = int(np.searchsorted(s["times"], when))
+    if at < len(s["times"]) and s["times"][at] == when:
+        s["points"][at], s["comments"][at] = row_p, row_c
+    else:
+        s["times"] = np.insert(s["times"], at, when)
+        s["points"] = np.insert(s["points"], at, row_p, axis=0)
+        s["comments"] = np.insert(s["comments"], at, row_c, axis=0)
+    return s
+
+
+def record(day_dir: Path, snapshot: Dict[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """Add one run's HN values to the day's series on disk."""
+    s = load(day_dir)
+    updated = add_run(s, snapshot)
+    if updated is None:
+        return s
+    _save(day_dir, updated)
+    return updated
+
+
+def rebuild(day_dir: Path, snapshots: List[Dict[str, Any]]) -> Optional[Dict[str, np.ndarray]]:
+    """Recompute the day's series from its run snapshots (oldest first)."""
+    s = None
+    for snapshot in snapshots:
+        s = add_run(s, snapshot) or s
+    if s is None:
+        (day_dir / SERIES_NAME).unlink(missing_ok=True)
+    else:
+        _save(day_dir, s)
+    return s
+
+
+def stats(s: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Per item: latest points/comments, observations, and velocity in points (comments) per hour
+    between its last two observations, or since creation when it was seen once.
+    """
+    points, comments, times = s["points"], s["comments"], s["times"]
+    n_runs, n_items = points.shape
+    cols = np.arange(n_items)
+    valid = points >= 0
+    seen = valid.sum(axis=0)
+    last = n_runs - 1 - np.argmax(valid[::-1], axis=0)
+    earlier = valid.copy()
+    earlier[last, cols] = False
+    has_prev = earlier.any(axis=0)
+    prev = n_runs - 1 - np.argmax(earlier[::-1], axis=0)
+
+    latest_p, latest_c = points[last, cols], comments[last, cols]
+    span_h = (times[last] - times[prev]) / 3600.0
+    age_h = np.maximum((times[last] - s["created"]) / 3600.0, MIN_AGE_HOURS)
+    use_prev = has_prev & (span_h > 0)
+    safe_span = np.where(use_prev, span_h, 1.0)
+    velocity = np.where(use_prev, (latest_p - points[prev, cols]) / safe_span, latest_p / age_h)
+    comment_velocity = np.where(use_prev, (latest_c - comments[prev, cols]) / safe_span, latest_c / age_h)
+    unknown_age = (s["created"] == 0) & ~use_prev
+    velocity[unknown_age] = 0.0
+    comment_velocity[unknown_age] = 0.0
+    return {"ids": s["ids"], "points": latest_p, "comments": latest_c, "observations": seen,
+            "velocity": velocity, "comment_velocity": comment_velocity, "current": last == n_runs - 1}
+
+
+def annotate(day_dir: Path, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Latest points/num_comments, first-seen points and velocity onto the payload's HN items."""
+    s = load(day_dir)
+    items = (payload.get("hn") or {}).get("items") or []
+    if s is None or not items or not s["times"].size:
+        return payload
+    st = stats(s)
+    where = {int(i): j for j, i in enumerate(st["ids"])}
+    for it in items:
+        j = where.get(int(it["objectID"])) if str(it.get("objectID") or "").isdigit() else None
+        if j is None or not st["observations"][j]:
+            continue
+        it["first_points"] = it.get("points")
+        it["points"] = int(st["points"][j])
+        it["num_comments"] = int(st["comments"][j])
+        it["velocity"] = round(float(st["velocity"][j]), 1)
+        it["observations"] = int(st["observations"][j])
+        it["in_latest_run"] = bool(st["current"][j])
+    return payload
+
+
+def trajectories(s: Dict[str, np.ndarray], ids: List[int]) -> Dict[int, List[Optional[int]]]:
+    """Points per run for each of `ids` (None for runs that did not list it); unknown ids are left out."""
+    where = {int(i): j for j, i in enumerate(s["ids"])}
+    return {i: [int(p) if p >= 0 else None for p in s["points"][:, where[i]]] for i in ids if i in where}
+
+
+def rising(items: List[Dict[str, Any]], n: int = 5) -> List[Dict[str, Any]]:
+    """The n items still on the front page gaining points fastest (velocity > 0; ties keep list order)."""
+    scored = [it for it in items if (it.get("velocity") or 0) > 0 and it.get("in_latest_run", True)]
+    if not scored:
+        return []
+    order = np.argsort(-np.array([it["velocity"] for it in scored], dtype=float), kind="stable")[:n]
+    return [scored[i] for i in order]
@@ -0,0 +1,125 @@
+# utils/http.py
+from __future__ import annotations
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_TOTAL_TIMEOUT,
+    HTTP_RETRIES, HTTP_BACKOFF, HTTP_PER_HOST,
+)
+from utils import cassette, perf
+from utils.parallel import run_deadline
+
+USER_AGENT = "DailyKnowledgeGarden/1.0 (+github)"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+_BACKOFF_CAP = 8.0
+_CHUNK = 64 * 1024
+
+# One keep-alive session (and connection pool) per host, plus a cap on in-flight requests per host
+_SESSIONS: Dict[str, requests.Session] = {}
+_HOST_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_LOCK = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def session_for(url: str) -> requests.Session:
+    host = _host(url)
+    with _LOCK:
+        s = _SESSIONS.get(host)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_PER_HOST, max_retries=0)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _SESSIONS[host] = s
+            _HOST_SLOTS[host] = threading.BoundedSemaphore(HTTP_PER_HOST)
+        return s
+
+
+def _read_body(r: requests.Response, started: float):
+    """Stream the body so a slow-drip server can't exceed HTTP_TOTAL_TIMEOUT."""
+    chunks = []
+    for chunk in r.iter_content(_CHUNK):
+        chunks.append(chunk)
+        if time.monotonic() - started > HTTP_TOTAL_TIMEOUT:
+            r.close()
+            raise requests.Timeout(f"body not received within {HTTP_TOTAL_TIMEOUT:g}s: {r.url}")
+    r._content = b"".join(chunks)
+    r._content_consumed = True
+
+
+def _retry_after(r: requests.Response) -> Optional[float]:
+    try:
+        return float(r.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def get(url: str, headers: Dict[str, str] | None = None) -> requests.Response:
+    """GET through the live transport, or serve/record it via the active cassette."""
+    r = _dispatch(url, headers)
+    perf.add_bytes(len(r.content))
+    return r
+
+
+def _dispatch(url: str, headers: Dict[str, str] | None = None) -> requests.Response:
+    cas = cassette.active()
+    if cas is not None and cas.mode == "replay":
+        return cas.replay(url)
+    if cas is None:
+        return _get(url, headers)
+    t0 = time.monotonic()
+    try:
+        r = _get(url, headers)
+    except requests.RequestException as e:
+        cas.record(url, None, time.monotonic() - t0, error=e)
+        raise
+    cas.record(url, r, time.monotonic() - t0)
+    return r
+
+
+def _get(url: str, headers: Dict[str, str] | None = None) -> requests.Response:
+    """
+    GET `url` through the pooled per-host session and return the fully read response.
+
+    Connect/read timeouts apply per socket operation and HTTP_TOTAL_TIMEOUT bounds the
+    whole transfer. Connection errors, timeouts and 429/5xx are retried with exponential
+    backoff and full jitter, but never past the current run deadline. Other statuses
+    (including 304 and 4xx) are returned for the caller to handle.
+    """
+    session = session_for(url)
+    slots = _HOST_SLOTS[_host(url)]
+    last: Optional[requests.Response] = None
+    for attempt in range(HTTP_RETRIES + 1):
+        delay = None
+        try:
+            with slots:
+                started = time.monotonic()
+                r = session.get(url, headers=headers, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True)
+                _read_body(r, started)
+            if r.status_code not in RETRY_STATUS or attempt == HTTP_RETRIES:
+                return r
+            last = r
+            delay = _retry_after(r)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == HTTP_RETRIES:
+                raise
+        if delay is None:
+            delay = random.uniform(0, min(_BACKOFF_CAP, HTTP_BACKOFF * 2 ** attempt))
+        deadline = run_deadline()
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            break
+        time.sleep(delay)
+    if last is not None:
+        return last
+    raise requests.Timeout(f"gave up on {url}: run deadline reached while retrying")
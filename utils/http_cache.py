@@ -0,0 +1,220 @@
+# utils/http_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_AGE_DAYS
+from utils import http, polling
+
+_MISS = object()
+
+
+class HttpCache:
+    """
+    Persistent conditional-GET cache.
+
+    Per URL it keeps the validators (ETag / Last-Modified), the raw response body and the
+    normalized value the fetcher built from it. A 304 hands back the normalized value, so
+    the body is neither downloaded nor parsed again. The body is kept so a parser change
+    (new `tag`) can re-normalize without a network round trip.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_age_days: float):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self.enabled = True  # off while recording/replaying a cassette: always full bodies
+        self.stats = {"hits": 0, "misses": 0, "bytes_fetched": 0, "bytes_saved": 0, "parse_seconds_saved": 0.0}
+
+    # ----- index
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+    def _entries(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            try:
+                self._index = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for `url` (empty when nothing is cached)."""
+        with self._lock:
+            e = self._entries().get(url)
+        if not e:
+            return {}
+        headers = {}
+        if e.get("etag"):
+            headers["If-None-Match"] = e["etag"]
+        if e.get("last_modified"):
+            headers["If-Modified-Since"] = e["last_modified"]
+        return headers
+
+    # ----- reads / writes
+    def hit(self, url: str, parse: Callable[[bytes, Dict[str, str]], Any], tag: str) -> Any:
+        """Value for a 304 response; re-parses the stored body if the parser tag changed."""
+        with self._lock:
+            e = self._entries().get(url)
+        if not e:
+            return _MISS
+        key = self._key(url)
+        try:
+            if e.get("tag") == tag:
+                value = json.loads((self.root / f"{key}.json").read_text(encoding="utf-8"))["value"]
+                parse_seconds = e.get("parse_seconds", 0.0)
+            else:
+                body = (self.root / f"{key}.body").read_bytes()
+                t0 = time.perf_counter()
+                value = parse(body, e.get("headers") or {})
+                self._write(url, e, body, time.perf_counter() - t0, value, tag)
+                parse_seconds = 0.0
+        except Exception:
+            return _MISS
+        with self._lock:
+            e["last_used"] = time.time()
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += e.get("body_bytes", 0)
+            self.stats["parse_seconds_saved"] += parse_seconds
+        return value
+
+    def body(self, url: str) -> Optional[bytes]:
+        """The stored response body for `url`, or None."""
+        try:
+            return (self.root / f"{self._key(url)}.body").read_bytes()
+        except OSError:
+            return None
+
+    def store(self, url: str, resp: requests.Response, parse_seconds: float, value: Any, tag: str):
+        entry = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "headers": {"content-type": resp.headers.get("Content-Type", "")},
+        }
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["bytes_fetched"] += len(resp.content)
+        if not (entry["etag"] or entry["last_modified"]):
+            return  # nothing to revalidate with; caching would never produce a 304
+        self._write(url, entry, resp.content, parse_seconds, value, tag)
+
+    def _write(self, url: str, entry: Dict[str, Any], body: bytes, parse_seconds: float, value: Any, tag: str):
+        key = self._key(url)
+        self.root.mkdir(parents=True, exist_ok=True)
+        value_json = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+        (self.root / f"{key}.body").write_bytes(body)
+        (self.root / f"{key}.json").write_bytes(value_json)
+        now = time.time()
+        entry.update({
+            "tag": tag,
+            "stored_at": now,
+            "last_used": now,
+            "body_bytes": len(body),
+            "size": len(body) + len(value_json),
+            "parse_seconds": round(parse_seconds, 6),
+        })
+        with self._lock:
+            self._entries()[url] = entry
+
+    # ----- maintenance
+    def _drop(self, url: str):
+        key = self._key(url)
+        self._entries().pop(url, None)
+        for suffix in (".body", ".json"):
+            (self.root / f"{key}{suffix}").unlink(missing_ok=True)
+
+    def save(self) -> Dict[str, Any]:
+        """Evict by age, then least-recently-used until under the size bound; persist the index."""
+        with self._lock:
+            entries = self._entries()
+            now = time.time()
+            for url in [u for u, e in entries.items() if now - e.get("last_used", 0) > self.max_age]:
+                self._drop(url)
+            total = sum(e.get("size", 0) for e in entries.values())
+            for url, e in sorted(entries.items(), key=lambda kv: kv[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                total -= e.get("size", 0)
+                self._drop(url)
+            if entries or (self.root / "index.json").exists():
+                self.root.mkdir(parents=True, exist_ok=True)
+                (self.root / "index.json").write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+            return self.summary(total)
+
+    def summary(self, total_bytes: int | None = None) -> Dict[str, Any]:
+        out = dict(self.stats)
+        out["parse_seconds_saved"] = round(out["parse_seconds_saved"], 4)
+        out["entries"] = len(self._entries())
+        if total_bytes is not None:
+            out["stored_bytes"] = total_bytes
+        return out
+
+
+_CACHE: Optional[HttpCache] = None
+
+
+def get_cache() -> HttpCache:
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_AGE_DAYS)
+    return _CACHE
+
+
+def cached_get(
+    url: str,
+    parse: Callable[[bytes, Dict[str, str]], Any],
+    tag: str,
+    headers: Dict[str, str] | None = None,
+) -> Any:
+    """
+    GET `url` conditionally and return parse(body, headers).
+
+    On 304 the normalized value stored by the previous run is returned unparsed. `tag`
+    names the parser/output shape; bump it whenever `parse` changes what it returns.
+    In the daemon a URL that is not due yet (utils.polling) is not requested at all.
+    """
+    schedule = polling.get_schedule()
+    value = schedule.fresh(url, tag)
+    if value is not polling.MISS:
+        return value
+    try:
+        return _fetch(url, parse, tag, headers, schedule)
+    except Exception as e:
+        schedule.failed(url, e)
+        raise
+
+
+def _fetch(url: str, parse: Callable[[bytes, Dict[str, str]], Any], tag: str,
+           headers: Dict[str, str] | None, schedule: polling.PollSchedule) -> Any:
+    cache = get_cache()
+    base = dict(headers or {})
+    if not cache.enabled:
+        r = http.get(url, headers=base)
+        r.raise_for_status()
+        value = parse(r.content, {"content-type": r.headers.get("Content-Type", "")})
+        schedule.update(url, tag, value, r.headers, r.content)
+        return value
+    r = http.get(url, headers={**base, **cache.validators(url)})
+    if r.status_code == 304:
+        value = cache.hit(url, parse, tag)
+        if value is not _MISS:
+            # A 304 has no body: RSS hints come from the last one (read back once after a restart)
+            schedule.update(url, tag, value, r.headers, None if schedule.known(url) else cache.body(url))
+            return value
+        r = http.get(url, headers=base)  # cache entry lost; refetch in full
+    r.raise_for_status()
+    resp_headers = {"content-type": r.headers.get("Content-Type", "")}
+    t0 = time.perf_counter()
+    value = parse(r.content, resp_headers)
+    cache.store(url, r, time.perf_counter() - t0, value, tag)
+    schedule.update(url, tag, value, r.headers, r.content)
+    return value
@@ -0,0 +1,250 @@
+# utils/packs.py
+"""
+Monthly pack files for run snapshots.
+
+A finished day's data/<day>/runs/<HHMMSS>/raw.json files are rolled into data/packs/<YYYY-MM>.pack:
+one zlib member per run, a day's runs stored contiguously. data/packs/<YYYY-MM>.idx.json maps
+day -> span and run -> (offset, length), so reading one run or one whole day is a single seek
+and read followed by decompression. Readers go through list_runs / load_run / load_runs,
+which look at loose files first and packs second. The runs' perf.json timings are
+folded into data/<day>/perf.json instead (see utils.perf).
+
+    python -m utils.packs migrate            # pack every finished day that still has loose runs
+    python -m utils.packs cat 2025-10-14     # print a day's runs (or one: cat 2025-10-14 090000)
+    python -m utils.packs compact 2025-10    # rewrite a pack without superseded bytes
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import os
+import re
+import shutil
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import DATA_DIR, DAY_LOCK_NAME, PACKS_DIRNAME
+from utils import perf
+from utils.files import locked, write_text
+
+INDEX_VERSION = 1
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+RUN_RE = re.compile(r"^\d{6}(?:-\d+)?$")  # runs/<HHMMSS>, or <HHMMSS>-<n> when two runs shared a second
+
+_INDEXES: Dict[Path, tuple] = {}  # idx path -> (mtime_ns, index), re-read when the file changes
+
+
+def pack_dir(data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / PACKS_DIRNAME
+
+
+def _paths(data_dir: Path, month: str) -> tuple:
+    d = pack_dir(data_dir)
+    return d / f"{month}.pack", d / f"{month}.idx.json"
+
+
+def _load_index(idx_path: Path) -> Dict[str, Any]:
+    try:
+        mtime = idx_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {"version": INDEX_VERSION, "days": {}}
+    cached = _INDEXES.get(idx_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    index = json.loads(idx_path.read_text(encoding="utf-8"))
+    _INDEXES[idx_path] = (mtime, index)
+    return index
+
+
+def _save_index(idx_path: Path, index: Dict[str, Any]):
+    write_text(idx_path, json.dumps(index, indent=1, sort_keys=True) + "\n")
+    _INDEXES.pop(idx_path, None)
+
+
+def _day_entry(day_dir: Path) -> tuple:
+    pack, idx_path = _paths(day_dir.parent, day_dir.name[:7])
+    return pack, _load_index(idx_path)["days"].get(day_dir.name)
+
+
+# -----------------------------------------------------------
+# Reads
+# -----------------------------------------------------------
+def _loose_runs(day_dir: Path) -> List[str]:
+    runs_dir = day_dir / "runs"
+    if not runs_dir.exists():
+        return []
+    return sorted(p.name for p in runs_dir.iterdir() if RUN_RE.match(p.name) and (p / "raw.json").exists())
+
+
+def list_runs(day_dir: Path) -> List[str]:
+    """Run ids (HHMMSS) of a day, loose and packed, ascending."""
+    _, entry = _day_entry(day_dir)
+    return sorted(set(_loose_runs(day_dir)) | set((entry or {}).get("runs", {})))
+
+
+def list_packed_days(data_dir: Path, month: str) -> List[str]:
+    return sorted(_load_index(_paths(data_dir, month)[1])["days"])
+
+
+def _read_packed(pack: Path, entry: Dict[str, Any], run_ids: Iterable[str]) -> Dict[str, bytes]:
+    start, length = entry["span"]
+    with pack.open("rb") as f:
+        f.seek(start)
+        blob = f.read(length)
+    out = {}
+    for rid in run_ids:
+        off, n = entry["runs"][rid]
+        out[rid] = zlib.decompress(blob[off - start:off - start + n])
+    return out
+
+
+def load_runs(day_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Every run snapshot of a day as {run_id: snapshot}, ascending (one pack read for the packed ones)."""
+    pack, entry = _day_entry(day_dir)
+    raw = _read_packed(pack, entry, sorted(entry["runs"])) if entry else {}
+    for rid in _loose_runs(day_dir):
+        raw[rid] = (day_dir / "runs" / rid / "raw.json").read_bytes()
+    return {rid: json.loads(raw[rid]) for rid in sorted(raw)}
+
+
+def load_run(day_dir: Path, run_id: str) -> Optional[Dict[str, Any]]:
+    loose = day_dir / "runs" / run_id / "raw.json"
+    if loose.exists():
+        return json.loads(loose.read_bytes())
+    pack, entry = _day_entry(day_dir)
+    if not entry or run_id not in entry["runs"]:
+        return None
+    off, n = entry["runs"][run_id]
+    with pack.open("rb") as f:
+        f.seek(off)
+        return json.loads(zlib.decompress(f.read(n)))
+
+
+# -----------------------------------------------------------
+# Writes
+# -----------------------------------------------------------
+def pack_day(day_dir: Path) -> int:
+    """
+    Append the day's loose runs to its month pack (together with any runs packed earlier,
+    so the day stays contiguous), verify them and remove runs/. Returns runs packed.
+    Holds the day lock (no run is added meanwhile) and the month pack's lock.
+    """
+    data_dir, month = day_dir.parent, day_dir.name[:7]
+    pack, idx_path = _paths(data_dir, month)
+    with locked(day_dir / DAY_LOCK_NAME), locked(pack.with_suffix(".lock")):
+        return _pack_day(day_dir, pack, idx_path)
+
+
+def _pack_day(day_dir: Path, pack: Path, idx_path: Path) -> int:
+    loose = _loose_runs(day_dir)
+    if not loose:
+        return 0
+    index = _load_index(idx_path)
+    entry = index["days"].get(day_dir.name)
+    raw = _read_packed(pack, entry, sorted(entry["runs"])) if entry else {}
+    for rid in loose:
+        raw[rid] = (day_dir / "runs" / rid / "raw.json").read_bytes()
+
+    pack.parent.mkdir(parents=True, exist_ok=True)
+    runs, chunks = {}, []
+    with pack.open("ab") as f:
+        start = pos = f.tell()
+        for rid in sorted(raw):
+            member = zlib.compress(raw[rid], 9)
+            runs[rid] = [pos, len(member)]
+            chunks.append(member)
+            pos += len(member)
+        f.write(b"".join(chunks))
+        f.flush()
+        os.fsync(f.fileno())
+    new_entry = {"span": [start, pos - start], "runs": runs}
+    if _read_packed(pack, new_entry, sorted(raw)) != raw:
+        raise IOError(f"pack verification failed for {day_dir.name}")
+    index = {**index, "days": {**index["days"], day_dir.name: new_entry}}
+    _save_index(idx_path, index)
+    perf.fold(day_dir)  # run timings are not packed; they move to <day>/perf.json
+    shutil.rmtree(day_dir / "runs")
+    return len(loose)
+
+
+def pack_finished(data_dir: Path = DATA_DIR, before: dt.date | None = None) -> Dict[str, int]:
+    """Pack every day before `before` (default: today UTC) that still has loose runs."""
+    data_dir = Path(data_dir)
+    cutoff = str(before or dt.datetime.utcnow().date())
+    done = {}
+    for d in sorted(p for p in data_dir.iterdir() if p.is_dir() and DATE_RE.match(p.name)) if data_dir.exists() else []:
+        if d.name < cutoff and (d / "runs").exists():
+            n = pack_day(d)
+            if n:
+                done[d.name] = n
+    return done
+
+
+def compact(data_dir: Path, month: str, drop_days: Iterable[str] = ()) -> Dict[str, int]:
+    """Rewrite a month pack keeping only live runs of the days not in drop_days."""
+    pack, idx_path = _paths(data_dir, month)
+    with locked(pack.with_suffix(".lock")):
+        return _compact(pack, idx_path, drop_days)
+
+
+def _compact(pack: Path, idx_path: Path, drop_days: Iterable[str]) -> Dict[str, int]:
+    index = _load_index(idx_path)
+    drop = set(drop_days)
+    before = pack.stat().st_size if pack.exists() else 0
+    keep = {day: e for day, e in index["days"].items() if day not in drop}
+    if not keep:
+        for p in (pack, idx_path):
+            if p.exists():
+                p.unlink()
+        _INDEXES.pop(idx_path, None)
+        return {"before": before, "after": 0}
+
+    tmp = pack.with_suffix(".pack.tmp")
+    days, pos = {}, 0
+    with pack.open("rb") as src, tmp.open("wb") as dst:
+        for day in sorted(keep):
+            start, length = keep[day]["span"]
+            src.seek(start)
+            dst.write(src.read(length))
+            days[day] = {"span": [pos, length],
+                         "runs": {rid: [off - start + pos, n] for rid, (off, n) in keep[day]["runs"].items()}}
+            pos += length
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp, pack)
+    _save_index(idx_path, {**index, "days": days})
+    return {"before": before, "after": pos}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monthly run-snapshot packs.")
+    ap.add_argument("--data", type=Path, default=DATA_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("migrate", help="pack every finished day that still has loose runs/")
+    p_cat = sub.add_parser("cat", help="print a day's run snapshots (or one run)")
+    p_cat.add_argument("day")
+    p_cat.add_argument("run", nargs="?")
+    p_compact = sub.add_parser("compact", help="rewrite a month pack without superseded bytes")
+    p_compact.add_argument("month")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        done = pack_finished(args.data)
+        for day, n in done.items():
+            print(f"[packs] {day}: {n} runs")
+        print(f"[packs] packed {sum(done.values())} runs from {len(done)} days")
+    elif args.cmd == "cat":
+        day_dir = args.data / args.day
+        out = load_run(day_dir, args.run) if args.run else load_runs(day_dir)
+        if not out:
+            sys.exit(f"no runs for {args.day}{' ' + args.run if args.run else ''}")
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+    elif args.cmd == "compact":
+        stats = compact(args.data, args.month)
+        print(f"[packs] {args.month}: {stats['before']} -> {stats['after']} bytes")
+
+
+if __name__ == "__main__":
+    main()
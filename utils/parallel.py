@@ -0,0 +1,97 @@
+# utils/parallel.py
+from __future__ import annotations
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+# Absolute time.monotonic() deadline shared by every fetch in the current run (None = unbounded)
+_RUN_DEADLINE: Optional[float] = None
+
+
+class TaskTimeout(Exception):
+    """Stands in for a result when a task overruns its timeout or the run deadline."""
+
+
+def set_run_deadline(seconds: float | None) -> Optional[float]:
+    """Start the run clock; fetches scheduled after this share one overall deadline."""
+    global _RUN_DEADLINE
+    _RUN_DEADLINE = time.monotonic() + seconds if seconds else None
+    return _RUN_DEADLINE
+
+
+def run_deadline() -> Optional[float]:
+    return _RUN_DEADLINE
+
+
+def run_all(
+    tasks: Dict[str, Callable[[], Any]],
+    workers: int,
+    timeout: float | Dict[str, float | None] | None = None,
+    deadline: float | None = None,
+    executor: Executor | None = None,
+) -> Dict[str, Any]:
+    """
+    Run named callables concurrently and return {name: result}, in the order of `tasks`.
+
+    A task that raises, overruns its timeout (counted from when it starts running) or is
+    still unfinished at `deadline` gets its exception / TaskTimeout as the result, so
+    callers can always merge partial results. Abandoned threads are not killed; the
+    transport's own socket timeouts bound how long they linger.
+    """
+    if not tasks:
+        return {}
+
+    def _limit(name: str) -> float | None:
+        return timeout.get(name) if isinstance(timeout, dict) else timeout
+
+    started: Dict[str, float] = {}
+
+    def _wrap(name: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def _run():
+            started[name] = time.monotonic()
+            return fn()
+        return _run
+
+    own_pool = executor is None
+    pool = executor or ThreadPoolExecutor(max_workers=max(1, min(workers, len(tasks))), thread_name_prefix="fetch")
+    futures = {pool.submit(_wrap(name, fn)): name for name, fn in tasks.items()}
+    pending = set(futures)
+    results: Dict[str, Any] = {}
+
+    try:
+        while pending:
+            now = time.monotonic()
+            wake: list[float] = []
+            for f in list(pending):
+                name = futures[f]
+                limit = _limit(name)
+                t0 = started.get(name)
+                if deadline is not None and now >= deadline and not f.done():
+                    reason = "run deadline reached"
+                elif limit is not None and t0 is not None and now - t0 >= limit and not f.done():
+                    reason = f"timed out after {limit:g}s"
+                else:
+                    if limit is not None:
+                        # not started yet: its clock starts no earlier than now
+                        wake.append((t0 if t0 is not None else now) + limit)
+                    continue
+                f.cancel()
+                pending.discard(f)
+                results[name] = TaskTimeout(reason)
+            if not pending:
+                break
+            if deadline is not None:
+                wake.append(deadline)
+            wait_for = max(0.0, min(wake) - now) if wake else None
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for f in done:
+                pending.discard(f)
+                try:
+                    results[futures[f]] = f.result()
+                except Exception as e:
+                    results[futures[f]] = e
+    finally:
+        if own_pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    return {name: results[name] for name in tasks}
@@ -0,0 +1,202 @@
+# utils/perf.py
+"""
+Run instrumentation: named spans with wall time, CPU time, bytes fetched and peak memory.
+
+    with perf.span("charts"):
+        ...
+
+Spans go to the process-wide recorder (get_recorder()); they can be opened from any thread
+and nest per thread. CPU time is the opening thread's, bytes are what the HTTP transport
+reported (add_bytes) on that thread while the span was open, peak memory is the process
+high-water mark when the span closed.
+
+A run's report is stored next to its snapshot as runs/<id>/perf.json, keyed by job:
+{"run": {...}}, later joined by "site_build" (attach()). When the day's runs
+are packed the files are folded into <day>/perf.json as {"runs": {run_id: {...}}}.
+"""
+from __future__ import annotations
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak memory is left out
+    resource = None
+
+from config import DAY_LOCK_NAME
+from utils import clock
+from utils.files import locked, write_json
+
+PERF_VERSION = 1
+PERF_NAME = "perf.json"
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Recorder:
+    def __init__(self, job: str):
+        self.job = job
+        self.started_utc = clock.now_utc().strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._lock = threading.Lock()
+        self._local = threading.local()  # .open: this thread's open spans (innermost last)
+        self.spans: List[Dict[str, Any]] = []
+        self.bytes = 0
+
+    @contextmanager
+    def span(self, name: str):
+        rec = {"name": name, "start_s": round(time.perf_counter() - self._t0, 4), "bytes": 0}
+        stack = self._local.__dict__.setdefault("open", [])
+        stack.append(rec)
+        observer = _OBSERVER
+        token = observer.span_started(name, len(stack)) if observer else None
+        t0, cpu0 = time.perf_counter(), time.thread_time()
+        try:
+            yield rec
+        except BaseException as e:
+            rec["error"] = type(e).__name__
+            raise
+        finally:
+            rec["wall_s"] = round(time.perf_counter() - t0, 4)
+            rec["cpu_s"] = round(time.thread_time() - cpu0, 4)
+            rec["peak_rss_mb"] = peak_rss_mb()
+            if observer:
+                observer.span_finished(name, token)
+            stack.pop()
+            with self._lock:
+                self.spans.append(rec)
+
+    def add_bytes(self, n: int):
+        with self._lock:
+            self.bytes += n
+        for rec in getattr(self._local, "open", ()):
+            rec["bytes"] += n
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: (s["start_s"], s["name"]))
+            total_bytes = self.bytes
+        return {
+            "version": PERF_VERSION, "job": self.job, "started_utc": self.started_utc,
+            "totals": {"wall_s": round(time.perf_counter() - self._t0, 4),
+                       "cpu_s": round(time.process_time() - self._cpu0, 4),
+                       "bytes": total_bytes, "peak_rss_mb": peak_rss_mb()},
+            "spans": spans,
+        }
+
+
+_RECORDER: Optional[Recorder] = None
+# Notified around every span: span_started(name, depth) -> token, span_finished(name, token)
+# (utils.profiling profiles the stages this way)
+_OBSERVER: Optional[Any] = None
+
+
+def get_recorder() -> Recorder:
+    global _RECORDER
+    if _RECORDER is None:
+        _RECORDER = Recorder("run")
+    return _RECORDER
+
+
+def start(job: str) -> Recorder:
+    """Start a fresh recorder for `job` (the previous one's spans are dropped)."""
+    global _RECORDER
+    _RECORDER = Recorder(job)
+    return _RECORDER
+
+
+def set_observer(observer: Optional[Any]):
+    global _OBSERVER
+    _OBSERVER = observer
+
+
+def span(name: str):
+    return get_recorder().span(name)
+
+
+def wrap(name: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+    """fn run inside span(name), for handing to a worker pool."""
+    def _run():
+        with span(name):
+            return fn()
+    return _run
+
+
+def add_bytes(n: int):
+    get_recorder().add_bytes(n)
+
+
+def summary_lines(report: Dict[str, Any], top: int = 8) -> List[str]:
+    t = report["totals"]
+    lines = [f"{report['job']}: {t['wall_s']:.2f}s wall, {t['cpu_s']:.2f}s CPU, "
+             f"{t['bytes'] / 1024:.0f} KiB fetched, peak {t['peak_rss_mb']} MB"]
+    for s in sorted(report["spans"], key=lambda s: -s["wall_s"])[:top]:
+        lines.append(f"  {s['name']:<24} {s['wall_s']:>7.3f}s  cpu {s['cpu_s']:.3f}s"
+                     + (f"  {s['bytes'] / 1024:.1f} KiB" if s["bytes"] else "")
+                     + (f"  ({s['error']})" if s.get("error") else ""))
+    return lines
+
+
+# -----------------------------------------------------------
+# Storage
+# -----------------------------------------------------------
+def save(run_dir: Path, report: Dict[str, Any]):
+    write_json(Path(run_dir) / PERF_NAME, {report["job"]: report}, indent=1)
+
+
+def attach(day_dir: Path, report: Dict[str, Any]) -> Optional[str]:
+    """
+    Add a later job's report (the site build) to the day's newest loose run, once: a run
+    that already has one for this job is left alone. Returns the run id, or None.
+    """
+    runs_dir = Path(day_dir) / "runs"
+    with locked(Path(day_dir) / DAY_LOCK_NAME):
+        files = sorted(runs_dir.glob(f"*/{PERF_NAME}")) if runs_dir.exists() else []
+        if not files:
+            return None
+        doc = json.loads(files[-1].read_text(encoding="utf-8"))
+        if report["job"] in doc:
+            return None
+        doc[report["job"]] = report
+        write_json(files[-1], doc, indent=1)
+        return files[-1].parent.name
+
+
+def fold(day_dir: Path) -> int:
+    """Merge the loose runs/*/perf.json into <day>/perf.json (before runs/ is packed away)."""
+    day_dir = Path(day_dir)
+    loose = {p.parent.name: json.loads(p.read_text(encoding="utf-8"))
+             for p in sorted((day_dir / "runs").glob(f"*/{PERF_NAME}"))}
+    if loose:
+        write_json(day_dir / PERF_NAME, {"runs": {**_folded(day_dir), **loose}}, indent=1)
+    return len(loose)
+
+
+def _folded(day_dir: Path) -> Dict[str, Any]:
+    try:
+        return json.loads((day_dir / PERF_NAME).read_text(encoding="utf-8")).get("runs") or {}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def load_day(day_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """{run_id: {job: report}} for a day, folded and loose, ascending."""
+    day_dir = Path(day_dir)
+    runs = _folded(day_dir)
+    for p in sorted((day_dir / "runs").glob(f"*/{PERF_NAME}")):
+        try:
+            runs[p.parent.name] = json.loads(p.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+    return dict(sorted(runs.items()))
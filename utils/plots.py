@@ -1,27 +1,217 @@
 # utils/plots.py
+"""
+Report charts: bar and line charts written as small standalone SVG files (the default), or
+as PNG through Matplotlib with CHART_BACKEND=matplotlib (an optional dependency).
+
+Every chart carries a hash of its inputs (data-input on the <svg>, a PNG text chunk for
+Matplotlib); when the file on disk already has the same hash it is not rendered again.
+The SVG follows the site's light/dark color scheme and is meant to be inlined into pages.
+"""
+from __future__ import annotations
+import hashlib
+import io
+import json
+import math
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from html import escape  # XML-safe; xml.sax.saxutils would pull in urllib.request
+
+from config import CHART_BACKEND
+from utils.files import write_bytes
+
+CHART_VERSION = "1"  # bump when the drawing code changes so existing charts are redrawn
+EXTENSIONS = {"svg": ".svg", "matplotlib": ".png"}
+PALETTE = ["#4e79a7", "#f28e2b", "#e15759", "#76b7b2", "#59a14f", "#edc948"]
+
+SVG_STYLE = (
+    "<style>"
+    "svg.kg-chart{font:12px system-ui,-apple-system,'Segoe UI',Roboto,sans-serif}"
+    ".kg-chart text{fill:#222}.kg-chart .title{font-size:14px;font-weight:600}"
+    ".kg-chart .axis{stroke:#8888}.kg-chart .gridline{stroke:#8883}.kg-chart .bar{fill:#4e79a7}"
+    "@media (prefers-color-scheme:dark){.kg-chart text{fill:#ddd}.kg-chart .bar{fill:#7aa7e0}}"
+    "</style>"
+)
+
+_PLT = None  # matplotlib.pyplot once loaded; False when unavailable
+
+
+def _pyplot():
+    """Import Matplotlib (headless) on the first chart only; fall back to no-op if it fails."""
+    global _PLT
+    if _PLT is None:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")  # headless backend
+            from matplotlib import pyplot as plt
+            _PLT = plt
+        except Exception as e:
+            print(f"[plots] Matplotlib unavailable ({e}). Charts will be skipped locally.")
+            _PLT = False
+    return _PLT
+
+
+# -----------------------------------------------------------
+# Shared plumbing
+# -----------------------------------------------------------
+def _key(kind: str, title: str, labels: Sequence[str], series: Dict[str, Sequence]) -> str:
+    doc = [CHART_VERSION, CHART_BACKEND, kind, title, list(labels), {k: list(v) for k, v in series.items()}]
+    return hashlib.sha1(json.dumps(doc, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def _target(out_path: Path) -> Path:
+    return Path(out_path).with_suffix(EXTENSIONS.get(CHART_BACKEND, ".svg"))
+
+
+def _current(path: Path, key: str) -> bool:
+    try:
+        return f"kg-chart-input:{key}".encode("ascii") in path.read_bytes()
+    except FileNotFoundError:
+        return False
+
+
+def _save(path: Path, data: bytes) -> Path:
+    write_bytes(path, data)
+    for ext in EXTENSIONS.values():  # a chart drawn by the other backend is superseded
+        if ext != path.suffix:
+            path.with_suffix(ext).unlink(missing_ok=True)
+    return path
+
+
+def _n(x: float) -> str:
+    return f"{x:.1f}".rstrip("0").rstrip(".")
+
+
+def _ticks(hi: float, count: int = 4) -> List[float]:
+    """Round tick values from 0 to at least hi."""
+    if hi <= 0:
+        return [0.0, 1.0]
+    raw = hi / count
+    mag = 10 ** math.floor(math.log10(raw))
+    step = next(m * mag for m in (1, 2, 2.5, 5, 10) if m * mag >= raw)
+    return [i * step for i in range(int(math.ceil(hi / step)) + 1)]
 
-# Try to import Matplotlib in a headless-safe way; fall back to no-op if it fails
-try:
-    import matplotlib
-    matplotlib.use("Agg")  # headless backend
-    from matplotlib import pyplot as plt
-    _PLOTS_OK = True
-except Exception as e:
-    print(f"[plots] Matplotlib unavailable ({e}). Charts will be skipped locally.")
-    plt = None
-    _PLOTS_OK = False
-
-def bar_plot(title: str, labels: list[str], values: list[float], out_path: Path):
-    if not _PLOTS_OK or plt is None:
-        # No-op fallback: just return without raising, so the rest of the run succeeds
-        return
-    out_path = Path(out_path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+def _svg(width: int, height: int, key: str, title: str, body: List[str]) -> bytes:
+    head = (f'<svg xmlns="http://www.w3.org/2000/svg" class="kg-chart" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" role="img" data-input="kg-chart-input:{key}">')
+    parts = [head, f"<title>{escape(title)}</title>", SVG_STYLE,
+             f'<text class="title" x="8" y="20">{escape(title)}</text>', *body, "</svg>\n"]
+    return "\n".join(parts).encode("utf-8")
+
+
+# -----------------------------------------------------------
+# Bar chart
+# -----------------------------------------------------------
+def _svg_bar(title: str, labels: Sequence[str], values: Sequence[float], key: str) -> bytes:
+    row, top, width = 22, 34, 640
+    label_w = min(260, 12 + 7 * max((len(s) for s in labels), default=0))
+    x0, room = label_w + 8, width - label_w - 8 - 56
+    peak = max((abs(v) for v in values), default=0) or 1
+    body = [f'<line class="axis" x1="{x0}" y1="{top - 4}" x2="{x0}" y2="{top + row * len(values)}"/>']
+    for i, (label, v) in enumerate(zip(labels, values)):
+        y = top + i * row
+        w = max(v, 0) / peak * room
+        body.append(f'<text x="{label_w}" y="{y + 15}" text-anchor="end">{escape(label)}</text>')
+        body.append(f'<rect class="bar" x="{x0}" y="{y + 3}" width="{_n(w)}" height="{row - 6}" rx="2"/>')
+        body.append(f'<text x="{_n(x0 + w + 6)}" y="{y + 15}">{_n(v)}</text>')
+    return _svg(width, top + row * len(values) + 10, key, title, body)
+
+
+def _mpl_bar(title: str, labels: Sequence[str], values: Sequence[float], key: str) -> Optional[bytes]:
+    plt = _pyplot()
+    if not plt:
+        return None
     plt.figure()
     plt.bar(range(len(values)), values)
     plt.xticks(range(len(labels)), labels, rotation=45, ha="right")
     plt.title(title)
     plt.tight_layout()
-    plt.savefig(out_path)
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", metadata={"Description": f"kg-chart-input:{key}"})
     plt.close()
+    return buf.getvalue()
+
+
+def bar_plot(title: str, labels: List[str], values: List[float], out_path: Path) -> Optional[Path]:
+    """
+    Bar chart at out_path (the suffix follows the backend). Returns the file, or None when
+    the backend is unavailable. Unchanged inputs leave the existing file as it is.
+    """
+    path = _target(out_path)
+    key = _key("bar", title, labels, {"values": values})
+    if _current(path, key):
+        return path
+    render = _mpl_bar if CHART_BACKEND == "matplotlib" else _svg_bar
+    data = render(title, labels, values, key)
+    return _save(path, data) if data else None
+
+
+# -----------------------------------------------------------
+# Line chart
+# -----------------------------------------------------------
+def _svg_line(title: str, labels: Sequence[str], series: Dict[str, Sequence[Optional[float]]], key: str) -> bytes:
+    width, height = 640, 300
+    left, right, top, bottom = 48, 190, 34, 36
+    pw, ph = width - left - right, height - top - bottom
+    ticks = _ticks(max((v for vs in series.values() for v in vs if v is not None), default=0))
+    hi = ticks[-1]
+    n = max(len(labels), 2)
+    xs = [left + pw * i / (n - 1) for i in range(len(labels))]
+    y = lambda v: top + ph - ph * v / hi  # noqa: E731
+
+    body = []
+    for t in ticks:
+        body.append(f'<line class="gridline" x1="{left}" y1="{_n(y(t))}" x2="{left + pw}" y2="{_n(y(t))}"/>')
+        body.append(f'<text x="{left - 6}" y="{_n(y(t) + 4)}" text-anchor="end">{_n(t)}</text>')
+    body.append(f'<line class="axis" x1="{left}" y1="{top + ph}" x2="{left + pw}" y2="{top + ph}"/>')
+    every = max(1, math.ceil(len(labels) / 8))
+    for i, label in enumerate(labels):
+        if i % every == 0 or i == len(labels) - 1:
+            body.append(f'<text x="{_n(xs[i])}" y="{top + ph + 18}" text-anchor="middle">{escape(label)}</text>')
+    for j, (name, values) in enumerate(series.items()):
+        color = PALETTE[j % len(PALETTE)]
+        segment: List[str] = []
+        for x, v in list(zip(xs, values)) + [(None, None)]:
+            if v is not None:
+                segment.append(f"{_n(x)},{_n(y(v))}")
+                continue
+            if len(segment) > 1:
+                body.append(f'<polyline points="{" ".join(segment)}" fill="none" stroke="{color}" stroke-width="2"/>')
+            elif segment:
+                cx, cy = segment[0].split(",")
+                body.append(f'<circle cx="{cx}" cy="{cy}" r="3" fill="{color}"/>')
+            segment = []
+        ly = top + 8 + j * 18
+        body.append(f'<rect x="{left + pw + 12}" y="{ly - 8}" width="10" height="10" fill="{color}"/>')
+        body.append(f'<text x="{left + pw + 28}" y="{ly + 1}">{escape(name)}</text>')
+    return _svg(width, height, key, title, body)
+
+
+def _mpl_line(title: str, labels: Sequence[str], series: Dict[str, Sequence[Optional[float]]],
+              key: str) -> Optional[bytes]:
+    plt = _pyplot()
+    if not plt:
+        return None
+    plt.figure()
+    for name, values in series.items():
+        plt.plot(range(len(values)), [math.nan if v is None else v for v in values], marker="o", label=name)
+    plt.xticks(range(len(labels)), labels, rotation=45, ha="right")
+    plt.title(title)
+    plt.legend(fontsize="small")
+    plt.tight_layout()
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", metadata={"Description": f"kg-chart-input:{key}"})
+    plt.close()
+    return buf.getvalue()
+
+
+def line_plot(title: str, labels: List[str], series: Dict[str, List[Optional[float]]],
+              out_path: Path) -> Optional[Path]:
+    """One line per series over the x labels (None leaves a gap); same contract as bar_plot."""
+    path = _target(out_path)
+    key = _key("line", title, labels, series)
+    if _current(path, key):
+        return path
+    render = _mpl_line if CHART_BACKEND == "matplotlib" else _svg_line
+    data = render(title, labels, series, key)
+    return _save(path, data) if data else None
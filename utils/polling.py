@@ -0,0 +1,200 @@
+# utils/polling.py
+"""
+Per-URL poll schedule for the long-running daemon (main.py daemon).
+
+Every response that goes through http_cache.cached_get sets when its URL is next worth asking
+again:
+
+    HTTP   Cache-Control s-maxage / max-age, else Expires - Date
+    RSS    <ttl> (minutes) when the server sent no freshness; <skipHours> pushes the next poll
+           past the listed GMT hours
+
+clamped to [POLL_MIN_SECONDS, POLL_MAX_SECONDS], POLL_DEFAULT_SECONDS when there is no hint.
+A 304 renews the timing from its headers and keeps the feed's last RSS hints. Until the URL is
+due again cached_get hands back (a copy of) the value it parsed last time, without a request.
+
+A failed poll (or a feed skipped by the circuit breaker) is retried after POLL_MIN_SECONDS,
+doubling per further failure up to POLL_MAX_SECONDS; until then asking for the URL raises
+Backoff carrying the original error, so the snapshot looks the same as in the failed cycle.
+
+The schedule is off unless the daemon enables it: one-shot runs always fetch everything.
+"""
+from __future__ import annotations
+import copy
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from config import POLL_DEFAULT_SECONDS, POLL_MAX_SECONDS, POLL_MIN_SECONDS
+
+MISS = object()
+
+
+class Backoff(Exception):
+    """The URL's last poll failed and it is not due again yet; str() is the original error's."""
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error) or type(error).__name__)
+        self.error = error
+
+
+SCAN_BYTES = 64 * 1024  # <ttl>/<skipHours> sit in the channel header, before the items
+
+_TTL = re.compile(rb"<ttl>\s*(\d+)\s*</ttl>", re.I)
+_SKIP_HOURS = re.compile(rb"<skipHours>(.*?)</skipHours>", re.I | re.S)
+_HOUR = re.compile(rb"<hour>\s*(\d+)\s*</hour>", re.I)
+_MAX_AGE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*(\d+)", re.I)
+
+
+def header_freshness(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the response may be reused for, from Cache-Control or Expires/Date; None: no hint."""
+    h = {str(k).lower(): v for k, v in (headers or {}).items()}
+    cc = h.get("cache-control") or ""
+    if re.search(r"\b(no-cache|no-store)\b", cc, re.I):
+        return 0.0
+    ages = dict((k.lower(), int(v)) for k, v in _MAX_AGE.findall(cc))
+    if ages:
+        return float(ages.get("s-maxage", ages.get("max-age")))
+    if h.get("expires"):
+        from email.utils import parsedate_to_datetime
+        try:
+            expires = parsedate_to_datetime(h["expires"])
+            date = parsedate_to_datetime(h["date"]) if h.get("date") else None
+        except (TypeError, ValueError):
+            return 0.0  # invalid Expires means "already expired"
+        if expires.tzinfo is None:
+            return None
+        base = date.timestamp() if date is not None and date.tzinfo is not None else time.time()
+        return max(0.0, expires.timestamp() - base)
+    return None
+
+
+def rss_hints(body: bytes) -> Tuple[Optional[float], List[int]]:
+    """(<ttl> in seconds or None, <skipHours> GMT hours) from an RSS channel header."""
+    head = (body or b"")[:SCAN_BYTES]
+    m = _TTL.search(head)
+    ttl = int(m.group(1)) * 60.0 if m else None
+    skip = _SKIP_HOURS.search(head)
+    hours = sorted({int(x) % 24 for x in _HOUR.findall(skip.group(1))}) if skip else []
+    return ttl, hours
+
+
+def _clamp(seconds: Optional[float]) -> float:
+    if seconds is None:
+        return float(POLL_DEFAULT_SECONDS)
+    return float(min(max(seconds, POLL_MIN_SECONDS), POLL_MAX_SECONDS))
+
+
+def _skip_past(when: float, hours: List[int]) -> float:
+    """`when`, moved to the start of the first GMT hour not listed in `hours`."""
+    if not hours or len(hours) >= 24:
+        return when
+    while time.gmtime(when).tm_hour in hours:
+        when = (int(when) // 3600 + 1) * 3600.0
+    return when
+
+
+class PollSchedule:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        # url -> {"tag", "value", "due", "interval", "ttl", "skip"[, "failures", "error"]}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.polled = 0
+        self.skipped = 0
+
+    def fresh(self, url: str, tag: str, now: Optional[float] = None) -> Any:
+        """
+        The value last parsed for `url` while it is not due yet; MISS when it should be polled.
+        Raises Backoff while a failed URL waits for its retry.
+        """
+        if not self.enabled:
+            return MISS
+        now = time.time() if now is None else now
+        with self._lock:
+            e = self._entries.get(url)
+            if e is not None and now < e["due"] and e.get("error") is not None:
+                self.skipped += 1
+                raise Backoff(e["error"])
+            if e is None or e["tag"] != tag or now >= e["due"] or "value" not in e:
+                self.polled += 1
+                return MISS
+            self.skipped += 1
+            value = e["value"]
+        return copy.deepcopy(value)  # callers may annotate what they get back
+
+    def update(self, url: str, tag: str, value: Any, headers: Mapping[str, str],
+               body: Optional[bytes] = None, now: Optional[float] = None) -> float:
+        """Remember `value` and schedule the next poll of `url`; returns the interval in seconds."""
+        if not self.enabled:
+            return 0.0
+        now = time.time() if now is None else now
+        with self._lock:
+            prev = self._entries.get(url) or {}
+            ttl, skip = rss_hints(body) if body is not None else (prev.get("ttl"), prev.get("skip") or [])
+            fresh_for = header_freshness(headers)
+            interval = _clamp(fresh_for if fresh_for is not None else ttl)
+            self._entries[url] = {"tag": tag, "value": copy.deepcopy(value), "due": _skip_past(now + interval, skip),
+                                  "interval": interval, "ttl": ttl, "skip": skip}
+            return interval
+
+    def failed(self, url: str, error: Optional[BaseException] = None, now: Optional[float] = None) -> float:
+        """
+        Push `url`'s next poll back after a failure (`error`) or a circuit-breaker skip (None);
+        the last good value is kept. Returns the backoff in seconds.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.time() if now is None else now
+        with self._lock:
+            e = self._entries.setdefault(url, {"tag": None, "interval": 0.0, "ttl": None, "skip": []})
+            e["failures"] = e.get("failures", 0) + 1
+            if error is not None:
+                e["error"] = error
+            backoff = float(min(POLL_MIN_SECONDS * 2 ** (e["failures"] - 1), POLL_MAX_SECONDS))
+            e["due"] = now + backoff
+            return backoff
+
+    def known(self, url: str) -> bool:
+        with self._lock:
+            return url in self._entries
+
+    def remembered(self, key: str, fn: Callable[[], Any], interval: float, now: Optional[float] = None) -> Any:
+        """fn()'s result, reused for `interval` seconds when enabled (calls that bypass the HTTP cache)."""
+        value = self.fresh(key, "remembered", now)
+        if value is not MISS:
+            return value
+        try:
+            value = fn()
+        except Exception as e:
+            self.failed(key, e, now)
+            raise
+        if self.enabled:
+            now = time.time() if now is None else now
+            with self._lock:
+                self._entries[key] = {"tag": "remembered", "value": copy.deepcopy(value),
+                                      "due": now + interval, "interval": float(interval), "ttl": None, "skip": []}
+        return value
+
+    def next_due(self) -> Optional[float]:
+        """Earliest time (epoch seconds) any known URL is due; None before anything was polled."""
+        with self._lock:
+            return min((e["due"] for e in self._entries.values()), default=None)
+
+    def take_counts(self) -> Tuple[int, int]:
+        """(polled, served from memory) since the last call."""
+        with self._lock:
+            counts = (self.polled, self.skipped)
+            self.polled = self.skipped = 0
+        return counts
+
+
+_SCHEDULE: Optional[PollSchedule] = None
+
+
+def get_schedule() -> PollSchedule:
+    global _SCHEDULE
+    if _SCHEDULE is None:
+        _SCHEDULE = PollSchedule()
+    return _SCHEDULE
@@ -0,0 +1,178 @@
+# utils/profiling.py
+"""
+On-demand profiling (--profile on main.py, site_build.py and wrapup.py).
+
+Hooks into the utils.perf spans: every outermost span on the main thread (a stage: fetch,
+merge, charts, site.days, ...) is profiled on its own with cProfile, and tracemalloc (traces
+cleared when the stage starts) gives its peak traced memory and the allocations it left behind.
+Outermost spans on worker threads (fetch.<source>, feed.<label>) are profiled too, merged per
+kind. Everything lands in out/profile/<timestamp>/:
+
+    01-fetch.pstats, 01-fetch.alloc.txt, ...   one pair per main-thread stage, in run order
+    fetch-threads.pstats, feed-threads.pstats  worker-thread spans, merged by kind
+    all.pstats                                 every profile above, merged
+    summary.txt                                stages and the hottest functions (own / cumulative time)
+    meta.json                                  script, arguments, commit, Python, per-stage numbers
+
+Run against a cassette (main.py --replay DIR --profile) the inputs are identical from one
+commit to the next, so two profile directories compare like for like (python -m pstats, or
+diff the summaries). Function names are stored without directory prefixes for the same reason.
+"""
+from __future__ import annotations
+import cProfile
+import datetime as dt
+import io
+import json
+import pstats
+import re
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import PROFILE_DIR, PROFILE_TOP
+from utils import perf
+
+ROOT = Path(__file__).resolve().parent.parent
+TRACE_FRAMES = 1  # tracemalloc frames per allocation (1: grouped by line; more is much slower)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "span"
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class StageProfiler:
+    """perf observer: a cProfile (and, on the main thread, tracemalloc snapshots) per outermost span."""
+
+    def __init__(self, out_dir: Path, top: int = PROFILE_TOP):
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self._lock = threading.Lock()
+        self._stages: List[Dict[str, Any]] = []  # main-thread stages, in run order
+        self._threads: Dict[str, List[cProfile.Profile]] = {}  # "<kind>-threads" -> profiles
+
+    def span_started(self, name: str, depth: int):
+        if depth != 1:
+            return None  # nested spans are already inside their stage's profile
+        main = threading.current_thread() is threading.main_thread()
+        if main:
+            # Forget earlier allocations: what is traced at the end is what this stage left behind
+            # (comparing whole snapshots instead takes seconds once the imports are traced)
+            tracemalloc.clear_traces()
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler is active on this thread
+            return None
+        return {"prof": prof, "main": main, "t0": time.perf_counter()}
+
+    def span_finished(self, name: str, token):
+        if token is None:
+            return
+        token["prof"].disable()
+        if not token["main"]:
+            with self._lock:
+                self._threads.setdefault(f"{_slug(name.split('.')[0])}-threads", []).append(token["prof"])
+            return
+        wall = time.perf_counter() - token["t0"]
+        retained, peak = tracemalloc.get_traced_memory()
+        snap = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        self._stages.append({"name": name, "prof": token["prof"], "wall_s": wall, "peak_traced": peak,
+                             "kept": retained, "top": snap.statistics("lineno")[:self.top]})
+
+    # -------------------------------------------------------
+    def _stats(self, profiles: List[cProfile.Profile]) -> pstats.Stats:
+        stats = pstats.Stats(profiles[0])
+        for prof in profiles[1:]:
+            stats.add(prof)
+        return stats.strip_dirs()
+
+    def _hottest(self, stats: pstats.Stats, order: str) -> str:
+        buf = io.StringIO()
+        stats.stream = buf
+        stats.sort_stats(order).print_stats(self.top)
+        return buf.getvalue().split("\n", 1)[-1].strip("\n")  # drop the dump-file header line
+
+    def finish(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Write every artifact; returns the per-stage numbers stored in meta.json."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stages, everything = {}, []
+        for i, st in enumerate(self._stages, 1):
+            key = f"{i:02d}-{_slug(st['name'])}"
+            stats = self._stats([st["prof"]])
+            stats.dump_stats(self.out_dir / f"{key}.pstats")
+            lines = [f"{st['name']}: peak traced {st['peak_traced'] / 2**20:.1f} MiB, "
+                     f"{st['kept'] / 1024:.0f} KiB still allocated at the end; top {self.top} lines"]
+            lines += [str(d) for d in st["top"]]
+            (self.out_dir / f"{key}.alloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+            stages[key] = {"wall_s": round(st["wall_s"], 4), "calls": stats.total_calls,
+                           "peak_traced_mib": round(st["peak_traced"] / 2**20, 2),
+                           "kept_kib": round(st["kept"] / 1024, 1)}
+            everything.append(st["prof"])
+        for key, profiles in sorted(self._threads.items()):
+            stats = self._stats(profiles)
+            stats.dump_stats(self.out_dir / f"{key}.pstats")
+            stages[key] = {"spans": len(profiles), "calls": stats.total_calls}
+            everything += profiles
+        if not everything:
+            return stages
+        total = self._stats(everything)
+        total.dump_stats(self.out_dir / "all.pstats")
+
+        head = f"{meta['script']} {' '.join(meta['argv'])}".strip()
+        summary = [f"Profile of {head} (commit {meta['commit'] or 'unknown'}, Python {meta['python']})", "",
+                   f"{'stage':<28} {'wall s':>8} {'calls':>10} {'peak MiB':>9} {'kept KiB':>9}"]
+        for key, st in stages.items():
+            if "wall_s" in st:
+                summary.append(f"{key:<28} {st['wall_s']:>8.3f} {st['calls']:>10} "
+                               f"{st['peak_traced_mib']:>9.1f} {st['kept_kib']:>9.0f}")
+            else:
+                summary.append(f"{key:<28} {'':>8} {st['calls']:>10}   ({st['spans']} spans)")
+        summary += ["", "Hottest functions by own time (all stages):", self._hottest(total, "tottime"),
+                    "", "Hottest functions by cumulative time (all stages):", self._hottest(total, "cumulative")]
+        (self.out_dir / "summary.txt").write_text("\n".join(summary) + "\n", encoding="utf-8")
+        return stages
+
+
+def _new_dir(root: Path) -> Path:
+    stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out, n = root / stamp, 1
+    while out.exists():
+        n += 1
+        out = root / f"{stamp}-{n}"
+    return out
+
+
+@contextmanager
+def session(script: str, argv: List[str], root: Path = PROFILE_DIR):
+    """Profile the with-block's perf stages into a fresh root/<timestamp>/ (printed at the end)."""
+    profiler = StageProfiler(_new_dir(Path(root)))
+    started = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    tracemalloc.start(TRACE_FRAMES)
+    perf.set_observer(profiler)
+    try:
+        yield profiler
+    finally:
+        perf.set_observer(None)
+        meta = {"script": script, "argv": [a for a in argv if a != "--profile"], "commit": _commit(),
+                "python": sys.version.split()[0], "started_utc": started}
+        meta["stages"] = profiler.finish(meta)
+        tracemalloc.stop()
+        profiler.out_dir.mkdir(parents=True, exist_ok=True)
+        (profiler.out_dir / "meta.json").write_text(json.dumps(meta, indent=1) + "\n", encoding="utf-8")
+        if meta["stages"]:
+            print(f"[profile] {len(meta['stages'])} profiles written to {profiler.out_dir} (see summary.txt)")
+        else:
+            print(f"[profile] no stage ran; only {profiler.out_dir / 'meta.json'} written")
@@ -0,0 +1,258 @@
+# utils/search.py
+"""
+Full-text search over the whole archive.
+
+    python -m utils.search "chip export"        # newest matches first
+    python -m utils.search --rebuild            # drop the index and re-read every day log
+
+The index lives in data/.cache/search and is derived data: if it is missing it is rebuilt
+from the day logs. Layout (the site publishes the same files under docs/search/):
+
+    meta.json           shard count, chunk size, stopwords, doc count, high-water cursor (last day
+                        indexed and its log offset)
+    terms/<xx>.json     {term: [doc ids, delta-encoded]} for terms whose FNV-1a hash % shards == xx
+    docs/<n>.json       [[date, kind, title, url, source], ...] for doc ids n*chunk .. n*chunk+chunk-1
+
+A query reads only the term shards of its terms plus the doc chunks of the hits it shows,
+so query cost does not grow with the number of days; the shards themselves still do, by a
+few bytes per posting.
+
+Days before the cursor's day are treated as finished and are not looked at again; a backfill
+that rewrites their logs drops the index, and --rebuild does the same by hand.
+"""
+from __future__ import annotations
+import argparse
+import json
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from config import DATA_DIR, CACHE_DIR, SEARCH_SHARDS, SEARCH_CHUNK
+from utils import daystore
+from utils.files import locked, write_json
+from utils.summarize import STOPWORDS
+
+INDEX_VERSION = 2
+_TOKEN = re.compile(r"[^\W_]+")  # letters and digits; the page uses /[\p{L}\p{N}]+/u
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+STOPWORDS_LIST = sorted(STOPWORDS)  # as published in meta.json for the search page
+
+
+def fnv1a(term: str) -> int:
+    """32-bit FNV-1a over UTF-8 (the search page computes the same hash to pick shards)."""
+    h = 0x811C9DC5
+    for b in term.encode("utf-8"):
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def terms(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _wiki_docs(wiki: Dict[str, Any]) -> Iterable[tuple]:
+    for e in wiki.get("today") or []:
+        pages = [p for p in e.get("pages") or [] if p]
+        url = f"https://en.wikipedia.org/wiki/{pages[0].replace(' ', '_')}" if pages else ""
+        yield f"{e.get('year')} — {e.get('text') or ''}", url, "Wikipedia — On This Day"
+    rnd = wiki.get("random") or {}
+    if rnd.get("title"):
+        yield rnd["title"], rnd.get("content_urls") or "", "Wikipedia — Random"
+
+
+def record_docs(date: str, rec: Dict[str, Any]) -> List[list]:
+    """Searchable docs in one day-log record: [date, kind, title, url, source]."""
+    out = []
+    for kind, items in (("world", rec.get("world")), ("local", rec.get("local"))):
+        for it in items or []:
+            if it.get("title") and not it.get("error"):
+                out.append([date, kind, it["title"], it.get("link") or "", it.get("source") or ""])
+    for it in rec.get("hn") or []:
+        if it.get("title"):
+            url = it.get("url") or f"https://news.ycombinator.com/item?id={it.get('objectID')}"
+            out.append([date, "hn", it["title"], url, "Hacker News"])
+    for title, url, source in _wiki_docs(rec.get("wiki") or {}):
+        out.append([date, "wiki", title, url, source])
+    return out
+
+
+class SearchIndex:
+    """Sharded inverted index; shards and doc chunks are loaded lazily and rewritten only when touched."""
+
+    def __init__(self, root: Path, shards: int = SEARCH_SHARDS, chunk: int = SEARCH_CHUNK):
+        self.root = Path(root)
+        self.meta = self._load(self.root / "meta.json")
+        if not self.meta or self.meta.get("version") != INDEX_VERSION or self.meta.get("stopwords") != STOPWORDS_LIST:
+            self.meta = {"version": INDEX_VERSION, "shards": shards, "chunk": chunk,
+                         "stopwords": STOPWORDS_LIST, "docs": 0, "cursor": None}
+            self._reset_files()
+        self._terms: Dict[int, Dict[str, List[int]]] = {}
+        self._last: Dict[str, int] = {}  # absolute last doc id per touched term
+        self._chunks: Dict[int, List[list]] = {}
+        self._dirty_terms: set = set()
+        self._dirty_chunks: set = set()
+        self._dirty_meta = False
+
+    @staticmethod
+    def _load(p: Path) -> Any:
+        try:
+            return json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def _reset_files(self):
+        for sub in ("terms", "docs"):
+            shutil.rmtree(self.root / sub, ignore_errors=True)
+
+    def _shard(self, n: int) -> Dict[str, List[int]]:
+        if n not in self._terms:
+            self._terms[n] = self._load(self.root / "terms" / f"{n:02x}.json") or {}
+        return self._terms[n]
+
+    def _chunk(self, n: int) -> List[list]:
+        if n not in self._chunks:
+            self._chunks[n] = self._load(self.root / "docs" / f"{n}.json") or []
+        return self._chunks[n]
+
+    # ----- writes
+    def add(self, docs: List[list]):
+        shards, chunk = self.meta["shards"], self.meta["chunk"]
+        for doc in docs:
+            doc_id = self.meta["docs"]
+            self.meta["docs"] += 1
+            self._chunk(doc_id // chunk).append(doc)
+            self._dirty_chunks.add(doc_id // chunk)
+            for t in set(terms(doc[2]) + terms(doc[4])):
+                n = fnv1a(t) % shards
+                postings = self._shard(n).setdefault(t, [])
+                if t not in self._last:
+                    self._last[t] = sum(postings)
+                # delta encoding: ids only grow, so each entry is the gap to the previous one
+                postings.append(doc_id - self._last[t])
+                self._last[t] = doc_id
+                self._dirty_terms.add(n)
+        self._dirty_meta = self._dirty_meta or bool(docs)
+
+    def update_day(self, day_dir: Path) -> int:
+        """
+        Index whatever the day's log gained since the last call (daystore.tail from the cursor when
+        it points into this day, else from the start); the cursor then moves to this day.
+        """
+        mark = self.meta["cursor"] or {}
+        cursor = {k: v for k, v in mark.items() if k != "day"} if mark.get("day") == day_dir.name else None
+        records, new_cursor = daystore.tail(day_dir, cursor)
+        added = 0
+        for rec in records:
+            docs = record_docs(day_dir.name, rec)
+            self.add(docs)
+            added += len(docs)
+        if new_cursor is not None and new_cursor != cursor:
+            self.meta["cursor"] = {"day": day_dir.name, **new_cursor}
+            self._dirty_meta = True
+        return added
+
+    def sync(self, data_dir: Path = DATA_DIR) -> int:
+        """Catch up from the cursor's day on (one stat per day from there); returns the number of docs added."""
+        data_dir = Path(data_dir)
+        since = (self.meta["cursor"] or {}).get("day") or ""
+        days = sorted(p for p in data_dir.iterdir() if _DATE_RE.match(p.name) and p.name >= since and p.is_dir()) \
+            if data_dir.exists() else []
+        return sum(self.update_day(d) for d in days)
+
+    def save(self):
+        for n in self._dirty_terms:
+            self._write(self.root / "terms" / f"{n:02x}.json", self._terms[n])
+        for n in self._dirty_chunks:
+            self._write(self.root / "docs" / f"{n}.json", self._chunks[n])
+        if self._dirty_meta:
+            self._write(self.root / "meta.json", self.meta)
+        self._dirty_terms, self._dirty_chunks, self._dirty_meta = set(), set(), False
+
+    @staticmethod
+    def _write(p: Path, obj: Any):
+        write_json(p, obj, indent=None)
+
+    # ----- reads
+    def postings(self, term: str) -> List[int]:
+        out, acc = [], 0
+        for gap in self._shard(fnv1a(term) % self.meta["shards"]).get(term, []):
+            acc += gap
+            out.append(acc)
+        return out
+
+    def query(self, text: str, limit: int = 20) -> Dict[str, Any]:
+        """Docs containing every query term, newest first."""
+        q = sorted(set(terms(text)))
+        if not q:
+            return {"total": 0, "hits": []}
+        lists = sorted((self.postings(t) for t in q), key=len)
+        ids = set(lists[0])
+        for p in lists[1:]:
+            ids &= set(p)
+        ranked = sorted(ids, reverse=True)
+        chunk = self.meta["chunk"]
+        hits = [self._chunk(i // chunk)[i % chunk] for i in ranked[:limit]]
+        return {"total": len(ranked), "hits": hits}
+
+
+_INDEXES: Dict[Path, SearchIndex] = {}
+
+
+def index_dir(data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / CACHE_DIR.name / "search"
+
+
+def get_index(data_dir: Path = DATA_DIR) -> SearchIndex:
+    """The index for an archive root (one per process and root; replay runs use their own)."""
+    root = index_dir(data_dir)
+    if root not in _INDEXES:
+        _INDEXES[root] = SearchIndex(root)
+    return _INDEXES[root]
+
+
+def sync(data_dir: Path = DATA_DIR) -> SearchIndex:
+    """Bring the index up to date with data_dir and persist it (one process at a time)."""
+    root = index_dir(data_dir)
+    with locked(root.with_suffix(".lock")):
+        index = get_index(data_dir)
+        if SearchIndex._load(root / "meta.json") not in (None, index.meta):
+            index = _INDEXES[root] = SearchIndex(root)  # another process extended it meanwhile
+        index.sync(data_dir)
+        index.save()
+    return index
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Search every archived headline.")
+    ap.add_argument("query", nargs="*")
+    ap.add_argument("-n", "--limit", type=int, default=20)
+    ap.add_argument("--data", type=Path, default=DATA_DIR, help="archive root (default data/)")
+    ap.add_argument("--rebuild", action="store_true", help="discard the index and rebuild it from the archive")
+    args = ap.parse_args(argv)
+
+    root = index_dir(args.data)
+    t0 = time.perf_counter()
+    with locked(root.with_suffix(".lock")):  # same lock as sync(): a scheduled run may be writing
+        if args.rebuild:
+            shutil.rmtree(root, ignore_errors=True)
+        index = get_index(args.data)
+        added = index.sync(args.data)
+        index.save()
+    if added or args.rebuild:
+        print(f"[search] indexed {added} new docs in {time.perf_counter() - t0:.2f}s ({index.meta['docs']} total)",
+              file=sys.stderr)
+    if not args.query:
+        return
+
+    t0 = time.perf_counter()
+    res = index.query(" ".join(args.query), limit=args.limit)
+    for date, kind, title, url, source in res["hits"]:
+        print(f"{date}  [{kind}] {title} — {source}\n            {url}")
+    print(f"{res['total']} matches in {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
+import hashlib
+import json
 import re
-from collections import Counter
+from collections import OrderedDict
+
+import numpy as np
+
+from config import IDF_PATH, SUMMARY_CACHE_PATH, SUMMARY_CACHE_MAX
+from utils.files import locked, write_text
 
 _WORD = re.compile(r"[A-Za-z][A-Za-z'\-]+")
 _SENT = re.compile(r"(?<=[.!?])\s+")
 
+# Words that are frequent in headlines but never a topic; shared by the summarizer (weight 0),
+# clustering, the search index (published in its meta for the page) and trending terms
+STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are", "was", "were",
+    "by", "from", "as", "at", "that", "this", "it", "be", "after", "over", "says", "say", "new", "its",
+    "his", "her", "their", "has", "have", "will", "into", "about", "up", "out", "amid",
+    "how", "why", "what", "who", "when", "where", "which", "while", "could", "would", "should", "may",
+    "might", "can", "but", "not", "our", "your", "you", "they", "them", "than", "more", "most", "just",
+    "now", "all", "one", "two", "first", "last", "year", "years", "day", "days", "week", "said", "off",
+    "get", "gets", "top", "back", "still", "also", "here", "there", "some", "any", "been", "being",
+})
+
+# Bump when scoring changes so cached summaries from the old engine are not reused
+ENGINE_VERSION = "tfidf-2"
+
 def tokenize(text):
     return _WORD.findall(text or "")
 
@@ -11,27 +33,235 @@ def sentence_split(text):
     # keep sentence separators minimal assumptions
     return [s.strip() for s in _SENT.split(text or "") if s.strip()]
 
+
+# -----------------------------------------------------------
+# Corpus-level IDF (persisted across runs)
+# -----------------------------------------------------------
+class IdfModel:
+    """Document frequencies over every headline seen so far; each run adds only its new items."""
+
+    def __init__(self, path=IDF_PATH):
+        self.path = path  # None: in-memory only
+        self.docs = 0
+        self.df = {}
+        self._dirty = False
+        self._added = (0, {})  # counts added since loading, merged into the file on save
+        self._generation = None
+        if path is None:
+            return
+        self.docs, self.df = self._read()
+
+    def _read(self):
+        try:
+            doc = json.loads(self.path.read_text(encoding="utf-8"))
+            return int(doc.get("docs", 0)), doc.get("df") or {}
+        except Exception:
+            return 0, {}
+
+    def update(self, documents):
+        for text in documents:
+            terms = {w.lower() for w in tokenize(text)}
+            if not terms:
+                continue
+            self.docs += 1
+            added_docs, added_df = self._added
+            self._added = (added_docs + 1, added_df)
+            for t in terms:
+                self.df[t] = self.df.get(t, 0) + 1
+                added_df[t] = added_df.get(t, 0) + 1
+            self._dirty = True
+            self._generation = None
+
+    def generation(self):
+        """Digest of the table (doc count + frequencies): summaries ranked with another table differ."""
+        if self._generation is None:
+            blob = json.dumps(sorted(self.df.items()), ensure_ascii=False).encode("utf-8")
+            self._generation = f"{self.docs}:{hashlib.sha1(blob).hexdigest()[:16]}"
+        return self._generation
+
+    def weights(self, vocab):
+        """Smoothed idf per vocab term; stopwords weigh 0. All 1.0 while the corpus is empty."""
+        df = np.fromiter((self.df.get(t, 0) for t in vocab), dtype=np.float64, count=len(vocab))
+        w = np.log((1.0 + self.docs) / (1.0 + df)) + 1.0
+        stop = np.fromiter((t in STOPWORDS for t in vocab), dtype=bool, count=len(vocab))
+        w[stop] = 0.0
+        return w
+
+    def save(self):
+        """Add this process's new counts to the file as it is now (a concurrent run's counts are kept)."""
+        if not self._dirty or self.path is None:
+            return
+        with locked(self.path.with_suffix(".lock")):
+            docs, df = self._read()
+            added_docs, added_df = self._added
+            for t, n in added_df.items():
+                df[t] = df.get(t, 0) + n
+            self.docs, self.df = docs + added_docs, df
+            self._generation = None
+            write_text(self.path, json.dumps({"docs": self.docs, "df": self.df}, ensure_ascii=False))
+        self._dirty = False
+        self._added = (0, {})
+
+
+# -----------------------------------------------------------
+# Summary cache (content hash -> summary)
+# -----------------------------------------------------------
+class SummaryCache:
+    def __init__(self, path=SUMMARY_CACHE_PATH, max_entries=SUMMARY_CACHE_MAX):
+        self.path = path
+        self.max_entries = max_entries
+        self._dirty = False
+        self._data = OrderedDict()
+        if path is None:
+            return
+        try:
+            self._data.update(json.loads(path.read_text(encoding="utf-8")))
+        except Exception:
+            pass
+
+    @staticmethod
+    def key(text, max_sentences, idf_generation=""):
+        raw = f"{ENGINE_VERSION}\0{idf_generation}\0{max_sentences}\0{text}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if key in self._data:
+            self._data.move_to_end(key)
+            return self._data[key]
+        return None
+
+    def put(self, key, summary):
+        self._data[key] = summary
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        self._dirty = True
+
+    def save(self):
+        """Merge into the file as it is now (a concurrent run's entries are kept, ours are newest)."""
+        if not self._dirty or self.path is None:
+            return
+        with locked(self.path.with_suffix(".lock")):
+            merged = OrderedDict()
+            try:
+                merged.update(json.loads(self.path.read_text(encoding="utf-8")))
+            except Exception:
+                pass
+            for key, summary in self._data.items():
+                merged.pop(key, None)
+                merged[key] = summary
+            while len(merged) > self.max_entries:
+                merged.popitem(last=False)
+            self._data = merged
+            write_text(self.path, json.dumps(self._data, ensure_ascii=False))
+        self._dirty = False
+
+
+_IDF = None
+_CACHE = None
+
+def get_idf():
+    global _IDF
+    if _IDF is None:
+        _IDF = IdfModel()
+    return _IDF
+
+def get_summary_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = SummaryCache()
+    return _CACHE
+
+def use_ephemeral():
+    """Empty in-memory IDF and cache (cassette record/replay runs must not depend on local state)."""
+    global _IDF, _CACHE
+    _IDF = IdfModel(None)
+    _CACHE = SummaryCache(None)
+
+def save_state():
+    """Persist IDF and cached summaries (call once at the end of a run)."""
+    if _IDF is not None:
+        _IDF.save()
+    if _CACHE is not None:
+        _CACHE.save()
+
+
+# -----------------------------------------------------------
+# Engine
+# -----------------------------------------------------------
+def _rank(texts, max_sentences, idf):
+    """
+    Score every sentence of every text in one pass over a sparse sentence-term matrix.
+
+    Rows are sentences (CSR: indptr/indices/counts), terms are interned into one vocab.
+    A sentence scores the mean over its tokens of (term frequency in its own document ×
+    corpus idf); the top `max_sentences` per document are returned in original order.
+    """
+    docs = [sentence_split(t) if t else [] for t in texts]
+    vocab, indices, counts, indptr, row_doc = {}, [], [], [0], []
+    for d, sentences in enumerate(docs):
+        for s in sentences:
+            row = {}
+            for w in tokenize(s):
+                j = vocab.setdefault(w.lower(), len(vocab))
+                row[j] = row.get(j, 0) + 1
+            indices.extend(row.keys())
+            counts.extend(row.values())
+            indptr.append(len(indices))
+            row_doc.append(d)
+
+    if not row_doc:
+        return [" ".join(s) for s in docs]
+    indices = np.asarray(indices, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+    indptr = np.asarray(indptr, dtype=np.int64)
+    row_doc = np.asarray(row_doc, dtype=np.int64)
+    nnz_doc = np.repeat(row_doc, np.diff(indptr))
+
+    # document term frequencies, kept sparse: one slot per distinct (doc, term) pair present
+    pairs = nnz_doc * len(vocab) + indices
+    _, pair_of = np.unique(pairs, return_inverse=True)
+    doc_tf = np.bincount(pair_of, weights=counts)
+    weight = doc_tf[pair_of] * idf.weights(list(vocab))[indices]
+
+    def _row_sums(x):
+        cs = np.concatenate(([0.0], np.cumsum(x)))
+        return cs[indptr[1:]] - cs[indptr[:-1]]
+
+    scores = _row_sums(counts * weight) / (_row_sums(counts) + 1e-9)
+
+    out, start = [], 0
+    for sentences in docs:
+        n = len(sentences)
+        if n <= max_sentences:
+            out.append(" ".join(sentences))
+        else:
+            s = scores[start:start + n]
+            best = np.sort(np.argsort(-s, kind="stable")[:max_sentences])
+            out.append(" ".join(sentences[i] for i in best))
+        start += n
+    return out
+
+def summarize_many(texts, max_sentences=3):
+    """
+    Batch extractive summaries; repeated texts come straight from the cache, keyed by content
+    and by the IDF table they were ranked with (a grown corpus re-ranks them).
+    """
+    cache = get_summary_cache()
+    idf = get_idf()
+    generation = idf.generation()
+    keys = [SummaryCache.key(t or "", max_sentences, generation) for t in texts]
+    results = [cache.get(k) if t else "" for t, k in zip(texts, keys)]
+    todo = [i for i, r in enumerate(results) if r is None]
+    if todo:
+        fresh = _rank([texts[i] for i in todo], max_sentences, idf)
+        for i, summary in zip(todo, fresh):
+            results[i] = summary
+            cache.put(keys[i], summary)
+    return results
+
 def summarize(text, max_sentences=3):
-    """Simple frequency-based extractive summary (no external models)."""
+    """Extractive TF-IDF summary (no external models)."""
     if not text:
         return ""
-    sentences = sentence_split(text)
-    if len(sentences) <= max_sentences:
-        return " ".join(sentences)
-
-    words = [w.lower() for w in tokenize(text)]
-    freq = Counter(words)
-    # ignore very common short words
-    for stop in ["the","a","an","and","or","of","to","in","on","for","with","is","are","was","were","by","from","as","at","that","this","it","be"]:
-        freq.pop(stop, None)
-
-    scores = []
-    for s in sentences:
-        sw = [w.lower() for w in tokenize(s)]
-        score = sum(freq.get(w, 0) for w in sw) / (len(sw) + 1e-9)
-        scores.append((score, s))
-
-    best = [s for _, s in sorted(scores, key=lambda x: x[0], reverse=True)[:max_sentences]]
-    # preserve original order
-    ordered = [s for s in sentences if s in best]
-    return " ".join(ordered)
+    return summarize_many([text], max_sentences)[0]
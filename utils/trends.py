@@ -0,0 +1,209 @@
+# utils/trends.py
+"""
+Trending terms: this week's headline vocabulary against a trailing baseline.
+
+    python -m utils.trends                  # top terms for the latest day in data/
+    python -m utils.trends --date 2025-10-14 --window 7 --baseline 28
+
+Per-day term counts (number of news/HN titles containing the term) are kept in
+data/.cache/trends as a sparse day × term matrix in COO form, opened memory-mapped:
+
+    day.i32   days since 1970-01-01     term.i32   index into vocab.json     count.i32
+
+Each sync appends triplets only for what the day logs gained since the last one (a day with
+several runs simply has several triplets per term; reads sum them), so the archive is never
+re-tokenized. Scores for a window are two bincounts over the triplets plus array math.
+"""
+from __future__ import annotations
+import argparse
+import datetime as dt
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from config import DATA_DIR, CACHE_DIR, TREND_WINDOW_DAYS, TREND_BASELINE_DAYS, TREND_MIN_COUNT
+from utils import daystore
+from utils.cluster import title_tokens
+from utils.files import locked, write_json
+
+TRENDS_VERSION = 1
+_EPOCH = dt.date(1970, 1, 1)
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_COLUMNS = {"day": np.int32, "term": np.int32, "count": np.int32}
+
+
+def trends_dir(data_dir: Path = DATA_DIR) -> Path:
+    return Path(data_dir) / CACHE_DIR.name / "trends"
+
+
+def _day_number(date: dt.date | str) -> int:
+    if isinstance(date, str):
+        date = dt.date.fromisoformat(date)
+    return (date - _EPOCH).days
+
+
+def record_titles(rec: Dict[str, Any]) -> List[str]:
+    titles = [it.get("title") for kind in ("world", "local") for it in rec.get(kind) or [] if not it.get("error")]
+    titles += [it.get("title") for it in rec.get("hn") or []]
+    return [t for t in titles if t]
+
+
+def terms(title: str) -> set:
+    return {t for t in title_tokens(title) if len(t) > 2}  # title_tokens already drops STOPWORDS
+
+
+class TermMatrix:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        try:
+            self.meta = json.loads((self.root / "meta.json").read_text(encoding="utf-8"))
+            self.vocab: List[str] = json.loads((self.root / "vocab.json").read_text(encoding="utf-8"))
+        except Exception:
+            self.meta, self.vocab = None, []
+        if not self.meta or self.meta.get("version") != TRENDS_VERSION:
+            self.meta = {"version": TRENDS_VERSION, "nnz": 0, "titles": {}, "days": {}}
+            self.vocab = []
+            for p in self.root.glob("*.*"):
+                p.unlink()
+        self._ids = {t: i for i, t in enumerate(self.vocab)}
+        self._maps: Dict[str, np.ndarray] = {}
+
+    def _term_id(self, term: str) -> int:
+        if term not in self._ids:
+            self._ids[term] = len(self.vocab)
+            self.vocab.append(term)
+        return self._ids[term]
+
+    def update(self, data_dir: Path = DATA_DIR) -> int:
+        """Append term counts for whatever the day logs gained since the last update; returns titles added."""
+        data_dir = Path(data_dir)
+        triplets: List[tuple] = []
+        cursors, titles = dict(self.meta["days"]), dict(self.meta["titles"])
+        added = 0
+        for d in sorted(p for p in data_dir.iterdir() if p.is_dir() and _DATE_RE.match(p.name)) if data_dir.exists() else []:
+            records, cursor = daystore.tail(d, cursors.get(d.name))
+            if cursor is not None:
+                cursors[d.name] = cursor
+            batch = [t for rec in records for t in record_titles(rec)]
+            if not batch:
+                continue
+            counts = Counter(term for title in batch for term in terms(title))
+            day = _day_number(d.name)
+            # Sorted, so new vocabulary ids do not depend on the hash seed
+            triplets += [(day, self._term_id(term), counts[term]) for term in sorted(counts)]
+            titles[d.name] = titles.get(d.name, 0) + len(batch)
+            added += len(batch)
+        if cursors == self.meta["days"]:
+            return 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._maps.clear()
+        nnz = self.meta["nnz"]
+        cols = list(zip(*triplets)) if triplets else [(), (), ()]
+        for (name, dtype), values in zip(_COLUMNS.items(), cols):
+            p = self.root / f"{name}.bin"
+            with p.open("ab") as f:
+                f.truncate(nnz * np.dtype(dtype).itemsize)  # drop an interrupted append
+                f.write(np.asarray(values, dtype=dtype).tobytes())
+        self.meta.update(nnz=nnz + len(triplets), days=cursors, titles=titles)
+        write_json(self.root / "vocab.json", self.vocab, indent=None)
+        write_json(self.root / "meta.json", self.meta, indent=None)
+        return added
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._maps:
+            n, dtype = self.meta["nnz"], _COLUMNS[name]
+            self._maps[name] = np.memmap(self.root / f"{name}.bin", dtype=dtype, mode="r", shape=(n,)) if n \
+                else np.zeros(0, dtype=dtype)
+        return self._maps[name]
+
+    def counts(self, start: dt.date, end: dt.date) -> np.ndarray:
+        """Dense per-term title counts over [start, end] (inclusive)."""
+        day = self.column("day")
+        mask = (day >= _day_number(start)) & (day <= _day_number(end))
+        return np.bincount(self.column("term")[mask], weights=self.column("count")[mask], minlength=len(self.vocab))
+
+    def titles(self, start: dt.date, end: dt.date) -> int:
+        lo, hi = str(start), str(end)
+        return sum(n for d, n in self.meta["titles"].items() if lo <= d <= hi)
+
+
+def load(data_dir: Path = DATA_DIR, update: bool = True) -> TermMatrix:
+    root = trends_dir(data_dir)
+    if not update:
+        return TermMatrix(root)
+    with locked(root.with_suffix(".lock")):  # one updater at a time; readers only see committed rows
+        m = TermMatrix(root)
+        m.update(data_dir)
+    return m
+
+
+def trending(data_dir: Path = DATA_DIR, date: dt.date | str | None = None, n: int = 10,
+             window: int = TREND_WINDOW_DAYS, baseline: int = TREND_BASELINE_DAYS,
+             min_count: int = TREND_MIN_COUNT, update: bool = False) -> List[Dict[str, Any]]:
+    """
+    Terms mentioned unusually often in the `window` days ending at `date` compared with the
+    `baseline` days before them: score = (observed - expected) / sqrt(expected + 1), where
+    expected scales the baseline count by the ratio of title volumes. Until the archive
+    reaches back over the whole baseline there is nothing to compare with, and no terms are
+    returned.
+    """
+    m = load(data_dir, update=update)
+    if not m.meta["nnz"]:
+        return []
+    if date is None:
+        date = max(m.meta["titles"], default=None)
+        if date is None:
+            return []
+    end = dt.date.fromisoformat(date) if isinstance(date, str) else date
+    w_start = end - dt.timedelta(days=window - 1)
+    b_end = w_start - dt.timedelta(days=1)
+    b_start = b_end - dt.timedelta(days=baseline - 1)
+    if min(m.meta["titles"], default=str(end)) > str(b_start):
+        return []  # too little history: every term would look new
+
+    observed = m.counts(w_start, end)
+    base = m.counts(b_start, b_end)
+    w_titles, b_titles = m.titles(w_start, end), m.titles(b_start, b_end)
+    if not b_titles:
+        return []
+    expected = base * (w_titles / b_titles)
+    score = (observed - expected) / np.sqrt(expected + 1.0)
+    score[observed < min_count] = -np.inf
+    # Ties break on the term itself (ids of older vocabularies follow set order)
+    top = np.lexsort((np.array(m.vocab, dtype=object), -score))[:n]
+    return [
+        {"term": m.vocab[i], "count": int(observed[i]),
+         "expected": round(float(expected[i]), 1),
+         "score": round(float(score[i]), 2)}
+        for i in top if np.isfinite(score[i]) and score[i] > 0
+    ]
+
+
+def sync(data_dir: Path = DATA_DIR) -> int:
+    root = trends_dir(data_dir)
+    with locked(root.with_suffix(".lock")):
+        return TermMatrix(root).update(data_dir)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Trending headline terms vs. a trailing baseline.")
+    ap.add_argument("--data", type=Path, default=DATA_DIR)
+    ap.add_argument("--date", default=None, help="window end (default: latest day)")
+    ap.add_argument("--window", type=int, default=TREND_WINDOW_DAYS)
+    ap.add_argument("--baseline", type=int, default=TREND_BASELINE_DAYS)
+    ap.add_argument("-n", type=int, default=15)
+    args = ap.parse_args(argv)
+    rows = trending(args.data, args.date, n=args.n, window=args.window, baseline=args.baseline, update=True)
+    for r in rows:
+        print(f"{r['term']:<20} {r['count']:>6}  (expected {r['expected']}, score {r['score']:g})")
+    if not rows:
+        print(f"no trending terms (or fewer than {args.window + args.baseline} days of history)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from __future__ import annotations
-import os, sys, json, datetime as dt
+import os, sys, datetime as dt
 from pathlib import Path
 
 # --- Load .env locally; harmless in Actions where vars come from secrets/vars
@@ -14,7 +14,8 @@ try:
 except Exception:
     from backports.zoneinfo import ZoneInfo  # unlikely on Actions
 
-from utils.summarize import summarize
+# The summarizer, day store and trends (numpy and friends) are imported only past the hour
+# gate: the hourly job exits in a few tens of milliseconds 23 times a day.
 
 ROOT = Path(__file__).parent.resolve()
 DATA = ROOT / "data"
@@ -37,21 +38,15 @@ def today_dir() -> Path | None:
     return d if d.exists() else None
 
 def load_raw(d: Path) -> dict:
-    p = d / "raw.json"
-    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
-
-def _uniq(items, key="title"):
-    seen, out = set(), []
-    for it in items or []:
-        k = (it or {}).get(key) or ""
-        if not k or k in seen:
-            continue
-        seen.add(k)
-        out.append(it)
-    return out
+    # Day log (or a legacy raw.json) folded into the combined payload; failing both,
+    # the day's run snapshots (loose or packed)
+    from utils import daystore, packs
+    return daystore.load_day(d) or daystore.fold_snapshots(list(packs.load_runs(d).values()))
 
 def _fmt_list(items, take=5, with_source=True):
-    items = _uniq(items)[:take]
+    # One entry per story: near-duplicates across outlets are clustered, widest coverage first
+    from utils.cluster import cluster_stories, also_covered
+    items = cluster_stories(items)[:take]
     if not items:
         return "<p><em>No data</em></p>"
     lis = []
@@ -59,7 +54,7 @@ def _fmt_list(items, take=5, with_source=True):
         title = (it or {}).get("title") or "(no title)"
         link = (it or {}).get("link") or "#"
         src  = (it or {}).get("source") or ""
-        suffix = f" — {src}" if (with_source and src) else ""
+        suffix = f" — {src}{also_covered(it)}" if (with_source and src) else ""
         lis.append(f'<li><a href="{link}">{title}</a>{suffix}</li>')
     return "<ol>\n" + "\n".join(lis) + "\n</ol>"
 
@@ -69,8 +64,9 @@ def synthesize_day(raw: dict) -> str:
     global + local news headlines, with HN titles as context.
     """
     news = (raw.get("news") or {})
-    world = news.get("world") or []
-    local = news.get("local") or []
+    # Feed-error placeholders ("(feed error from …)") are not headlines
+    world = [it for it in news.get("world") or [] if not (it or {}).get("error")]
+    local = [it for it in news.get("local") or [] if not (it or {}).get("error")]
     hn_items = (raw.get("hn") or {}).get("items", []) or []
 
     titles = []
@@ -85,10 +81,11 @@ def synthesize_day(raw: dict) -> str:
         return "Today’s coverage was light. See the links below for details."
 
     # Produce a crisp 2–3 sentence neutral brief
+    from utils.summarize import summarize
     brief = summarize(blob, max_sentences=3)
     return brief or "A cross-section of global, local, and technology headlines shaped today’s coverage."
 
-def build_email_payload(raw: dict) -> tuple[str, str]:
+def build_email_payload(raw: dict, trending: list | None = None) -> tuple[str, str]:
     date = raw.get("date") or now_local().date().isoformat()
 
     # Sections: Global, Local, Hacker News
@@ -124,6 +121,12 @@ def build_email_payload(raw: dict) -> tuple[str, str]:
     else:
         hn_block = "<p><em>No data</em></p>"
 
+    # Trending terms (this week vs. baseline)
+    trending_block = (
+        "<p>" + " · ".join(f"<strong>{t['term']}</strong> ({t['count']})" for t in trending) + "</p>"
+        if trending else "<p><em>No data</em></p>"
+    )
+
     # Daily brief
     daily_brief = synthesize_day(raw)
 
@@ -142,6 +145,9 @@ def build_email_payload(raw: dict) -> tuple[str, str]:
     lines.append("<h3>🏙️ Local — Top 5</h3>")
     lines.append(local_block)
 
+    lines.append("<h3>🔥 Trending This Week</h3>")
+    lines.append(trending_block)
+
     lines.append("<h3>🚀 Hacker News — Top 10</h3>")
     lines.append(hn_block)
 
@@ -157,8 +163,11 @@ def build_email_payload(raw: dict) -> tuple[str, str]:
 # Main
 # ---------------------------
 def main():
-    # Allow local testing anytime with --test
+    # Allow local testing anytime with --test; --gate only answers "is it time?" (stdlib only,
+    # so the workflow can skip installing dependencies when it is not); --profile writes
+    # per-stage profiles to out/profile/<timestamp>/
     force_test = ("--test" in sys.argv)
+    gate_only = ("--gate" in sys.argv)
 
     # Gate to 22:00 local (top of the hour), unless --test provided
     nl = now_local()
@@ -173,18 +182,42 @@ def main():
     if not should_send:
         print(f"[wrapup] Not 22:00 in {TZ} (now {nl}). Skipping.")
         return
+    if gate_only:
+        print(f"[wrapup] 22:00 in {TZ}: wrap-up due.")
+        return
+
+    if "--profile" in sys.argv:
+        from utils import profiling
+        with profiling.session("wrapup.py", sys.argv[1:]):
+            wrap_up()
+    else:
+        wrap_up()
+
+def wrap_up():
+    """Build the email. Stage timings are printed only: the wrap-up job commits nothing."""
+    from utils import perf, trends
+    from utils.summarize import save_state
 
+    recorder = perf.start("wrapup")
     d = today_dir()
     if not d:
         print("[wrapup] No data folder for today; skipping email.")
         return
 
-    raw = load_raw(d)
-    subject, html = build_email_payload(raw)
+    with perf.span("load"):
+        raw = load_raw(d)
+    with perf.span("trending"):
+        trending = trends.trending(DATA, d.name, n=8, update=True)
+    with perf.span("email"):
+        subject, html = build_email_payload(raw, trending)
+    with perf.span("save_state"):
+        save_state()
 
     (OUT / "email_subject.txt").write_text(subject, encoding="utf-8")
     (OUT / "email.html").write_text(html, encoding="utf-8")
     print("[wrapup] Email prepared at out/email.html")
+    for line in perf.summary_lines(recorder.report()):
+        print(f"[perf] {line}")
 
 if __name__ == "__main__":
     main()